@@ -0,0 +1,69 @@
+"""
+近邻索引基准测试：IVF近似检索 vs 精确检索
+
+用带簇结构的随机float32嵌入模拟不同大小的论文库，统计IVF索引的训练时间、增量更新时间、
+每个查询的检索时间，以及与精确top-k检索相比的召回率。
+
+用法:
+    python -m benchmarks.bench_ann_index --corpus-sizes 2000 10000 50000 --queries 500 --k 10 --probes 8
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from loguru import logger
+
+from src.ann_index import IVFIndex
+from src.similarity import normalize_rows
+
+
+def clustered_embeddings(rng: np.random.Generator, n: int, dim: int, topics: int = 64) -> np.ndarray:
+    """论文嵌入聚集在若干主题附近，比各向同性的随机向量更接近真实分布"""
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    return centers[rng.integers(0, topics, n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF index against exact top-k search")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[2000, 10000, 50000], help="Library sizes")
+    parser.add_argument("--queries", type=int, default=500, help="Number of candidate papers")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per candidate")
+    parser.add_argument("--probes", type=int, default=8, help="Clusters searched per query")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    rng = np.random.default_rng(0)
+    print(f"{'corpus':>8} {'lists':>6} {'train':>8} {'update':>8} {'ivf/query':>10} {'exact/query':>12} {'recall':>7}")
+    for size in args.corpus_sizes:
+        corpus = clustered_embeddings(rng, size, args.dim)
+        queries = clustered_embeddings(rng, args.queries, args.dim)
+        keys = [f"K{i}:1" for i in range(size)]
+
+        start = time.perf_counter()
+        index = IVFIndex.train(keys[:size * 9 // 10], corpus[:size * 9 // 10])
+        train_time = time.perf_counter() - start
+        # 模拟论文库新增10%的条目
+        start = time.perf_counter()
+        index = index.update(keys, corpus)
+        update_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows, _ = index.search(queries, args.k, args.probes)
+        ivf_time = (time.perf_counter() - start) / args.queries
+
+        start = time.perf_counter()
+        exact = np.argsort(-(normalize_rows(queries) @ normalize_rows(corpus).T), axis=1)[:, :args.k]
+        exact_time = (time.perf_counter() - start) / args.queries
+
+        recall = np.mean([len(set(r) & set(e)) / args.k for r, e in zip(rows, exact)])
+        print(f"{size:>8} {index.n_lists:>6} {train_time:>7.2f}s {update_time:>7.3f}s "
+              f"{ivf_time * 1000:>8.2f}ms {exact_time * 1000:>10.2f}ms {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+arXiv获取基准测试：串行查询 vs 并发获取引擎
+
+在本地伪arXiv服务器上对比原来的串行流程（类别查询后逐个关键词查询）
+和 fetch_arxiv_papers 的并发流程。
+
+用法:
+    python -m benchmarks.bench_arxiv_fetch --latency 0.5 --workers 8
+"""
+
+import argparse
+import sys
+import time
+
+import arxiv
+from loguru import logger
+
+from benchmarks.fake_arxiv import FakeArxivServer
+from src.arxiv_client import (
+    deduplicate_and_sort_papers,
+    fetch_arxiv_papers,
+    get_arxiv_paper_by_category,
+    get_arxiv_papers_by_keywords,
+)
+
+ARXIV_QUERY = "cs.AI+cs.CV+cs.LG+cs.CL+cs.RO"
+ARXIV_QUERY_KEYWORD = (
+    "Embodied Agent, Robot Manipulation, Robotic Manipulation, Robot Navigation, Grasping, "
+    "Robot Learning, Vision-Language-Action Model, Vision Language Action Model, "
+    "Reinforcement Learning, Imitation Learning"
+)
+
+
+def run_serial() -> list:
+    papers = get_arxiv_paper_by_category(ARXIV_QUERY)
+    papers.extend(get_arxiv_papers_by_keywords(ARXIV_QUERY_KEYWORD))
+    return deduplicate_and_sort_papers(papers)
+
+
+def run_concurrent(workers: int, interval: float) -> list:
+    return fetch_arxiv_papers(ARXIV_QUERY, ARXIV_QUERY_KEYWORD,
+                              max_workers=workers, min_request_interval=interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent arxiv fetching")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake server latency per request (s)")
+    parser.add_argument("--results", type=int, default=40, help="Results per query")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent workers")
+    parser.add_argument("--interval", type=float, default=0.05, help="Per-host request interval (s)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    with FakeArxivServer(latency=args.latency, results_per_query=args.results) as server:
+        arxiv.Client.query_url_format = server.query_url_format
+
+        start = time.perf_counter()
+        serial = run_serial()
+        serial_time = time.perf_counter() - start
+        serial_requests = server.request_count
+
+        start = time.perf_counter()
+        concurrent = run_concurrent(args.workers, args.interval)
+        concurrent_time = time.perf_counter() - start
+        concurrent_requests = server.request_count - serial_requests
+
+    assert {p.arxiv_id for p in serial} == {p.arxiv_id for p in concurrent}, "结果不一致"
+    print(f"papers:     {len(serial)}")
+    print(f"serial:     {serial_time:6.2f}s  ({serial_requests} requests)")
+    print(f"concurrent: {concurrent_time:6.2f}s  ({concurrent_requests} requests, workers={args.workers})")
+    print(f"speedup:    {serial_time / concurrent_time:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
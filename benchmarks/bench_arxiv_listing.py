@@ -0,0 +1,55 @@
+"""
+arXiv类别论文获取基准测试：搜索API分页 vs 每日公告列表(RSS)
+
+在本地伪arXiv服务器上对比两种后端获取同样规模的类别论文所需的请求数和时间。
+
+用法:
+    python -m benchmarks.bench_arxiv_listing --results 600 --interval 0.5
+"""
+
+import argparse
+import sys
+import time
+
+import arxiv
+from loguru import logger
+
+import src.arxiv_client as arxiv_client
+from benchmarks.fake_arxiv import FakeArxivServer
+
+ARXIV_QUERY = "cs.AI+cs.CV+cs.LG+cs.CL+cs.RO"
+
+
+def run(backend: str, interval: float) -> list:
+    return arxiv_client.fetch_arxiv_papers(ARXIV_QUERY, None, max_workers=5,
+                                           min_request_interval=interval, backend=backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search API vs announcement listing")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake server latency per request (s)")
+    parser.add_argument("--results", type=int, default=600, help="Papers per query / per category listing")
+    parser.add_argument("--interval", type=float, default=0.5, help="Per-host request interval (s)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    with FakeArxivServer(latency=args.latency, results_per_query=args.results) as server:
+        arxiv.Client.query_url_format = server.query_url_format
+        arxiv_client.LISTING_URL_FORMAT = server.listing_url_format
+
+        # 搜索API的一次类别查询要返回全部类别的论文，公告列表则是每个类别各一份
+        categories = len(ARXIV_QUERY.split("+"))
+        for backend, per_query in (("search", args.results * categories), ("rss", args.results)):
+            server.results_per_query = per_query
+            before = server.request_count
+            start = time.perf_counter()
+            papers = run(backend, args.interval)
+            elapsed = time.perf_counter() - start
+            print(f"{backend:<10}: {elapsed:6.2f}s  {server.request_count - before:3d} requests  "
+                  f"{len(papers)} papers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+嵌入后端基准测试：torch（SentenceTransformer）vs 导出的ONNX模型（OnnxEncoder）
+
+对同一批文本分别用两个后端编码，报告：
+- 加载时间（含导入torch / onnxruntime）和编码吞吐（文本/秒，预热一批后计时）；
+- 精度一致性：每篇文本两个后端嵌入的余弦相似度（最小值、平均值）；
+- 排序一致性：把文本分为论文库和候选论文，按 traditional_rerank_paper 的时间衰减加权相似度打分，
+  比较两个后端打分的Spearman秩相关系数和前K篇的重合比例。
+任何一项低于阈值时以非零状态退出，可在更换模型或量化设置后作为检查运行。
+
+默认文本是按模板随机组合的英文摘要；用 --texts 指定每行一篇摘要的文件
+（例如从Zotero导出的论文库摘要）可以在真实数据上检查。
+
+用法:
+    python -m src.onnx_encoder --model avsolatorio/GIST-small-Embedding-v0 --output models/GIST-small-Embedding-v0-onnx
+    python -m benchmarks.bench_encoder --onnx-model models/GIST-small-Embedding-v0-onnx --texts 400
+    python -m benchmarks.bench_encoder --onnx-model models/GIST-small-Embedding-v0-onnx --onnx-file onnx/model_quint8_avx2.onnx
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from src.onnx_encoder import DEFAULT_ONNX_FILE
+from src.similarity import decay_weighted_similarity, normalize_rows
+
+TASKS = ["robot manipulation", "legged locomotion", "embodied navigation", "dexterous grasping",
+         "autonomous driving", "visual question answering", "paper recommendation", "protein structure prediction",
+         "speech recognition", "code generation", "multi-agent coordination", "3D scene reconstruction"]
+METHODS = ["diffusion policy", "vision-language-action model", "graph neural network", "transformer world model",
+           "contrastive pretraining", "model predictive control", "retrieval-augmented language model",
+           "imitation learning from human videos", "offline reinforcement learning", "neural radiance field"]
+FINDINGS = ["improves success rate by a large margin", "reduces sample complexity", "generalizes to unseen objects",
+            "runs in real time on embedded hardware", "transfers from simulation to the real world without fine-tuning",
+            "matches larger models at a fraction of the compute", "is robust to sensor noise and occlusion"]
+BENCHMARKS = ["a new real-robot benchmark", "standard simulation suites", "three public datasets",
+              "a large-scale user study", "long-horizon household tasks"]
+
+# ONNX模型（包括int8量化模型）可接受的最低一致性
+MIN_MEAN_COSINE = 0.99
+MIN_COSINE = 0.97
+MIN_SPEARMAN = 0.98
+MIN_TOP_K_OVERLAP = 0.9
+
+
+def synthetic_texts(n: int, seed: int = 0) -> list[str]:
+    """按模板随机组合任务、方法和结论，生成 n 篇长度与真实摘要相近的英文摘要"""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n):
+        task, other = rng.choice(TASKS, 2, replace=False)
+        method, baseline = rng.choice(METHODS, 2, replace=False)
+        finding, second = rng.choice(FINDINGS, 2, replace=False)
+        texts.append(
+            f"We study {task}, where existing approaches based on {baseline} struggle with limited data and "
+            f"long horizons. We propose a {method} that exploits structure shared with {other}. "
+            f"Our approach {finding}, and an ablation shows that it {second}. "
+            f"Experiments on {rng.choice(BENCHMARKS)} demonstrate consistent gains over strong baselines. "
+            f"Code and models will be released.")
+    return texts
+
+
+def load_texts(source: str) -> list[str]:
+    if source.isdigit():
+        return synthetic_texts(int(source))
+    return [line.strip() for line in Path(source).read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def load_torch(model: str):
+    start = time.perf_counter()
+    from sentence_transformers import SentenceTransformer
+    encoder = SentenceTransformer(model, device="cpu")
+    return encoder, time.perf_counter() - start
+
+
+def load_onnx(model: str, file_name: str, batch_size: int):
+    start = time.perf_counter()
+    from src.onnx_encoder import OnnxEncoder
+    encoder = OnnxEncoder(model, file_name, batch_size=batch_size)
+    return encoder, time.perf_counter() - start
+
+
+def throughput(encoder, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    """返回 (嵌入, 每秒编码的文本数)；先编码一批预热"""
+    encoder.encode(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    embeddings = np.asarray(encoder.encode(texts, batch_size=batch_size), dtype=np.float32)
+    return embeddings, len(texts) / (time.perf_counter() - start)
+
+
+def rank_scores(embeddings: np.ndarray, n_corpus: int) -> np.ndarray:
+    """前 n_corpus 篇作为论文库（按顺序视为从新到旧），其余作为候选论文的时间衰减加权相似度"""
+    weights = 1 / (1 + np.log10(np.arange(n_corpus) + 1))
+    return decay_weighted_similarity(embeddings[n_corpus:], embeddings[:n_corpus], weights / weights.sum())
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ranks_a = np.argsort(np.argsort(a)).astype(np.float64)
+    ranks_b = np.argsort(np.argsort(b)).astype(np.float64)
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the torch and ONNX embedding backends")
+    parser.add_argument("--model", default="avsolatorio/GIST-small-Embedding-v0", help="sentence-transformers model")
+    parser.add_argument("--onnx-model", default=None, help="Exported ONNX directory or repo (default: --model)")
+    parser.add_argument("--onnx-file", default=DEFAULT_ONNX_FILE, help="ONNX file inside the model directory")
+    parser.add_argument("--texts", default="400", help="Number of synthetic texts, or a file with one text per line")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per inference batch")
+    parser.add_argument("--top-k", type=int, default=20, help="Top candidates compared for ranking parity")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    texts = load_texts(args.texts)
+    n_corpus = len(texts) // 2
+    onnx_encoder, onnx_load = load_onnx(args.onnx_model or args.model, args.onnx_file, args.batch_size)
+    onnx_embeddings, onnx_rate = throughput(onnx_encoder, texts, args.batch_size)
+    torch_encoder, torch_load = load_torch(args.model)
+    torch_embeddings, torch_rate = throughput(torch_encoder, texts, args.batch_size)
+
+    cosine = (normalize_rows(torch_embeddings) * normalize_rows(onnx_embeddings)).sum(axis=1)
+    torch_scores = rank_scores(torch_embeddings, n_corpus)
+    onnx_scores = rank_scores(onnx_embeddings, n_corpus)
+    top_k = min(args.top_k, len(torch_scores))
+    overlap = len(set(np.argsort(-torch_scores)[:top_k]) & set(np.argsort(-onnx_scores)[:top_k])) / top_k
+    rho = spearman(torch_scores, onnx_scores)
+
+    print(f"{len(texts)} texts ({n_corpus} library, {len(texts) - n_corpus} candidates), batch {args.batch_size}")
+    print(f"{'backend':>8} {'load':>8} {'texts/s':>9}")
+    print(f"{'torch':>8} {torch_load:>7.2f}s {torch_rate:>9.1f}")
+    print(f"{'onnx':>8} {onnx_load:>7.2f}s {onnx_rate:>9.1f}")
+    checks = [
+        ("mean cosine", float(cosine.mean()), MIN_MEAN_COSINE),
+        ("min cosine", float(cosine.min()), MIN_COSINE),
+        ("spearman", rho, MIN_SPEARMAN),
+        (f"top-{top_k} overlap", overlap, MIN_TOP_K_OVERLAP),
+    ]
+    for name, value, threshold in checks:
+        print(f"{name:>16}: {value:.4f} (>= {threshold}) {'ok' if value >= threshold else 'FAIL'}")
+    if any(value < threshold for _, value, threshold in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
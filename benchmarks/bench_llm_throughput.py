@@ -0,0 +1,139 @@
+"""
+LLM吞吐基准测试：在本地伪LLM服务器上运行论文评分（llm_based_rerank_paper）和TLDR/机构信息补全（enrich_papers）
+
+对每组 并发请求数 x 补全批大小 的组合各运行一次完整流程，统计墙钟时间、LLM调用次数、
+发送的prompt token数（其中命中服务端前缀缓存的部分）和因限流等待的时间。服务器可以模拟延迟、限流、5xx错误和回复中缺失的条目，
+候选论文的tex使用 benchmarks/fixtures/tex 中的样例，不访问网络。
+
+用法:
+    python -m benchmarks.bench_llm_throughput --candidates 40 --latency 0.5 --rpm 60 --window 10 \\
+        --concurrency 1 4 --enrich-batch-size 1 5 --error-rate 0.05 --drop-rate 0.05
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.fake_llm import FakeLLMServer
+from src.enrichment import enrich_papers
+from src.llm import get_llm, set_global_llm
+from src.paper import ArxivPaper, Author
+from src.recommender import llm_based_rerank_paper
+
+FIXTURES = Path(__file__).parent / "fixtures" / "tex"
+
+TOPICS = ["robot manipulation", "vision-language-action models", "imitation learning", "embodied navigation",
+          "reinforcement learning", "diffusion policies", "sim-to-real transfer", "grasp planning"]
+
+
+def make_candidates(n: int) -> list[ArxivPaper]:
+    """构造 n 篇候选论文，tex 预先设为样例文件，code_url 设为None，补全时不会访问网络"""
+    fixtures = [p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("*.tex"))]
+    published = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    papers = []
+    for i in range(n):
+        topic = TOPICS[i % len(TOPICS)]
+        paper = ArxivPaper(
+            arxiv_id=f"2501.{i:05d}",
+            title=f"Scaling {topic} with structured priors, part {i}",
+            summary=f"We study {topic}. " * 40,
+            authors=[Author(f"Author {i}-{k}") for k in range(4)],
+            published=published,
+            pdf_url=f"https://arxiv.org/pdf/2501.{i:05d}",
+        )
+        paper.tex = {"all": fixtures[i % len(fixtures)]}
+        paper.code_url = None
+        papers.append(paper)
+    return papers
+
+
+def make_corpus(n: int) -> list[dict]:
+    added = datetime(2025, 1, 1)
+    return [{"data": {
+        "title": f"Prior work on {TOPICS[i % len(TOPICS)]} #{i}",
+        "abstractNote": f"An earlier paper about {TOPICS[i % len(TOPICS)]}. " * 20,
+        "dateAdded": (added - timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }} for i in range(n)]
+
+
+def run_once(server: FakeLLMServer, args, concurrency: int, enrich_batch_size: int) -> dict:
+    config = {
+        "research_interests": ["embodied AI", "robot learning"],
+        "corpus_batch_size": 20,
+        "candidate_batch_size": args.candidate_batch_size,
+        "max_requests_per_minute": args.client_rpm,
+        "max_concurrent_requests": concurrency,
+        "api_retry_attempts": 5,
+        "api_retry_delay": 0.5,
+    }
+    set_global_llm(api_key="fake", base_url=server.base_url, model="fake", config=config)
+    candidates = make_candidates(args.candidates)
+    corpus = make_corpus(args.corpus)
+    server_requests, server_tokens, server_cached = server.request_count, server.prompt_tokens, server.cached_tokens
+
+    start = time.perf_counter()
+    ranked = llm_based_rerank_paper(candidates, corpus, config)
+    rerank_time = time.perf_counter() - start
+    enrich_papers(ranked[:args.enrich], batch_size=enrich_batch_size)
+    elapsed = time.perf_counter() - start
+
+    endpoint = get_llm().aclient.endpoints[0]
+    unavailable = sum(p.tldr == "Summary unavailable" for p in ranked[:args.enrich])
+    return {
+        "concurrency": concurrency,
+        "batch": enrich_batch_size,
+        "wall": elapsed,
+        "rerank": rerank_time,
+        "calls": endpoint.requests,
+        "http": server.request_count - server_requests,
+        "tokens": server.prompt_tokens - server_tokens,
+        "cached": server.cached_tokens - server_cached,
+        "throttled": endpoint.limiter.throttled_seconds,
+        "unavailable": unavailable,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM scoring and enrichment against a fake server")
+    parser.add_argument("--candidates", type=int, default=40, help="Number of candidate papers to score")
+    parser.add_argument("--corpus", type=int, default=30, help="Number of library papers")
+    parser.add_argument("--enrich", type=int, default=20, help="Number of top papers to enrich")
+    parser.add_argument("--candidate-batch-size", type=int, default=8, help="Candidates per scoring call")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Max requests in flight")
+    parser.add_argument("--enrich-batch-size", type=int, nargs="+", default=[1, 5], help="Papers per extraction call")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake server latency per request (s)")
+    parser.add_argument("--rpm", type=int, default=60, help="Requests per window the fake server accepts (0: unlimited)")
+    parser.add_argument("--window", type=float, default=10, help="Length of the server's rate limit window (s)")
+    parser.add_argument("--client-rpm", type=int, default=600, help="Requests per minute the client is configured for")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of items dropped from JSON replies")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    rows = []
+    with FakeLLMServer(rpm=args.rpm, window=args.window, latency=args.latency,
+                       error_rate=args.error_rate, drop_rate=args.drop_rate) as server:
+        for concurrency, batch in itertools.product(args.concurrency, args.enrich_batch_size):
+            rows.append(run_once(server, args, concurrency, batch))
+            # 每组之间等待一个窗口，避免上一组的请求占用本组的限流额度
+            if args.rpm > 0:
+                time.sleep(args.window)
+
+    print(f"{'concurrency':>11} {'batch':>5} {'wall':>8} {'rerank':>8} {'calls':>6} {'http':>5} "
+          f"{'tokens':>8} {'cached':>8} {'throttled':>10} {'no tldr':>7}")
+    for r in rows:
+        print(f"{r['concurrency']:>11} {r['batch']:>5} {r['wall']:>7.1f}s {r['rerank']:>7.1f}s {r['calls']:>6} "
+              f"{r['http']:>5} {r['tokens']:>8} {r['cached']:>8} {r['throttled']:>9.1f}s {r['unavailable']:>7}")
+    print(f"server: {server.request_count} requests, {server.rate_limited_count} rate limited, "
+          f"{server.error_count} errors")
+
+
+if __name__ == "__main__":
+    main()
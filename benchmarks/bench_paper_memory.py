@@ -0,0 +1,92 @@
+"""
+论文对象内存基准测试：持有完整 arxiv.Result 的旧表示 vs 基于 __slots__ 的精简 ArxivPaper
+
+用伪arXiv服务器的Atom模板生成N篇合成论文，按真实流程用feedparser解析，
+分别统计两种表示常驻的内存、pickle大小以及JSON序列化往返耗时。
+
+用法:
+    python -m benchmarks.bench_paper_memory --papers 10000
+"""
+
+import argparse
+import gc
+import json
+import pickle
+import time
+import tracemalloc
+
+import arxiv
+import feedparser
+
+from benchmarks.fake_arxiv import render_feed
+from src.paper import ArxivPaper
+
+
+class LegacyPaper:
+    """旧版 ArxivPaper 的数据布局：包装整个 arxiv.Result 并动态添加属性"""
+
+    def __init__(self, paper: arxiv.Result, keyword: str = None):
+        self._paper = paper
+        self.score = None
+        self.search_keyword = keyword
+        self.llm_reason = None
+        self.key_authors = []
+        self.author_importance = 0.0
+
+
+def measure(build) -> tuple[int, list]:
+    """返回 build() 产物在垃圾回收后仍常驻的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark of paper representations")
+    parser.add_argument("--papers", type=int, default=10000, help="Number of synthetic papers")
+    args = parser.parse_args()
+
+    xml = render_feed("cat:cs.AI", 0, args.papers, args.papers)
+
+    def build_legacy():
+        feed = feedparser.parse(xml)
+        return [LegacyPaper(arxiv.Result._from_feed_entry(e)) for e in feed.entries]
+
+    def build_slim():
+        feed = feedparser.parse(xml)
+        return [ArxivPaper.from_result(arxiv.Result._from_feed_entry(e)) for e in feed.entries]
+
+    legacy_bytes, legacy = measure(build_legacy)
+    slim_bytes, slim = measure(build_slim)
+
+    for p in slim:
+        p.score = 7.5
+        p.tldr = "A one sentence summary."
+        p.affiliations = ["Example University"]
+
+    start = time.perf_counter()
+    dumped = [p.to_json() for p in slim]
+    restored = [ArxivPaper.from_json(s) for s in dumped]
+    json_time = time.perf_counter() - start
+    assert [p.to_dict() for p in restored] == [p.to_dict() for p in slim]
+
+    legacy_pickle = len(pickle.dumps(legacy))
+    slim_pickle = len(pickle.dumps(slim))
+    json_size = sum(len(s.encode()) for s in dumped)
+
+    print(f"papers:           {args.papers}")
+    print(f"legacy resident:  {legacy_bytes / 2**20:8.1f} MiB  ({legacy_bytes / args.papers:8.0f} B/paper)")
+    print(f"slim resident:    {slim_bytes / 2**20:8.1f} MiB  ({slim_bytes / args.papers:8.0f} B/paper)")
+    print(f"memory ratio:     {legacy_bytes / slim_bytes:8.1f}x")
+    print(f"legacy pickle:    {legacy_pickle / 2**20:8.1f} MiB")
+    print(f"slim pickle:      {slim_pickle / 2**20:8.1f} MiB")
+    print(f"slim json:        {json_size / 2**20:8.1f} MiB, round trip {json_time:.2f}s "
+          f"({json_time / args.papers * 1e6:.0f} us/paper)")
+
+
+if __name__ == "__main__":
+    main()
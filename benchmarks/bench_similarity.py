@@ -0,0 +1,64 @@
+"""
+相似度评分基准测试：完整相似度矩阵 vs 分块计算的加权相似度
+
+用随机的float32嵌入模拟候选论文和不同大小的论文库，对比原来的做法
+（构造 候选数 x 论文库大小 的余弦相似度矩阵再乘以时间衰减权重）与 decay_weighted_similarity
+的耗时和峰值内存（tracemalloc统计的numpy分配），并检查两者结果一致。
+
+用法:
+    python -m benchmarks.bench_similarity --candidates 1000 --corpus-sizes 1000 5000 20000 --dim 384
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.similarity import decay_weighted_similarity, normalize_rows
+
+
+def dense_scores(candidate_feature: np.ndarray, corpus_feature: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    sim = normalize_rows(candidate_feature) @ normalize_rows(corpus_feature).T
+    return (sim * weights).sum(axis=1)
+
+
+def measure(fn, *args) -> tuple[np.ndarray, float, float]:
+    """返回 (结果, 耗时秒数, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dense vs chunked decay-weighted similarity")
+    parser.add_argument("--candidates", type=int, default=1000, help="Number of candidate papers")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="Library sizes")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--memory-mb", type=float, default=16, help="Memory limit of the chunked kernel (MB)")
+    parser.add_argument("--skip-dense-above", type=int, default=50000, help="Skip the dense baseline for larger libraries")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    candidates = rng.standard_normal((args.candidates, args.dim), dtype=np.float32)
+    print(f"{'corpus':>8} {'dense':>9} {'dense MB':>9} {'chunked':>9} {'chunked MB':>11} {'max diff':>9}")
+    for size in args.corpus_sizes:
+        corpus = rng.standard_normal((size, args.dim), dtype=np.float32)
+        weights = 1 / (1 + np.log10(np.arange(size) + 1))
+        weights = weights / weights.sum()
+        chunked, chunked_time, chunked_mb = measure(decay_weighted_similarity, candidates, corpus, weights,
+                                                    args.memory_mb)
+        if size > args.skip_dense_above:
+            print(f"{size:>8} {'-':>9} {'-':>9} {chunked_time:>8.3f}s {chunked_mb:>11.1f} {'-':>9}")
+            continue
+        dense, dense_time, dense_mb = measure(dense_scores, candidates, corpus, weights)
+        diff = float(np.abs(dense - chunked).max())
+        print(f"{size:>8} {dense_time:>8.3f}s {dense_mb:>9.1f} {chunked_time:>8.3f}s {chunked_mb:>11.1f} {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+TeX清理基准测试：多遍 re.sub / DOTALL 正则 vs 单遍预编译扫描
+
+对 fixtures/tex 下按常见模板（IEEE、NeurIPS、ACM、REVTeX、LLNCS、Elsevier）编写的论文源码：
+1. 检查作者区域和 Introduction/Conclusion 的提取结果与旧实现一致
+2. 把正文重复多次得到不同规模的文档，比较完整清理流程（清理、去引用图表、找章节、找作者区域）的耗时
+3. 用不含机构关键词的自动生成表格构造退化输入，展示旧实现的二次方增长
+
+用法:
+    python -m benchmarks.bench_tex_cleaner --repeat 5
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+
+from src.tex_cleaner import SectionIndex, clean_tex, extract_author_region, strip_floats_and_cites
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "tex")
+
+
+def legacy_clean_tex(content: str) -> str:
+    content = re.sub(r'%.*\n', '\n', content)
+    content = re.sub(r'\\begin{comment}.*?\\end{comment}', '', content, flags=re.DOTALL)
+    content = re.sub(r'\\iffalse.*?\\fi', '', content, flags=re.DOTALL)
+    content = re.sub(r'\n+', '\n', content)
+    content = re.sub(r'\\\\', '', content)
+    content = re.sub(r'[ \t\r\f]{3,}', ' ', content)
+    return content
+
+
+def legacy_strip_floats_and_cites(content: str) -> str:
+    content = re.sub(r'~?\\cite.?\{.*?\}', '', content)
+    content = re.sub(r'\\begin\{figure\}.*?\\end\{figure\}', '', content, flags=re.DOTALL)
+    content = re.sub(r'\\begin\{table\}.*?\\end\{table\}', '', content, flags=re.DOTALL)
+    return content
+
+
+def legacy_section_text(content: str, title: str) -> str:
+    """旧实现会把结束标记本身也包含在结果里，这里去掉以便与章节索引比较"""
+    match = re.search(r'\\section\{' + title + r'\}.*?(\\section|\\end\{document\}|\\bibliography|\\appendix|$)',
+                      content, flags=re.DOTALL)
+    return content[match.start():match.start(1)] if match else ""
+
+
+LEGACY_REGIONS = [
+    r'\\author.*?\\maketitle',
+    r'\\begin{document}.*?\\begin{abstract}',
+    r'\\title.*?(?=\\section|\\begin{abstract})',
+    r'\\author.*?\\date',
+    r'\\title.*?\\author.*?(?=\\section|\\begin{abstract}|\\maketitle)',
+    r'\\author.*?(?=\\section)',
+    r'\\footnote.*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
+    r'\\footnotetext.*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
+    r'.*?(?:are with|is with|affiliated with).*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
+    r'(?:^|\\title).*?(?:university|institute|college|lab|department|shanghai|beijing|tsinghua|stanford|mit|google|microsoft|openai|deepmind).*?(?=\\section|\\begin{abstract})',
+    r'^.{0,3000}',
+    r'.*?@.*?\..*?(?=\\section|\\begin{abstract})',
+    r'.*?(?:university|institute|college|lab|department).*?(?=\\section|\\begin{abstract})',
+    r'.*?(?:footnote|thanks).*?(?:university|institute|college|department).*?(?=\\section|\\begin{abstract}|$)',
+]
+
+LEGACY_KEYWORDS = [
+    'university', 'institute', 'college', 'lab', 'department', 'school', 'center', 'centre',
+    'academy', '@', 'tech', 'polytechnic', 'are with', 'is with', 'affiliated with',
+    'research', 'laboratory', 'faculty', 'division', 'shanghai', 'beijing', 'china',
+    'tsinghua', 'stanford', 'mit', 'google', 'microsoft', 'openai', 'deepmind'
+]
+
+
+def legacy_extract_author_region(content: str) -> str:
+    for pattern in LEGACY_REGIONS:
+        match = re.search(pattern, content, flags=re.DOTALL | re.IGNORECASE)
+        if match:
+            region = match.group(0)
+            if any(keyword in region.lower() for keyword in LEGACY_KEYWORDS):
+                region = re.sub(r'\\(?:section|subsection|subsubsection)\{.*?\}', ' ', region)
+                region = re.sub(r'\\(?:cite|ref|label)\{.*?\}', ' ', region)
+                region = re.sub(r'\\(?:textbf|textit|emph)\{(.*?)\}', r'\1', region)
+                region = re.sub(r'\\[a-zA-Z]+\*?(\[.*?\])?\{([^{}]*)\}', r'\2', region)
+                region = re.sub(r'\{|\}', ' ', region)
+                region = re.sub(r'\\\\|\n+', ' ', region)
+                return re.sub(r'\s+', ' ', region).strip()
+    return ""
+
+
+def legacy_pipeline(raw: str):
+    content = legacy_clean_tex(raw)
+    stripped = legacy_strip_floats_and_cites(content)
+    return (legacy_section_text(stripped, "Introduction"), legacy_section_text(stripped, "Conclusion"),
+            legacy_extract_author_region(content))
+
+
+def pipeline(raw: str):
+    content = clean_tex(raw)
+    sections = SectionIndex(strip_floats_and_cites(content))
+    return (sections.text_of("Introduction"), sections.text_of("Conclusion"),
+            extract_author_region(content))
+
+
+def load_fixtures() -> dict[str, str]:
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.tex"))):
+        with open(path, encoding="utf-8") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def scale(raw: str, times: int) -> str:
+    """把 \\section{Introduction} 之后的每行正文重复多次，模拟章节结构不变的长论文"""
+    head, sep, body = raw.partition("\\section{Introduction}")
+    lines = []
+    for line in body.splitlines(keepends=True):
+        lines.append(line if line.startswith("\\") else line * times)
+    return head + sep + "".join(lines)
+
+
+def degenerate(size: int) -> str:
+    """自动生成的大表格：没有章节、作者标记和机构关键词"""
+    row = "0.125 & 0.250 & 0.375 & 0.500 \\\\\n"
+    return row * (size // len(row))
+
+
+def timed(func, *args, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy regex passes vs single-pass tex cleaner")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    clean_diffs = 0
+    for name, raw in fixtures.items():
+        content = clean_tex(raw)
+        assert extract_author_region(content) == legacy_extract_author_region(content), name
+        assert extract_author_region(content), name
+        assert pipeline(raw)[:2] == legacy_pipeline(raw)[:2], name
+        clean_diffs += content != legacy_clean_tex(raw)
+    print(f"fixtures:   {len(fixtures)} ok ({clean_diffs} differ only in cleaning, e.g. escaped \\% is kept)")
+
+    print(f"{'doc size':>10}  {'legacy':>9}  {'single':>9}  {'speedup':>7}")
+    for times in (1, 10, 100):
+        docs = [scale(raw, times) for raw in fixtures.values()]
+        size = sum(len(d) for d in docs) / len(docs)
+        legacy = sum(timed(legacy_pipeline, d, repeat=args.repeat) for d in docs)
+        single = sum(timed(pipeline, d, repeat=args.repeat) for d in docs)
+        print(f"{size / 1024:8.0f}KB  {legacy * 1e3:7.2f}ms  {single * 1e3:7.2f}ms  {legacy / single:6.1f}x")
+
+    print("degenerate input (no affiliation keywords), author region only:")
+    for size in (2_000, 4_000, 8_000):
+        doc = degenerate(size)
+        legacy = timed(legacy_extract_author_region, doc)
+        single = timed(extract_author_region, doc, repeat=args.repeat)
+        assert extract_author_region(doc) == legacy_extract_author_region(doc) == ""
+        print(f"{size / 1024:8.1f}KB  {legacy * 1e3:7.1f}ms  {single * 1e3:7.2f}ms  {legacy / single:6.0f}x")
+    # 旧实现在这个规模下需要数小时，只测新实现
+    doc = degenerate(1024 ** 2)
+    single = timed(extract_author_region, doc, repeat=args.repeat)
+    print(f"{len(doc) / 1024:8.0f}KB  {'-':>9}  {single * 1e3:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
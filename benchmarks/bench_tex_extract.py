@@ -0,0 +1,117 @@
+"""
+TeX源码提取基准测试：落盘后整包读取 vs 流式内存提取
+
+生成一个模拟的大型投稿源码包：主文件及其 \\input 引用的章节在前，
+随后是大量图片和一个未被引用的自动生成巨型tex。分别统计两种方式的耗时、
+峰值内存、读取的压缩字节数以及写入磁盘的字节数，并检查提取出的正文一致。
+
+用法:
+    python -m benchmarks.bench_tex_extract --figures 40 --figure-kb 1024
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import tarfile
+import time
+import tracemalloc
+from tempfile import TemporaryDirectory
+
+from loguru import logger
+
+from src.tex_source import _ChunkStream, clean_tex, extract_tex
+
+SECTIONS = ["intro", "method", "experiments", "conclusion"]
+
+
+def build_tarball(figures: int, figure_kb: int, generated_mb: int) -> bytes:
+    members = [
+        ("main.tex", "\\documentclass{article}\n\\begin{document}\n"
+                     + "".join(f"\\input{{sections/{s}}}\n" for s in SECTIONS)
+                     + "\\bibliography{refs}\n\\end{document}\n"),
+        ("main.bbl", "\\begin{thebibliography}{1}\\end{thebibliography}\n"),
+    ]
+    for s in SECTIONS:
+        body = f"\\section{{{s.title()}}}\n" + "Some text about the method. % a comment\n" * 200
+        members.append((f"sections/{s}.tex", body))
+    for i in range(figures):
+        members.append((f"figures/fig{i}.png", os.urandom(figure_kb * 1024)))
+    members.append(("appendix/generated_table.tex", "1 & 2 & 3 \\\\\n" * (generated_mb * 1024 ** 2 // 14)))
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=1) as tar:
+        for name, content in members:
+            data = content.encode() if isinstance(content, str) else content
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def legacy_extract(data: bytes) -> tuple[dict, int]:
+    """旧实现：把源码包写入临时目录，再读取所有tex成员，只展开主文件一层 \\input"""
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "source.tar.gz")
+        with open(path, "wb") as f:
+            for chunk in chunks(data):
+                f.write(chunk)
+        with tarfile.open(path) as tar:
+            tex_files = [f for f in tar.getnames() if f.endswith(".tex")]
+            main_tex = [f for f in tar.getnames() if f.endswith(".bbl")][0].replace(".bbl", "") + ".tex"
+            file_contents = {t: clean_tex(tar.extractfile(t).read().decode("utf-8", errors="ignore"))
+                             for t in tex_files}
+        main_source = file_contents[main_tex]
+        for f in re.findall(r"\\input\{(.+?)\}", main_source):
+            main_source = main_source.replace(f"\\input{{{f}}}", file_contents.get(f + ".tex", ""))
+        file_contents["all"] = main_source
+        return file_contents, len(data)
+
+
+def streaming_extract(data: bytes) -> tuple[dict, int]:
+    stream = _ChunkStream(chunks(data))
+    file_contents = extract_tex(io.BufferedReader(stream, buffer_size=64 * 1024), "bench")
+    return file_contents, stream.bytes_read
+
+
+def measure(extract, data: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    file_contents, compressed_read = extract(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return file_contents, compressed_read, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark on-disk vs streaming tex extraction")
+    parser.add_argument("--figures", type=int, default=40, help="Number of figure members after the tex files")
+    parser.add_argument("--figure-kb", type=int, default=1024, help="Size of each figure (KiB)")
+    parser.add_argument("--generated-mb", type=int, default=20, help="Size of the unreferenced generated tex (MiB)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    data = build_tarball(args.figures, args.figure_kb, args.generated_mb)
+    print(f"tarball:    {len(data) / 2**20:7.1f} MiB compressed")
+
+    legacy, legacy_read, legacy_time, legacy_peak = measure(legacy_extract, data)
+    stream, stream_read, stream_time, stream_peak = measure(streaming_extract, data)
+    assert legacy["all"] == stream["all"]
+
+    print(f"legacy:     {legacy_time:6.2f}s  peak {legacy_peak / 2**20:7.1f} MiB  "
+          f"read {legacy_read / 2**20:6.1f} MiB  written to disk {len(data) / 2**20:6.1f} MiB")
+    print(f"streaming:  {stream_time:6.2f}s  peak {stream_peak / 2**20:7.1f} MiB  "
+          f"read {stream_read / 2**20:6.1f} MiB  written to disk    0.0 MiB")
+
+
+if __name__ == "__main__":
+    main()
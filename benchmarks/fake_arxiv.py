@@ -0,0 +1,195 @@
+"""
+本地伪arXiv服务器 - 用于基准测试，不访问真实网络
+
+提供与 export.arxiv.org/api/query 兼容的Atom接口，支持按 start/max_results 分页，
+以及与 rss.arxiv.org/rss/<类别> 兼容的每日公告列表，
+并可配置每个请求的人为延迟，以模拟真实网络往返时间。
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+FEED_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title type="html">ArXiv Query: {query}</title>
+  <id>http://arxiv.org/api/fake</id>
+  <updated>{updated}</updated>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{page_size}</opensearch:itemsPerPage>
+"""
+
+ENTRY_TEMPLATE = """  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v{version}</id>
+    <updated>{published}</updated>
+    <published>{published}</published>
+    <title>{title}</title>
+    <summary>{summary}</summary>
+    <author><name>{author_a}</name></author>
+    <author><name>{author_b}</name></author>
+    <link href="http://arxiv.org/abs/{arxiv_id}v{version}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}v{version}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{category}" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="{category}" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+
+def fake_paper(query: str, index: int, now: datetime = None) -> dict:
+    """为某个查询生成第index篇确定性的伪论文元数据（按发布时间倒序）"""
+    now = now or datetime.now(timezone.utc)
+    # 忽略查询中的日期窗口，使同一查询在不同时间生成相同的论文
+    query = re.sub(r'^\((.*)\) AND submittedDate:\[.*\]$', r'\1', query)
+    base = int(hashlib.md5(query.encode()).hexdigest()[:6], 16) % 90000
+    published = now - timedelta(seconds=30 * index + 60)
+    return {
+        "arxiv_id": f"{now:%y%m}.{(base + index) % 100000:05d}",
+        "version": 1,
+        "published": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "title": f"Fake paper {index} for {query}",
+        "summary": f"We study {query}. " * 20,
+        "author_a": f"Alice Author{index}",
+        "author_b": f"Bob Writer{index % 7}",
+        "category": "cs.AI",
+    }
+
+
+def render_feed(query: str, start: int, page_size: int, total: int, now: datetime = None) -> str:
+    """渲染一页Atom结果"""
+    now = now or datetime.now(timezone.utc)
+    stop = min(start + page_size, total)
+    parts = [FEED_HEADER.format(query=escape(query), updated=now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                total=total, start=start, page_size=page_size)]
+    for i in range(start, stop):
+        paper = {k: escape(str(v)) for k, v in fake_paper(query, i, now).items()}
+        parts.append(ENTRY_TEMPLATE.format(**paper))
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+LISTING_HEADER = """<?xml version='1.0' encoding='UTF-8'?>
+<rss xmlns:arxiv="http://arxiv.org/schemas/atom" xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">
+  <channel>
+    <title>{category} updates on arXiv.org</title>
+    <link>http://rss.arxiv.org/rss/{category}</link>
+    <pubDate>{pub_date}</pubDate>
+"""
+
+LISTING_ITEM_TEMPLATE = """    <item>
+      <title>{title}</title>
+      <link>https://arxiv.org/abs/{arxiv_id}</link>
+      <description>arXiv:{arxiv_id}v{version} Announce Type: {announce_type} 
+Abstract: {summary}</description>
+      <guid isPermaLink="false">oai:arXiv.org:{arxiv_id}v{version}</guid>
+      <category>{category}</category>
+      <pubDate>{pub_date}</pubDate>
+      <arxiv:announce_type>{announce_type}</arxiv:announce_type>
+      <dc:creator>{author_a}, {author_b}</dc:creator>
+    </item>
+"""
+
+
+def render_listing(category: str, total: int, now: datetime = None) -> str:
+    """渲染某个类别的每日公告列表，其中约十分之一为版本更新(replace)"""
+    now = now or datetime.now(timezone.utc)
+    pub_date = now.strftime("%a, %d %b %Y %H:%M:%S +0000")
+    parts = [LISTING_HEADER.format(category=category, pub_date=pub_date)]
+    for i in range(total):
+        paper = {k: escape(str(v)) for k, v in fake_paper(f"cat:{category}", i, now).items()}
+        paper["category"] = category
+        paper["announce_type"] = "replace" if i % 10 == 9 else "new"
+        parts.append(LISTING_ITEM_TEMPLATE.format(pub_date=pub_date, **paper))
+    parts.append("  </channel>\n</rss>\n")
+    return "".join(parts)
+
+
+class FakeArxivServer:
+    """在后台线程中运行的伪arXiv服务器
+
+    Args:
+        latency: 每个请求的人为延迟（秒）
+        results_per_query: 每个查询（以及每个类别公告列表）的结果总数
+
+    fixtures/rss/<类别>.xml 存在时，公告列表直接返回该固定文件。
+    """
+
+    def __init__(self, latency: float = 0.2, results_per_query: int = 40):
+        self.latency = latency
+        self.results_per_query = results_per_query
+        self.request_count = 0
+        self.now = datetime.now(timezone.utc)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def query_url_format(self) -> str:
+        """可直接赋值给 arxiv.Client.query_url_format 的地址模板"""
+        return self.base_url + "/api/query?{}"
+
+    @property
+    def listing_url_format(self) -> str:
+        """可直接赋值给 src.arxiv_client.LISTING_URL_FORMAT 的地址模板"""
+        return self.base_url + "/rss/{}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                time.sleep(server.latency)
+                url = urlsplit(self.path)
+                if url.path == "/api/query":
+                    params = parse_qs(url.query)
+                    query = params.get("search_query", [""])[0]
+                    start = int(params.get("start", ["0"])[0])
+                    page_size = int(params.get("max_results", ["100"])[0])
+                    body = render_feed(query, start, page_size, server.results_per_query, server.now)
+                    content_type = "application/atom+xml; charset=utf-8"
+                elif url.path.startswith("/rss/"):
+                    category = url.path[len("/rss/"):]
+                    fixture = os.path.join(FIXTURES_DIR, "rss", f"{category}.xml")
+                    if os.path.exists(fixture):
+                        with open(fixture, encoding="utf-8") as f:
+                            body = f.read()
+                    else:
+                        body = render_listing(category, server.results_per_query, server.now)
+                    content_type = "application/rss+xml; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,262 @@
+"""
+本地伪LLM服务器 - 与 OpenAI chat completions 接口兼容，用于测试重试、限流和吞吐，不消耗真实API额度
+
+- 按滑动窗口（默认一分钟）统计请求数，超过 rpm 时返回429，并带上 Retry-After 和
+  x-ratelimit-* 头（与OpenAI相同的格式）。缩短窗口可以在几秒内复现限流。
+- 可配置每个请求的延迟、按比例随机返回的错误（默认500，也可以是401、400或额度用尽的429等不应重试的错误），
+  以及回复中随机缺失的条目。
+- 模拟服务端的前缀缓存：与之前请求相同的prompt前缀（按512字符对齐，至少4096字符）
+  计入 usage.prompt_tokens_details.cached_tokens。
+- 回复内容按请求类型生成确定性的JSON：论文评分请求返回 {"scores": [...]}，
+  批量提取请求返回每篇论文的TLDR和机构列表，单篇提取请求返回一个对象。
+
+用法:
+    python -m benchmarks.fake_llm --rpm 10 --window 5 --requests 40 --concurrency 8
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import re
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+
+# 前缀缓存的粒度和最短长度（字符数，约为OpenAI的128和1024个token）
+PREFIX_BLOCK_CHARS = 512
+PREFIX_MIN_CHARS = 4096
+
+
+def _last_id_array(text: str) -> list[dict]:
+    """找出文本中最后一个元素都是带 id 的对象的JSON数组"""
+    decoder = json.JSONDecoder()
+    found = []
+    for match in re.finditer(r"\[", text):
+        try:
+            value, _ = decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        if value and isinstance(value, list) and all(isinstance(v, dict) and "id" in v for v in value):
+            found = value
+    return found
+
+
+def _stable_score(title: str) -> float:
+    return int(hashlib.md5(title.encode()).hexdigest()[:4], 16) % 91 / 10 + 1
+
+
+def _extraction_result(title: str, paper_id: int = None) -> dict:
+    result = {"tldr": f"This paper proposes {title[:60]}.", "affiliations": ["Stanford University", "Google DeepMind"]}
+    return result if paper_id is None else {"id": paper_id, **result}
+
+
+class FakeLLMServer:
+    """在后台线程中运行的伪 chat completions 服务器
+
+    Args:
+        rpm: 每个窗口允许的请求数，超出时返回429；小于等于0表示不限制
+        window: 限流窗口的长度（秒）
+        latency: 每个成功请求的人为延迟（秒）
+        send_retry_after: 429响应是否带 Retry-After 头
+        error_rate: 放行的请求中返回错误的比例
+        error_status: 这些错误的HTTP状态码
+        error_code: 这些错误的 error.code，如 "insufficient_quota"
+        drop_rate: JSON数组回复中每个条目被随机丢掉的比例，用于触发调用方的修复逻辑
+        seed: 错误和丢条目的随机种子
+    """
+
+    def __init__(self, rpm: int = 60, latency: float = 0.0, send_retry_after: bool = True, window: float = 60,
+                 error_rate: float = 0.0, drop_rate: float = 0.0, seed: int = 0, error_status: int = 500,
+                 error_code: str = None):
+        self.rpm = rpm
+        self.window = window
+        self.latency = latency
+        self.send_retry_after = send_retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_code = error_code
+        self.drop_rate = drop_rate
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.error_count = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        # 每个请求的 (到达时间 time.monotonic(), 状态码)
+        self.responses = []
+        self._prefixes = set()
+        self._random = random.Random(seed)
+        self._window = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """可直接作为 OPENAI_API_BASE 使用的地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _admit(self) -> tuple[bool, float, int]:
+        """返回 (是否放行, 距窗口内最早请求过期的秒数, 剩余额度)"""
+        now = time.monotonic()
+        with self._lock:
+            self.request_count += 1
+            while self._window and now - self._window[0] >= self.window:
+                self._window.popleft()
+            if self.rpm > 0 and len(self._window) >= self.rpm:
+                self.rate_limited_count += 1
+                return False, self.window - (now - self._window[0]), 0
+            self._window.append(now)
+            reset = self.window - (now - self._window[0])
+            return True, reset, max(0, self.rpm - len(self._window))
+
+    def _cached_chars(self, prompt: str) -> int:
+        """返回命中前缀缓存的字符数，并记录本次prompt的所有前缀"""
+        ends = range(PREFIX_BLOCK_CHARS, len(prompt) + 1, PREFIX_BLOCK_CHARS)
+        digests = [hashlib.sha1(prompt[:end].encode()).digest() for end in ends]
+        with self._lock:
+            hits = [end for end, digest in zip(ends, digests) if digest in self._prefixes]
+            self._prefixes.update(digests)
+        cached = max(hits, default=0)
+        return cached if cached >= PREFIX_MIN_CHARS else 0
+
+    def _keep(self) -> bool:
+        with self._lock:
+            return self._random.random() >= self.drop_rate
+
+    def _fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def reply(self, request: dict) -> str:
+        """成功请求的回复内容：按prompt中最后一个带id的JSON数组（评分时为候选论文，批量提取时为论文片段）生成"""
+        prompt = "\n".join(m.get("content") or "" for m in request.get("messages", []))
+        items = _last_id_array(prompt)
+        if "打分" in prompt and items:
+            scores = [{"id": item["id"], "score": _stable_score(item.get("title", "")), "reason": "与研究兴趣相关"}
+                      for item in items if self._keep()]
+            return "```json\n" + json.dumps({"scores": scores}, ensure_ascii=False, indent=2) + "\n```"
+        if "affiliations" in prompt and items:
+            results = [_extraction_result(item.get("title", ""), item["id"]) for item in items if self._keep()]
+            return json.dumps(results, ensure_ascii=False)
+        if "affiliations" in prompt:
+            title = re.search(r"Title: (.*)", prompt)
+            return json.dumps(_extraction_result(title.group(1) if title else ""), ensure_ascii=False)
+        return "ok"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, payload: dict, headers: dict):
+                with server._lock:
+                    server.responses.append((self.arrived, status))
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.arrived = time.monotonic()
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                admitted, reset, remaining = server._admit()
+                # 不限流时不发送额度相关的头
+                headers = {
+                    "x-ratelimit-limit-requests": str(server.rpm),
+                    "x-ratelimit-remaining-requests": str(remaining),
+                    "x-ratelimit-reset-requests": f"{reset:.3f}s",
+                } if server.rpm > 0 else {}
+                if not admitted:
+                    if server.send_retry_after:
+                        headers["Retry-After"] = f"{reset:.3f}"
+                    self._send_json(429, {"error": {"message": "Rate limit reached for requests", "type": "requests",
+                                                    "code": "rate_limit_exceeded"}}, headers)
+                    return
+                time.sleep(server.latency)
+                if server._fail():
+                    with server._lock:
+                        server.error_count += 1
+                    self._send_json(server.error_status, {"error": {"message": "Injected error", "type": "server_error",
+                                                                    "code": server.error_code}}, headers)
+                    return
+                content = server.reply(request)
+                prompt = "".join(f"<{m.get('role')}>{m.get('content') or ''}" for m in request.get("messages", []))
+                prompt_tokens = len(prompt) // 4
+                cached_tokens = server._cached_chars(prompt) // 4
+                with server._lock:
+                    server.prompt_tokens += prompt_tokens
+                    server.cached_tokens += cached_tokens
+                completion_tokens = len(content) // 4
+                self._send_json(200, {
+                    "id": f"chatcmpl-fake{server.request_count}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens,
+                              "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+                }, headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    """对伪服务器发送一批请求，客户端配置的RPM高于服务器限额，观察429驱动的退避和RPM调整"""
+    from src.llm import LLM
+
+    parser = argparse.ArgumentParser(description="Drive the LLM client against a rate-limited fake server")
+    parser.add_argument("--rpm", type=int, default=10, help="Requests per window the fake server accepts")
+    parser.add_argument("--window", type=float, default=5, help="Length of the server's rate limit window (seconds)")
+    parser.add_argument("--client-rpm", type=int, default=600, help="Requests per minute the client is configured for")
+    parser.add_argument("--requests", type=int, default=40, help="Number of requests to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--no-retry-after", action="store_true", help="Do not send Retry-After on 429 responses")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    with FakeLLMServer(rpm=args.rpm, window=args.window, send_retry_after=not args.no_retry_after) as server:
+        llm = LLM(api_key="fake", base_url=server.base_url, model="fake", config={
+            "max_requests_per_minute": args.client_rpm, "max_concurrent_requests": args.concurrency,
+            "api_retry_attempts": 10, "api_retry_delay": 0.5,
+        })
+        start = time.perf_counter()
+        results = llm.generate_batch([[{"role": "user", "content": f"request {i}"}] for i in range(args.requests)])
+        elapsed = time.perf_counter() - start
+    failed = sum(isinstance(r, Exception) for r in results)
+    print(f"wall time:        {elapsed:7.1f}s")
+    print(f"succeeded:        {len(results) - failed}/{len(results)}")
+    print(f"server requests:  {server.request_count} ({server.rate_limited_count} rate limited)")
+    print(f"effective rpm:    {llm.aclient.endpoints[0].limiter.effective_rpm:.1f}")
+    print(f"client:           {llm.stats()}")
+
+
+if __name__ == "__main__":
+    main()
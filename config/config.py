@@ -37,6 +37,21 @@ def create_argument_parser():
     add_argument('--max_paper_num', type=int, help='Maximum number of papers to recommend', default=100)
     add_argument('--arxiv_query', type=str, help='Arxiv search query by category')
     add_argument('--arxiv_query_keyword', type=str, help='Arxiv search query by keyword', default=None)
+    add_argument('--arxiv_backend', type=str, help='Source of category papers: "search" (arxiv search API) or "rss" (daily announcement listing)', default='search')
+    add_argument('--arxiv_fetch_workers', type=int, help='Number of arxiv queries running concurrently', default=4)
+    add_argument('--arxiv_date_window', type=bool, help='Restrict arxiv queries to the recent submittedDate window on the server side', default=True)
+    add_argument('--arxiv_request_interval', type=float, help='Minimum seconds between two requests to the same arxiv host', default=3.0)
+    add_argument('--paper_store', type=str, help='Path of the local SQLite paper store. Leave empty to disable', default=None)
+    add_argument('--source_cache_dir', type=str, help='Directory caching arxiv source tarballs and parsed tex. Leave empty to disable', default=None)
+    add_argument('--enrich_workers', type=int, help='Number of threads filling in TLDR, affiliations and code links before rendering', default=8)
+    add_argument('--enrich_batch_size', type=int, help='Papers whose TLDR and affiliations are extracted in one LLM call, 1 means one call per paper', default=5)
+    add_argument('--enrich_batch_token_budget', type=int, help='Token budget (prompt plus expected response) of one batched extraction call', default=6000)
+    add_argument('--enrich_service_limits', type=str, help='Per-service concurrency limits, e.g. "arxiv=2,semantic_scholar=1,paperswithcode=4"', default=None)
+    add_argument('--source_cache_max_mb', type=float, help='Size limit (MB) of the source cache, least recently used entries are evicted first', default=2048)
+    add_argument('--embedding_cache_dir', type=str, help='Directory caching embeddings of the Zotero abstracts by item key, version and model. Leave empty to disable', default=None)
+    add_argument('--llm_cache_dir', type=str, help='Directory caching LLM responses by model, temperature and prompt. Leave empty to disable', default=None)
+    add_argument('--llm_cache_max_mb', type=float, help='Size limit (MB) of the LLM response cache, least recently used entries are evicted first', default=256)
+    add_argument('--llm_cache_ttl_hours', type=float, help='Hours after which a cached LLM response expires, 0 means never', default=72)
     add_argument('--smtp_server', type=str, help='SMTP server')
     add_argument('--smtp_port', type=int, help='SMTP port')
     add_argument('--sender', type=str, help='Sender email address')
@@ -47,7 +62,12 @@ def create_argument_parser():
     add_argument('--openai_api_key', type=str, help='OpenAI API key', default=None)
     add_argument('--openai_api_base', type=str, help='OpenAI API base URL', default='https://api.openai.com/v1')
     add_argument('--model_name', type=str, help='LLM Model Name', default='gpt-4o')
+    add_argument('--llm_endpoints', type=str, help='JSON list of LLM endpoints, each with base_url, api_key or api_key_env, model and optional rate limits. Replaces openai_api_key/openai_api_base/model_name', default=None)
+    add_argument('--llm_local_fallback', type=bool, help='Use the local LLM as the last resort when all API endpoints fail', default=False)
     add_argument('--language', type=str, help='Language of TLDR', default='English')
+    add_argument('--cassette', type=str, help='Directory of the HTTP record/replay cassette. Leave empty to use the network directly', default=None)
+    add_argument('--cassette_mode', type=str, help='"record" to save all HTTP responses to the cassette, "replay" to serve them offline', default='replay')
+    add_argument('--cassette_latency', type=float, help='Injected latency (seconds) per replayed HTTP response', default=0.0)
     parser.add_argument('--debug', action='store_true', help='Debug mode')
     
     return parser
@@ -74,6 +94,16 @@ def load_config_from_yaml(config_file="config/private_config.yaml", public_confi
         raise FileNotFoundError(f"找不到配置文件 {config_file} 或 {public_config_file}")
 
 
+def abstract_max_tokens(llm_config: dict) -> int:
+    """ABSTRACT_MAX_TOKENS；只配置了旧的 ABSTRACT_MAX_LENGTH（字符数）时按约3个字符一个token换算"""
+    if 'ABSTRACT_MAX_TOKENS' in llm_config or 'ABSTRACT_MAX_LENGTH' not in llm_config:
+        return llm_config.get('ABSTRACT_MAX_TOKENS', 150)
+    max_tokens = max(1, int(llm_config['ABSTRACT_MAX_LENGTH']) // 3)
+    logger.warning(f"ABSTRACT_MAX_LENGTH 已废弃，请改用 ABSTRACT_MAX_TOKENS（按token数截断）；"
+                   f"本次按 {llm_config['ABSTRACT_MAX_LENGTH']} 个字符换算为 {max_tokens} 个token")
+    return max_tokens
+
+
 def merge_configs(args):
     """合并各种配置源的参数"""
     # 读取YAML配置
@@ -101,22 +131,36 @@ def merge_configs(args):
         'candidate_batch_size': llm_config.get('CANDIDATE_BATCH_SIZE', 8),
         'keyword_bonus': llm_config.get('KEYWORD_BONUS', 2.0),
         'default_score': llm_config.get('DEFAULT_SCORE', 5.0),
+        'score_repair_rounds': llm_config.get('SCORE_REPAIR_ROUNDS', 2),
         
         # 文本处理参数
-        'abstract_max_length': llm_config.get('ABSTRACT_MAX_LENGTH', 500),
+        'abstract_max_tokens': abstract_max_tokens(llm_config),
+        'corpus_max_tokens': llm_config.get('CORPUS_MAX_TOKENS', 3000),
         'score_filter_threshold': llm_config.get('SCORE_FILTER_THRESHOLD', 5.0),
         'max_score_limit': llm_config.get('MAX_SCORE_LIMIT', 10.0),
         'score_scale_factor': llm_config.get('SCORE_SCALE_FACTOR', 10.0),
         
         # API调用和限流参数
         'max_requests_per_minute': llm_config.get('MAX_REQUESTS_PER_MINUTE', 9),
+        'max_tokens_per_minute': llm_config.get('MAX_TOKENS_PER_MINUTE', 0),
+        'max_concurrent_requests': llm_config.get('MAX_CONCURRENT_REQUESTS', 4),
+        'expected_completion_tokens': llm_config.get('EXPECTED_COMPLETION_TOKENS', 512),
         'api_retry_attempts': llm_config.get('API_RETRY_ATTEMPTS', 3),
         'api_retry_delay': llm_config.get('API_RETRY_DELAY', 3.0),
-        'rate_limit_buffer': llm_config.get('RATE_LIMIT_BUFFER', 1.0),  # 额外等待时间
+        'api_max_retry_delay': llm_config.get('API_MAX_RETRY_DELAY', 60.0),
+        'adaptive_rate_limit': llm_config.get('ADAPTIVE_RATE_LIMIT', True),
         
         # 传统推荐相关参数
         'embedding_model': llm_config.get('EMBEDDING_MODEL', 'avsolatorio/GIST-small-Embedding-v0'),
-        'use_time_decay': llm_config.get('USE_TIME_DECAY', True)
+        'embedding_backend': llm_config.get('EMBEDDING_BACKEND', 'torch'),
+        'onnx_model_path': llm_config.get('ONNX_MODEL_PATH', ''),
+        'onnx_model_file': llm_config.get('ONNX_MODEL_FILE', 'onnx/model.onnx'),
+        'use_time_decay': llm_config.get('USE_TIME_DECAY', True),
+        'similarity_memory_mb': llm_config.get('SIMILARITY_MEMORY_MB', 256),
+        'neighbor_top_k': llm_config.get('NEIGHBOR_TOP_K', 0),
+        'neighbor_probes': llm_config.get('NEIGHBOR_PROBES', 8),
+        'prefilter_top_k': llm_config.get('PREFILTER_TOP_K', 0),
+        'prefilter_margin': llm_config.get('PREFILTER_MARGIN', 0.3),
     }
     
     logger.info(f"读取LLM推荐配置: {llm_recommender_config}")
@@ -127,5 +171,5 @@ def merge_configs(args):
 def validate_config(args):
     """验证配置的完整性"""
     assert (
-        not args.use_llm_api or args.openai_api_key is not None
-    ), "If use_llm_api is True, openai_api_key must be provided" 
\ No newline at end of file
+        not args.use_llm_api or args.openai_api_key is not None or args.llm_endpoints
+    ), "If use_llm_api is True, openai_api_key or llm_endpoints must be provided" 
\ No newline at end of file
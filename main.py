@@ -2,30 +2,38 @@ import os
 import sys
 from dotenv import load_dotenv
 import urllib.request
+from datetime import datetime, timezone
 
 load_dotenv(override=True)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 from loguru import logger
 from utils.zotero_utils import get_zotero_corpus, filter_corpus
-from src.llm import set_global_llm
+from src.llm import set_global_llm, get_llm, parse_llm_endpoints
 from src.recommender import rerank_paper
 from utils.construct_email import render_email, send_email
 
 # 导入重构后的模块
 from config.config import create_argument_parser, merge_configs, validate_config
-from src.arxiv_client import (
-    get_arxiv_paper_by_category, 
-    get_arxiv_papers_by_keywords, 
-    deduplicate_and_sort_papers
-)
+from src.arxiv_client import fetch_arxiv_papers
+from src.paper_store import PaperStore
+from src.cassette import use_cassette
+from src.source_cache import set_global_source_cache, get_source_cache
+from src.llm_cache import set_global_llm_cache, get_llm_cache
+from src.embedding_cache import set_global_embedding_cache, get_embedding_cache
 from src.paper_processor import limit_papers_by_type, print_paper_statistics
+from src.enrichment import enrich_papers
+from src.service_limits import parse_service_limits, set_service_limits
 
 # 设置全局User-Agent，模拟浏览器访问，防止被arXiv屏蔽
 opener = urllib.request.build_opener()
 opener.addheaders = [('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36')]
 urllib.request.install_opener(opener)
 
+# HTTP录像目录中保存的录制前论文库快照
+PAPER_STORE_SNAPSHOT = 'paper_store.db'
+
+
 def setup_logging(debug: bool):
     """设置日志配置"""
     if debug:
@@ -53,20 +61,43 @@ def get_zotero_papers(args):
     return corpus
 
 
-def get_arxiv_papers(args):
-    """获取arxiv论文"""
+def open_paper_store(args):
+    """打开本地论文库，未配置或Debug模式下不使用
+
+    使用HTTP录像时，录制前把论文库复制到录像目录；回放时在内存中打开这份快照，
+    每次回放都从录制时的状态（已发送论文、运行水位）开始，也不会写入真实的论文库。
+    """
+    if not args.paper_store or args.debug:
+        return None
+    if args.cassette and args.cassette_mode == 'replay':
+        return PaperStore.from_snapshot(os.path.join(args.cassette, PAPER_STORE_SNAPSHOT))
+    store = PaperStore(args.paper_store)
+    if args.cassette:
+        store.backup(os.path.join(args.cassette, PAPER_STORE_SNAPSHOT))
+    return store
+
+
+def get_arxiv_papers(args, store=None):
+    """获取arxiv论文，有论文库时只保留尚未发送过的论文"""
     logger.info("Retrieving Arxiv papers...")
-    papers = get_arxiv_paper_by_category(args.arxiv_query, args.debug)
-    logger.info(f"Retrieved {len(papers)} papers from category search.")
-    
-    # 添加关键词搜索的论文
-    keyword_papers = get_arxiv_papers_by_keywords(args.arxiv_query_keyword, args.debug)
-    papers.extend(keyword_papers)
-    
-    # 去重并排序
-    papers = deduplicate_and_sort_papers(papers)
+    days = store.fetch_window_days() if store else 2
+    # 类别查询和关键词查询并发执行，结果已去重并排序
+    papers = fetch_arxiv_papers(
+        args.arxiv_query,
+        args.arxiv_query_keyword,
+        args.debug,
+        max_workers=args.arxiv_fetch_workers,
+        min_request_interval=args.arxiv_request_interval,
+        date_window=args.arxiv_date_window,
+        days=days,
+        backend=args.arxiv_backend
+    )
     logger.info(f"Total papers retrieved: {len(papers)}")
     
+    if store:
+        papers = store.filter_unsent(papers)
+        store.restore(papers)
+    
     return papers
 
 
@@ -79,7 +110,9 @@ def setup_llm(args, llm_recommender_config):
             base_url=args.openai_api_base, 
             model=args.model_name, 
             lang=args.language,
-            config=llm_recommender_config
+            config=llm_recommender_config,
+            endpoints=parse_llm_endpoints(args.llm_endpoints),
+            local_fallback=args.llm_local_fallback
         )
     else:
         logger.info("Using Local LLM as global LLM.")
@@ -108,35 +141,83 @@ def process_papers(papers, corpus, args, llm_recommender_config):
     return papers
 
 
-def main():
-    """主函数"""
-    # 解析配置
-    parser = create_argument_parser()
-    args = parser.parse_args()
-    args, llm_recommender_config = merge_configs(args)
-    validate_config(args)
-    
-    # 设置日志
-    setup_logging(args.debug)
+def deliver_email(args, html: str):
+    """发送邮件；回放HTTP录像时只把邮件写入录像目录，便于离线回归对比"""
+    if args.cassette:
+        name = 'email.html' if args.cassette_mode == 'record' else 'email.replay.html'
+        with open(os.path.join(args.cassette, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+        if args.cassette_mode == 'replay':
+            logger.info(f"回放模式，邮件已写入 {os.path.join(args.cassette, name)}，不实际发送")
+            return False
+    logger.info("Sending email...")
+    send_email(args.sender, args.receiver, args.sender_password, args.smtp_server, args.smtp_port, html)
+    return True
+
+
+def run(args, llm_recommender_config):
+    """执行一次完整的获取、推荐和发送流程"""
+    run_started = datetime.now(timezone.utc)
+    store = open_paper_store(args)
+    set_global_source_cache(args.source_cache_dir, args.source_cache_max_mb)
+    set_global_llm_cache(args.llm_cache_dir, args.llm_cache_max_mb, args.llm_cache_ttl_hours)
+    set_global_embedding_cache(args.embedding_cache_dir)
     
     # 获取Zotero论文库
     corpus = get_zotero_papers(args)
     
     # 获取arxiv论文
-    papers = get_arxiv_papers(args)
+    candidates = get_arxiv_papers(args, store)
     
     # 设置LLM
     setup_llm(args, llm_recommender_config)
     
     # 处理论文
-    papers = process_papers(papers, corpus, args, llm_recommender_config)
+    papers = process_papers(candidates, corpus, args, llm_recommender_config)
+    
+    # 并发补全TLDR、机构信息和代码链接，渲染时不再访问网络
+    set_service_limits(parse_service_limits(args.enrich_service_limits))
+    enrich_papers(papers, max_workers=args.enrich_workers, batch_size=args.enrich_batch_size,
+                  batch_token_budget=args.enrich_batch_token_budget)
     
     # 生成和发送邮件
     html = render_email(papers)
-    logger.info("Sending email...")
-    send_email(args.sender, args.receiver, args.sender_password, args.smtp_server, args.smtp_port, html)
+    source_cache = get_source_cache()
+    if source_cache:
+        logger.info(f"源码缓存统计: 命中 {source_cache.hits}, 未命中 {source_cache.misses}")
+    logger.info(f"LLM调用统计: {get_llm().stats()}")
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        logger.info(f"LLM缓存统计: 命中 {llm_cache.hits}, 未命中 {llm_cache.misses}")
+    embedding_cache = get_embedding_cache()
+    if embedding_cache:
+        logger.info(f"嵌入缓存统计: 命中 {embedding_cache.hits}, 未命中 {embedding_cache.misses}, 移除 {embedding_cache.evicted}")
+    if store:
+        # 保存所有候选论文的评分以及补全阶段生成的TLDR/机构信息，邮件发送失败后重跑也可复用
+        store.save(candidates)
+    if not deliver_email(args, html):
+        return
+    if store:
+        store.mark_sent(papers)
+        store.set_watermark(run_started)
     logger.success("Email sent successfully! If you don't receive the email, please check the configuration and the junk box.")
 
 
+def main():
+    """主函数"""
+    # 解析配置
+    parser = create_argument_parser()
+    args = parser.parse_args()
+    args, llm_recommender_config = merge_configs(args)
+    validate_config(args)
+    
+    # 设置日志
+    setup_logging(args.debug)
+    
+    # 指定HTTP录像时，所有外部HTTP请求都会被录制或回放
+    with use_cassette(args.cassette, args.cassette_mode, args.cassette_latency):
+        run(args, llm_recommender_config)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import numpy as np
+from loguru import logger
+from src.similarity import normalize_rows
+
+# 每块参与k-means分配的向量数，限制 块大小 x 簇数 的相似度矩阵的内存
+ASSIGN_CHUNK_ROWS = 4096
+# 训练k-means时每个簇平均使用的样本数
+TRAIN_SAMPLES_PER_LIST = 64
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        assignments[start:start + ASSIGN_CHUNK_ROWS] = np.argmax(
+            vectors[start:start + ASSIGN_CHUNK_ROWS] @ centroids.T, axis=1)
+    return assignments
+
+
+def _cluster_sums(vectors: np.ndarray, assignments: np.ndarray, n_lists: int) -> np.ndarray:
+    """各簇向量之和，按块用one-hot矩阵乘法计算（比 np.add.at 快得多）"""
+    sums = np.zeros((n_lists, vectors.shape[1]), dtype=np.float32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        block = assignments[start:start + ASSIGN_CHUNK_ROWS]
+        onehot = np.zeros((len(block), n_lists), dtype=np.float32)
+        onehot[np.arange(len(block)), block] = 1
+        sums += onehot.T @ vectors[start:start + ASSIGN_CHUNK_ROWS]
+    return sums
+
+
+class IVFIndex:
+    """倒排文件（IVF）近似最近邻索引，纯NumPy实现，不依赖网络或其他库
+
+    向量归一化后按余弦相似度检索。训练时用球面k-means把向量分到约 sqrt(N) 个簇，
+    查询时只与最近的 n_probe 个簇中的向量比较，每次查询的计算量约为 (簇数 + n_probe x 平均簇大小) x 维度，
+    随库大小亚线性增长。向量按簇连续存放，每个簇的比较是一次矩阵向量乘法。
+
+    update 时新的key直接分到最近的簇、消失的key被移除，不重新训练；库大小达到训练时的 RETRAIN_GROWTH 倍后重新训练。
+    """
+
+    RETRAIN_GROWTH = 2.0
+
+    def __init__(self, centroids: np.ndarray, keys: list[str], assignments: np.ndarray,
+                 vectors: np.ndarray, trained_size: int):
+        self.centroids = centroids
+        self.keys = list(keys)
+        self.assignments = assignments
+        self.trained_size = trained_size
+        # 按簇排序后连续存放：簇 c 的向量为 _vectors[_offsets[c]:_offsets[c + 1]]，对应原始行号 _rows[...]
+        self._rows = np.argsort(assignments, kind="stable")
+        self._vectors = vectors[self._rows]
+        self._offsets = np.searchsorted(assignments[self._rows], np.arange(len(centroids) + 1))
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, keys: list[str], vectors: np.ndarray, n_lists: int = None,
+              iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        vectors = normalize_rows(vectors)
+        n = len(vectors)
+        if n == 0:
+            raise ValueError("Cannot train an IVF index on an empty set of vectors")
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        # k-means只在随机抽取的样本上迭代，最后再把全部向量分到最近的簇
+        sample = vectors[rng.choice(n, min(n, n_lists * TRAIN_SAMPLES_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = _nearest_centroids(sample, centroids)
+            sums = _cluster_sums(sample, assignments, n_lists)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # 空簇重新取一个随机向量作为中心
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        assignments = _nearest_centroids(vectors, centroids)
+        logger.debug(f"IVF索引训练完成: {n} 个向量, {n_lists} 个簇")
+        return cls(centroids, keys, assignments, vectors, n)
+
+    @classmethod
+    def from_assignments(cls, centroids: np.ndarray, trained_size: int, known: dict[str, int],
+                         keys: list[str], vectors: np.ndarray) -> "IVFIndex":
+        """沿用已有的簇中心和分配结果（known: {key: 簇号}）建立索引，只为新增的key计算所属的簇；
+        库大小相比训练时增长过多或向量维度变化时重新训练"""
+        if len(keys) >= trained_size * cls.RETRAIN_GROWTH or vectors.shape[1] != centroids.shape[1]:
+            return cls.train(keys, vectors)
+        vectors = normalize_rows(vectors)
+        assignments = np.array([known.get(key, -1) for key in keys], dtype=np.int32)
+        new = np.flatnonzero(assignments < 0)
+        if len(new):
+            assignments[new] = _nearest_centroids(vectors[new], centroids)
+        logger.debug(f"IVF索引更新: 新增 {len(new)} 个向量, 移除 {len(known.keys() - set(keys))} 个")
+        return cls(centroids, keys, assignments, vectors, trained_size)
+
+    def update(self, keys: list[str], vectors: np.ndarray) -> "IVFIndex":
+        """返回与 keys/vectors（当前论文库，按相同顺序）一致的索引"""
+        return self.from_assignments(self.centroids, self.trained_size, dict(zip(self.keys, self.assignments)),
+                                     keys, vectors)
+
+    def search(self, queries: np.ndarray, k: int, n_probe: int = 8) -> tuple[np.ndarray, np.ndarray]:
+        """返回每个查询最相似的 k 个向量的 (行号, 余弦相似度)，按相似度从高到低排列
+
+        候选不足 k 个时用行号 -1、相似度 -inf 补齐。
+        """
+        queries = normalize_rows(queries)
+        n_probe = min(n_probe, self.n_lists)
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            slices = [slice(self._offsets[c], self._offsets[c + 1]) for c in probes[i]]
+            members = np.concatenate([self._rows[s] for s in slices])
+            scores = np.concatenate([self._vectors[s] @ query for s in slices])
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            top = top[np.argsort(-scores[top])]
+            rows[i, :len(top)] = members[top]
+            sims[i, :len(top)] = scores[top]
+        return rows, sims
+
+    def save(self, path: str):
+        directory = os.path.dirname(path) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, centroids=self.centroids, keys=np.array(self.keys, dtype=str),
+                     assignments=self.assignments, trained_size=self.trained_size)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_or_train(cls, path: str | None, keys: list[str], vectors: np.ndarray) -> "IVFIndex":
+        """从 path 读取上次的簇中心和分配结果并增量更新，不存在或损坏时重新训练；path 不为空时保存结果"""
+        index = None
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    known = dict(zip(data["keys"].tolist(), data["assignments"].tolist()))
+                    index = cls.from_assignments(data["centroids"], int(data["trained_size"]), known, keys, vectors)
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"Broken IVF index {path}: {e}")
+        if index is None:
+            index = cls.train(keys, vectors)
+        if path:
+            index.save(path)
+        return index
@@ -1,10 +1,79 @@
 import arxiv
+import calendar
+import feedparser
+import re
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
 from loguru import logger
-from src.paper import ArxivPaper
+from src.paper import ArxivPaper, Author
 
 
-def filter_recent_papers(papers: list, days: int = 2) -> list:
+# arXiv每日公告列表（RSS）地址，{} 为类别，如 cs.AI
+LISTING_URL_FORMAT = "https://rss.arxiv.org/rss/{}"
+
+
+def utcnow() -> datetime:
+    """当前UTC时间，所有日期窗口都以它为准（回放HTTP录像时会被固定为录制时间）"""
+    return datetime.now(timezone.utc)
+
+
+class HostRateLimiter:
+    """按主机共享的礼貌限流器：同一主机的相邻两次请求至少间隔 min_interval 秒
+    
+    多个线程共用一个实例时，请求会被依次分配到不同的时间槽，
+    等待发生在锁外，因此不会阻塞其他主机的请求。
+    """
+    
+    def __init__(self, min_interval: float = 3.0):
+        self.min_interval = min_interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, host: str):
+        """阻塞直到轮到该主机的下一个请求时间槽"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _RateLimitedSession(requests.Session):
+    """每次请求前先向共享限流器申请时间槽的Session"""
+    
+    def __init__(self, limiter: HostRateLimiter):
+        super().__init__()
+        self._limiter = limiter
+    
+    def request(self, method, url, *args, **kwargs):
+        self._limiter.acquire(urlsplit(url).netloc)
+        return super().request(method, url, *args, **kwargs)
+
+
+def create_arxiv_client(limiter: HostRateLimiter = None) -> arxiv.Client:
+    """创建arxiv客户端
+    
+    Args:
+        limiter: 共享的主机限流器。提供时由限流器负责请求间隔，
+            客户端自身不再额外等待；否则沿用客户端自带的翻页间隔。
+    """
+    if limiter is None:
+        return arxiv.Client(num_retries=10, delay_seconds=10)
+    client = arxiv.Client(num_retries=10, delay_seconds=0)
+    # arxiv.Client 没有注入Session的公开接口，只能替换私有属性 _session（依赖中固定了 arxiv<5）。
+    # 用公开的 results(search, offset) 逐页请求也能限流，但会丢掉客户端按结果总数结束翻页
+    # 和遇到意外空页时重试的逻辑
+    client._session = _RateLimitedSession(limiter)
+    return client
+
+
+def filter_recent_papers(papers: list, days: float = 2) -> list:
     """过滤最近N天的论文
     
     Args:
@@ -14,7 +83,7 @@ def filter_recent_papers(papers: list, days: int = 2) -> list:
     Returns:
         过滤后的论文列表
     """
-    recent_days = datetime.now(timezone.utc) - timedelta(days=days)
+    recent_days = utcnow() - timedelta(days=days)
     logger.debug(f"Filtering papers since: {recent_days} (UTC)")
     
     filtered_papers = []
@@ -28,9 +97,31 @@ def filter_recent_papers(papers: list, days: int = 2) -> list:
     return filtered_papers
 
 
-def get_arxiv_paper_by_category(query: str, debug: bool = False, max_results: int = 50) -> list[ArxivPaper]:
-    """根据类别搜索arxiv论文"""
-    client = arxiv.Client(num_retries=10, delay_seconds=10)
+def build_date_window_query(query: str, days: float = 2, now: datetime = None) -> str:
+    """在查询中加入 submittedDate 时间窗口，让arXiv服务端只返回最近N天提交的论文
+    
+    Args:
+        query: 原始搜索查询
+        days: 天数
+        now: 窗口结束时间（UTC），默认为当前时间
+        
+    Returns:
+        形如 (query) AND submittedDate:[YYYYMMDDHHMM TO YYYYMMDDHHMM] 的查询
+    """
+    now = now or utcnow()
+    start = now - timedelta(days=days)
+    return f"({query}) AND submittedDate:[{start:%Y%m%d%H%M} TO {now:%Y%m%d%H%M}]"
+
+
+def get_arxiv_paper_by_category(query: str, debug: bool = False, max_results: int = 50,
+                                limiter: HostRateLimiter = None, date_window: bool = True,
+                                days: float = 2) -> list[ArxivPaper]:
+    """根据类别搜索arxiv论文
+    
+    date_window 为 True 时把日期范围放进查询，由服务端返回窗口内的全部论文，
+    翻页在结果总数处精确结束；否则按提交时间倒序翻页并在本地按日期过滤。
+    """
+    client = create_arxiv_client(limiter)
     
     if not debug:
         # 将查询字符串转换为搜索查询
@@ -40,49 +131,28 @@ def get_arxiv_paper_by_category(query: str, debug: bool = False, max_results: in
             search_queries.append(f"cat:{cat}")
         
         combined_query = " OR ".join(search_queries)
-        logger.info(f"使用搜索查询: {combined_query}")
-        
-        # 设置一个较大的搜索限制来确保获取足够多的结果
-        # 然后通过日期过滤来筛选出真正需要的论文
-        search_limit = 1000  # 设置一个合理的上限
         
-        search = arxiv.Search(
-            query=combined_query, 
-            max_results=search_limit,
-            sort_by=arxiv.SortCriterion.SubmittedDate
-        )
-        
-        papers = []
-        all_results = []
-        
-        # 获取结果并逐步检查，直到找到足够多的最近论文或确认没有更多最近论文
-        logger.info(f"开始获取论文，最大搜索数量: {search_limit}")
-        batch_count = 0
-        
-        for result in client.results(search):
-            all_results.append(result)
+        if date_window:
+            window_query = build_date_window_query(combined_query, days)
+            logger.info(f"使用搜索查询: {window_query}")
             
-            # 每处理一定数量的论文就检查一次日期过滤结果
-            if len(all_results) % max_results == 0:
-                batch_count += 1
-                logger.info(f"批次 {batch_count}: 已获取 {len(all_results)} 篇论文")
-                
-                # 检查最近一批论文是否还有符合日期条件的
-                recent_batch = all_results[-max_results:]
-                filtered_batch = filter_recent_papers(recent_batch)
-                
-                # 如果最近一批论文都不符合日期条件，可能已经超出时间范围
-                if not filtered_batch:
-                    logger.info(f"最近 {max_results} 篇论文都不符合日期条件，停止搜索")
-                    break
+            search = arxiv.Search(
+                query=window_query,
+                max_results=None,
+                sort_by=arxiv.SortCriterion.SubmittedDate
+            )
+            all_results = list(client.results(search))
+        else:
+            logger.info(f"使用搜索查询: {combined_query}")
+            all_results = _page_recent_results(client, combined_query, max_results, days)
         
         logger.info(f"总共获取到 {len(all_results)} 篇论文")
         
         # 对所有结果进行日期过滤
-        filtered_results = filter_recent_papers(all_results)
+        filtered_results = filter_recent_papers(all_results, days)
         logger.info(f"日期过滤后剩余 {len(filtered_results)} 篇论文")
         
-        papers = [ArxivPaper(p) for p in filtered_results]
+        papers = [ArxivPaper.from_result(p) for p in filtered_results]
         logger.info(f"最终返回 {len(papers)} 篇论文")
             
     else:
@@ -90,58 +160,223 @@ def get_arxiv_paper_by_category(query: str, debug: bool = False, max_results: in
         search = arxiv.Search(query='cat:cs.AI', sort_by=arxiv.SortCriterion.SubmittedDate)
         papers = []
         for i in client.results(search):
-            papers.append(ArxivPaper(i))
+            papers.append(ArxivPaper.from_result(i))
             if len(papers) == 5:
                 break
     
     return papers
 
 
-def get_arxiv_paper_by_keyword(query: str, debug: bool = False, max_results: int = 10) -> list[ArxivPaper]:
-    """根据关键词搜索arxiv论文"""
+def _page_recent_results(client: arxiv.Client, query: str, max_results: int, days: float) -> list[arxiv.Result]:
+    """按提交时间倒序翻页获取结果，直到某一批论文全部超出日期范围"""
+    # 设置一个较大的搜索限制来确保获取足够多的结果
+    # 然后通过日期过滤来筛选出真正需要的论文
+    search_limit = 1000  # 设置一个合理的上限
+    
+    search = arxiv.Search(
+        query=query, 
+        max_results=search_limit,
+        sort_by=arxiv.SortCriterion.SubmittedDate
+    )
+    
+    all_results = []
+    
+    # 获取结果并逐步检查，直到找到足够多的最近论文或确认没有更多最近论文
+    logger.info(f"开始获取论文，最大搜索数量: {search_limit}")
+    batch_count = 0
+    
+    for result in client.results(search):
+        all_results.append(result)
+        
+        # 每处理一定数量的论文就检查一次日期过滤结果
+        if len(all_results) % max_results == 0:
+            batch_count += 1
+            logger.info(f"批次 {batch_count}: 已获取 {len(all_results)} 篇论文")
+            
+            # 检查最近一批论文是否还有符合日期条件的
+            recent_batch = all_results[-max_results:]
+            filtered_batch = filter_recent_papers(recent_batch, days)
+            
+            # 如果最近一批论文都不符合日期条件，可能已经超出时间范围
+            if not filtered_batch:
+                logger.info(f"最近 {max_results} 篇论文都不符合日期条件，停止搜索")
+                break
+    
+    return all_results
+
+
+def get_arxiv_paper_by_keyword(query: str, debug: bool = False, max_results: int = 10,
+                               limiter: HostRateLimiter = None, date_window: bool = True,
+                               days: float = 2) -> list[ArxivPaper]:
+    """根据关键词搜索arxiv论文
+    
+    date_window 为 True 时由服务端限定日期范围，只需请求 max_results 篇；
+    否则多取 3 倍结果再在本地按日期过滤。
+    """
     # Search papers from Arxiv by keywords and append to the list
-    client = arxiv.Client(num_retries=10, delay_seconds=10)
+    client = create_arxiv_client(limiter)
     
-    # 使用简单的关键词搜索，不在查询中限制日期
     search_query = f"all:{query.strip()}"
+    if date_window:
+        search_query = build_date_window_query(search_query, days)
+        search_limit = max_results
+    else:
+        search_limit = max_results * 3
     
     logger.debug(f"Search query: {search_query}")
-    search = arxiv.Search(query=search_query, max_results=max_results*3, sort_by=arxiv.SortCriterion.SubmittedDate)
+    search = arxiv.Search(query=search_query, max_results=search_limit, sort_by=arxiv.SortCriterion.SubmittedDate)
     
     # 获取结果并过滤
     all_results = list(client.results(search))
-    filtered_results = filter_recent_papers(all_results)
+    filtered_results = filter_recent_papers(all_results, days)
     # sort by published date and truncate to max_results
     filtered_results.sort(key=lambda x: x.published, reverse=True)
     filtered_results = filtered_results[:max_results]
     
-    return [ArxivPaper(p, keyword=query.strip()) for p in filtered_results]
+    return [ArxivPaper.from_result(p, keyword=query.strip()) for p in filtered_results]
+
 
+def _paper_from_listing_entry(entry: feedparser.FeedParserDict) -> ArxivPaper:
+    """把公告列表中的一项直接转换为 ArxivPaper，无需再逐篇请求API"""
+    # guid 形如 oai:arXiv.org:2410.12345v1
+    short_id = entry.id.rsplit(':', 1)[-1]
+    match = re.search(r'v(\d+)$', short_id)
+    arxiv_id = re.sub(r'v\d+$', '', short_id)
+    version = int(match.group(1)) if match else 1
+    # description 形如 "arXiv:2410.12345v1 Announce Type: new \nAbstract: ..."
+    summary = re.sub(r'^arXiv:\S+\s+Announce Type:\s*\S+\s*(?:Abstract:\s*)?', '', entry.get('summary', ''))
+    authors = [a.strip() for a in re.split(r',|\s+and\s+', entry.get('author', '')) if a.strip()]
+    categories = [t.term for t in entry.get('tags', []) if t.get('term')]
+    published = datetime.fromtimestamp(calendar.timegm(entry.published_parsed), tz=timezone.utc)
+    
+    return ArxivPaper(
+        arxiv_id=arxiv_id,
+        version=version,
+        title=re.sub(r'\s+', ' ', entry.get('title', '')).strip(),
+        summary=summary.strip(),
+        authors=[Author(name) for name in authors],
+        published=published,
+        pdf_url=f"http://arxiv.org/pdf/{arxiv_id}v{version}",
+        categories=categories,
+    )
 
-def get_arxiv_papers_by_keywords(arxiv_query_keyword: str, debug: bool = False) -> list[ArxivPaper]:
+
+def get_arxiv_paper_by_listing(category: str, debug: bool = False, limiter: HostRateLimiter = None,
+                               announce_types: tuple[str, ...] = ("new", "cross")) -> list[ArxivPaper]:
+    """从某个类别的每日公告列表中获取论文
+    
+    一个类别只需要一次请求，论文对象完全由列表内容构建。
+    默认只保留新投稿和交叉列出的论文，忽略旧论文的版本更新(replace)。
+    """
+    session = _RateLimitedSession(limiter) if limiter else requests.Session()
+    url = LISTING_URL_FORMAT.format(category)
+    logger.info(f"获取公告列表: {url}")
+    
+    response = session.get(url, timeout=60)
+    response.raise_for_status()
+    feed = feedparser.parse(response.content)
+    
+    papers = []
+    for entry in feed.entries:
+        announce_type = entry.get('arxiv_announce_type', 'new')
+        if announce_type not in announce_types:
+            continue
+        try:
+            papers.append(_paper_from_listing_entry(entry))
+        except Exception as e:
+            logger.debug(f"Failed to parse listing entry {entry.get('id')}: {e}")
+    
+    logger.info(f"公告列表 {category}: {len(feed.entries)} 项，保留 {len(papers)} 篇论文")
+    if debug:
+        papers = papers[:5]
+    return papers
+
+
+def get_arxiv_papers_by_keywords(arxiv_query_keyword: str, debug: bool = False,
+                                 date_window: bool = True, days: float = 2) -> list[ArxivPaper]:
     """根据关键词列表获取arxiv论文"""
     if not arxiv_query_keyword:
         return []
     
     logger.info("Searching papers by keywords...")
-    keywords = [k.strip() for k in arxiv_query_keyword.split(',')]
-    
     keyword_papers = []
-    if not debug:
-        for arxiv_keyword in keywords:
-            batch = get_arxiv_paper_by_keyword(arxiv_keyword, debug)
-            logger.info(f"Found {len(batch)} papers for keyword '{arxiv_keyword}'")
-            keyword_papers.extend(batch)
-    else:
-        keyword_papers = get_arxiv_paper_by_keyword("robotics", debug, max_results=3)
-        logger.info(f"Found {len(keyword_papers)} papers for keyword 'robotics'")
+    for arxiv_keyword, max_results in parse_keyword_queries(arxiv_query_keyword, debug):
+        batch = get_arxiv_paper_by_keyword(arxiv_keyword, debug, max_results=max_results,
+                                           date_window=date_window, days=days)
+        logger.info(f"Found {len(batch)} papers for keyword '{arxiv_keyword}'")
+        keyword_papers.extend(batch)
     
     return keyword_papers
 
 
+def parse_keyword_queries(arxiv_query_keyword: str, debug: bool = False) -> list[tuple[str, int]]:
+    """把逗号分隔的关键词配置解析为 (关键词, 最大结果数) 列表，Debug模式下固定搜索robotics"""
+    if not arxiv_query_keyword:
+        return []
+    if debug:
+        return [("robotics", 3)]
+    keywords = [k.strip() for k in arxiv_query_keyword.split(',')]
+    return [(k, 10) for k in keywords if k]
+
+
+def fetch_arxiv_papers(arxiv_query: str, arxiv_query_keyword: str = None, debug: bool = False,
+                       max_workers: int = 4, min_request_interval: float = 3.0,
+                       date_window: bool = True, days: float = 2, backend: str = "search") -> list[ArxivPaper]:
+    """并发获取类别查询和全部关键词查询的论文
+    
+    所有查询在一个有界线程池中同时执行，并共用一个按主机的礼貌限流器，
+    全部完成后再统一去重排序。
+    
+    Args:
+        arxiv_query: 类别查询，如 cs.AI+cs.CV
+        arxiv_query_keyword: 逗号分隔的关键词
+        debug: Debug模式
+        max_workers: 同时进行的查询数上限
+        min_request_interval: 同一主机相邻请求的最小间隔（秒）
+        date_window: 是否在查询中加入 submittedDate 时间窗口
+        days: 获取最近多少天的论文
+        backend: 类别论文的来源，search 为搜索API，rss 为每个类别一次请求的每日公告列表
+        
+    Returns:
+        去重并按发布时间排序后的论文列表
+    """
+    limiter = HostRateLimiter(min_request_interval)
+    
+    tasks = []
+    if arxiv_query and backend == "rss":
+        for category in arxiv_query.split('+'):
+            tasks.append((f"listing '{category}'", get_arxiv_paper_by_listing, (category, debug), {}))
+    elif arxiv_query:
+        tasks.append(("category", get_arxiv_paper_by_category, (arxiv_query, debug),
+                      {"date_window": date_window, "days": days}))
+    for keyword, max_results in parse_keyword_queries(arxiv_query_keyword, debug):
+        tasks.append((f"keyword '{keyword}'", get_arxiv_paper_by_keyword, (keyword, debug),
+                      {"max_results": max_results, "date_window": date_window, "days": days}))
+    
+    logger.info(f"并发执行 {len(tasks)} 个arxiv查询 (workers={max_workers}, interval={min_request_interval}s)")
+    
+    batches: list[list[ArxivPaper]] = [[] for _ in tasks]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(func, *args, limiter=limiter, **kwargs): (index, name)
+            for index, (name, func, args, kwargs) in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            index, name = futures[future]
+            batch = future.result()
+            logger.info(f"Found {len(batch)} papers for {name}")
+            batches[index] = batch
+    
+    # 按提交顺序合并，保证重复论文总是保留类别查询中的那一份，与串行行为一致
+    return deduplicate_and_sort_papers([p for batch in batches for p in batch])
+
+
 def deduplicate_and_sort_papers(papers: list[ArxivPaper]) -> list[ArxivPaper]:
-    """去重并按发布时间排序论文"""
+    """去重并按发布时间排序论文
+    
+    重复的论文保留第一次出现的那一份；发布时间相同的论文保持输入中的先后顺序，结果不随运行变化。
+    """
     # 去重papers，基于arxiv_id, 并按发布时间排序
-    papers = list(set(papers))
+    papers = list(dict.fromkeys(papers))
     papers.sort(key=lambda x: x.published, reverse=True)
     return papers 
\ No newline at end of file
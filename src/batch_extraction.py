@@ -0,0 +1,132 @@
+import json
+from functools import lru_cache
+from loguru import logger
+from src.llm import LOCAL_N_CTX, count_tokens, extract_json, get_llm
+from src.paper import ArxivPaper, clean_affiliations
+
+# 每篇论文的回复（TLDR和机构列表）预留的token数
+RESULT_TOKENS_PER_PAPER = 150
+
+SYSTEM_PROMPT = ("You are an expert at analyzing academic papers. You can summarize papers concisely and extract "
+                 "institutional affiliations accurately. Always respond in valid JSON format.")
+
+
+def _build_prompt(entries: list[dict], lang: str) -> str:
+    return f"""Analyze each of the following academic papers and provide both a summary and author affiliations.
+
+Papers (JSON, the "id" field identifies each paper):
+{json.dumps(entries, ensure_ascii=False, indent=2)}
+
+For each paper, please provide:
+1. A one-sentence TLDR summary in {lang}
+2. The main institutional affiliations (universities, companies, research institutes)
+
+Respond with a JSON array containing exactly one object per paper:
+[
+    {{"id": 1, "tldr": "one sentence summary of the paper's main contribution", "affiliations": ["Institution 1", "Institution 2", ...]}},
+    ...
+]
+
+For affiliations:
+- Extract only main institution names (e.g., "Stanford University", not "Department of CS, Stanford University")
+- Look for universities, companies, research institutes in the author information
+- Handle footnote formats like "X and Y are with Institution Name"
+- Return an empty list if no clear affiliations found
+- Remove duplicates"""
+
+
+@lru_cache(maxsize=1)
+def _prompt_overhead() -> int:
+    """不含论文内容的prompt本身占用的token数"""
+    return count_tokens([{"role": "system", "content": SYSTEM_PROMPT},
+                         {"role": "user", "content": _build_prompt([], "English")}])
+
+
+def pack_batches(entries: list[dict], batch_size: int, token_budget: int) -> list[list[dict]]:
+    """按顺序把论文片段装入批次：每批最多 batch_size 篇，prompt加预留回复的token数不超过 token_budget
+
+    单篇就超出预算的论文单独成批。
+    """
+    overhead = _prompt_overhead()
+    batches, current, used = [], [], overhead
+    for entry in entries:
+        cost = count_tokens([{"content": json.dumps(entry, ensure_ascii=False, indent=2)}]) + RESULT_TOKENS_PER_PAPER
+        if current and (len(current) >= batch_size or used + cost > token_budget):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(entry)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_results(response: str, ids: set[int]) -> dict[int, dict]:
+    """解析一批论文的回复，只返回 id 属于本批、tldr 为非空字符串且 affiliations 为列表的条目"""
+    try:
+        items = extract_json(response)
+    except ValueError as e:
+        logger.warning(f"解析批量提取结果失败: {e}")
+        return {}
+    if isinstance(items, dict):
+        # 有的模型会把数组包在一个对象里
+        items = next((v for v in items.values() if isinstance(v, list)), [items])
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            paper_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        tldr = item.get("tldr")
+        affiliations = item.get("affiliations", [])
+        if paper_id not in ids or not isinstance(tldr, str) or not tldr.strip() or not isinstance(affiliations, list):
+            continue
+        results[paper_id] = {"tldr": tldr.strip(), "affiliations": clean_affiliations(affiliations)}
+    return results
+
+
+def extract_info_batched(papers: list[ArxivPaper], batch_size: int = 5, token_budget: int = 6000,
+                         max_rounds: int = 3) -> int:
+    """多篇论文共用一次LLM调用提取TLDR和机构信息，结果写入各论文的 llm_extracted_info
+
+    所有批次同时提交；回复中缺失或格式错误的论文在下一轮重新装批，只重试这些论文（重试时不读取LLM回复缓存）。
+    max_rounds 轮之后仍未得到结果的论文保持未计算状态，之后访问时按单篇方式调用LLM。
+    论文的tex应已提前下载（extraction_excerpt 会访问tex）。
+
+    Returns:
+        LLM调用次数
+    """
+    if not papers:
+        return 0
+    llm = get_llm()
+    if llm.aclient.local_only:
+        # 本地模型的上下文长度有限，prompt和回复都要放得下
+        token_budget = min(token_budget, LOCAL_N_CTX)
+
+    pending = {i + 1: p for i, p in enumerate(papers)}
+    excerpts = {i: {"id": i, **p.extraction_excerpt()} for i, p in pending.items()}
+    calls = 0
+    for round_index in range(max_rounds):
+        if not pending:
+            break
+        batches = pack_batches([excerpts[i] for i in pending], batch_size, token_budget)
+        logger.info(f"第 {round_index + 1} 轮批量提取TLDR和机构信息: {len(pending)} 篇论文, {len(batches)} 次调用")
+        responses = llm.generate_batch([
+            [{"role": "system", "content": SYSTEM_PROMPT},
+             {"role": "user", "content": _build_prompt(batch, llm.lang)}]
+            for batch in batches
+        ], refresh=round_index > 0)
+        calls += len(batches)
+        for batch, response in zip(batches, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"批量提取调用失败: {response}")
+                continue
+            for paper_id, result in parse_results(response, {entry["id"] for entry in batch}).items():
+                pending.pop(paper_id).llm_extracted_info = result
+
+    if pending:
+        logger.warning(f"{len(pending)} 篇论文批量提取失败，改为单篇提取")
+    logger.info(f"批量提取 {len(papers) - len(pending)}/{len(papers)} 篇论文的TLDR和机构信息，共 {calls} 次LLM调用")
+    return calls
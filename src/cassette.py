@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from loguru import logger
+import src.arxiv_client as arxiv_client
+
+# 正文已解码保存，这些头部在回放时不再适用
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """回放模式下请求了录像中不存在的地址"""
+
+
+class HTTPCassette:
+    """HTTP请求录制/回放层
+
+    所有经过 requests 的外部请求（arXiv API、Zotero、Papers-with-Code、Semantic Scholar）
+    （包括 arXiv 源码下载）都会被拦截：
+    - record 模式：照常访问网络，并把每个响应保存到录像目录
+    - replay 模式：完全不访问网络，从录像目录返回响应，并按 latency 注入人为延迟
+
+    录像目录中每个请求对应 <key>.json（状态码、头部）和 <key>.body（原始正文），
+    key 由请求方法、URL和请求体的哈希得到。录制开始的时间保存在 meta.json 中，
+    录制和回放期间 arXiv 日期窗口都固定使用这个时间，使查询URL保持一致。
+
+    Args:
+        path: 录像目录
+        mode: record 或 replay
+        latency: 回放时每个响应的人为延迟（秒）
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._patches = []
+
+    @property
+    def meta_file(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def __enter__(self):
+        if self.mode == "record":
+            os.makedirs(self.path, exist_ok=True)
+            recorded_at = arxiv_client.utcnow()
+            with open(self.meta_file, "w", encoding="utf-8") as f:
+                json.dump({"recorded_at": recorded_at.isoformat()}, f)
+        else:
+            if not os.path.exists(self.meta_file):
+                raise FileNotFoundError(f"找不到HTTP录像: {self.path}")
+            with open(self.meta_file, encoding="utf-8") as f:
+                recorded_at = datetime.fromisoformat(json.load(f)["recorded_at"])
+        logger.info(f"HTTP录像 {self.mode} 模式: {self.path} (录制时间 {recorded_at}, 注入延迟 {self.latency}s)")
+
+        cassette = self
+        original_send = HTTPAdapter.send
+
+        def send(adapter, request, **kwargs):
+            return cassette._send(original_send, adapter, request, **kwargs)
+
+        self._patch(HTTPAdapter, "send", send)
+        self._patch(arxiv_client, "utcnow", lambda: recorded_at)
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+        logger.info(f"HTTP录像统计: 命中 {self.hits}, 未命中 {self.misses}, 新录制 {self.recorded}")
+
+    def _patch(self, owner, name, value):
+        self._patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    @staticmethod
+    def _key(request: requests.PreparedRequest) -> str:
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256()
+        digest.update(request.method.encode() + b"\n" + request.url.encode() + b"\n" + body)
+        return digest.hexdigest()
+
+    def _send(self, original_send, adapter, request, **kwargs):
+        key = self._key(request)
+        meta_path = os.path.join(self.path, f"{key}.json")
+        body_path = os.path.join(self.path, f"{key}.body")
+
+        if self.mode == "replay":
+            if not os.path.exists(meta_path):
+                with self._lock:
+                    self.misses += 1
+                raise CassetteMissError(f"HTTP录像中没有该请求: {request.method} {request.url}", request=request)
+            with self._lock:
+                self.hits += 1
+            if self.latency > 0:
+                time.sleep(self.latency)
+            return self._load(meta_path, body_path, request)
+
+        response = original_send(adapter, request, **kwargs)
+        content = response.content
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        with open(body_path, "wb") as f:
+            f.write(content)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"method": request.method, "url": request.url,
+                       "status": response.status_code, "reason": response.reason,
+                       "headers": headers}, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            self.recorded += 1
+        return response
+
+    @staticmethod
+    def _load(meta_path: str, body_path: str, request: requests.PreparedRequest) -> requests.Response:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta.get("reason")
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        with open(body_path, "rb") as f:
+            response._content = f.read()
+        # 正文已完整读入，iter_content 等流式接口直接从 _content 中切片
+        response._content_consumed = True
+        return response
+
+
+def use_cassette(path: str = None, mode: str = "replay", latency: float = 0.0):
+    """未指定录像目录时返回一个什么都不做的上下文"""
+    if not path:
+        return nullcontext()
+    return HTTPCassette(path, mode=mode, latency=latency)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Callable
+import numpy as np
+from loguru import logger
+
+GLOBAL_EMBEDDING_CACHE = None
+
+
+def item_key(item: dict) -> tuple[str, int]:
+    """Zotero条目的 (key, version)；没有key的条目（如测试数据）以摘要的哈希为键"""
+    key = item.get('key') or item.get('data', {}).get('key')
+    if key:
+        return key, int(item.get('version') or item.get('data', {}).get('version') or 0)
+    text = item['data'].get('abstractNote', '')
+    return "sha1-" + hashlib.sha1(text.encode("utf-8")).hexdigest(), 0
+
+
+class EmbeddingCache:
+    """Zotero论文库摘要嵌入的本地持久缓存
+
+    每个嵌入模型一个子目录，其中 vectors.npy 为按行存放的 float32 嵌入矩阵（以内存映射方式读取，
+    只有用到的行才会读入内存），index.json 记录每一行对应的条目key和版本号。
+    条目版本号变化（在Zotero中修改过）时重新编码，论文库中已删除的条目从缓存中移除。
+    """
+
+    def __init__(self, cache_dir: str = "cache/embeddings"):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _model_dir(self, model: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r'[^\w.-]', '__', model))
+
+    def _load(self, model: str) -> tuple[dict[str, tuple[int, int]], np.ndarray | None]:
+        """返回 ({key: (行号, 版本号)}, 内存映射的嵌入矩阵)；缓存不存在或损坏时返回空"""
+        directory = self._model_dir(model)
+        try:
+            with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+                index = json.load(f)
+            vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            if os.path.exists(directory):
+                logger.debug(f"Broken embedding cache for {model}: {e}")
+            return {}, None
+        if index.get("model") != model or vectors.dtype != np.float32 or len(vectors) != len(index["keys"]):
+            return {}, None
+        rows = {key: (row, version) for row, (key, version) in enumerate(zip(index["keys"], index["versions"]))}
+        return rows, vectors
+
+    def _save(self, model: str, keys: list[tuple[str, int]], vectors: np.ndarray):
+        """先写嵌入矩阵再写索引，两者都原子替换；中途失败时索引与矩阵行数不符，下次整体重建"""
+        directory = self._model_dir(model)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, vectors)
+        os.replace(tmp, os.path.join(directory, "vectors.npy"))
+        index = {"model": model, "dim": int(vectors.shape[1]),
+                 "keys": [k for k, _ in keys], "versions": [v for _, v in keys]}
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(directory, "index.json"))
+
+    def index_path(self, model: str) -> str:
+        """与该模型的嵌入放在一起的近邻索引文件"""
+        directory = self._model_dir(model)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, "ivf.npz")
+
+    def get_embeddings(self, corpus: list[dict], model: str,
+                       encode: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """返回与 corpus 顺序一致的摘要嵌入矩阵（float32），只对新增或版本变化的条目调用 encode
+
+        缓存内容有变化（新增、更新或删除条目）时整体重写为与本次 corpus 一致的内容。
+        """
+        if not corpus:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [item_key(item) for item in corpus]
+        rows, cached = self._load(model)
+        hits = [i for i, (key, version) in enumerate(keys) if key in rows and rows[key][1] == version]
+        hit_set = set(hits)
+        misses = [i for i in range(len(corpus)) if i not in hit_set]
+        deleted = len(rows.keys() - {key for key, _ in keys})
+
+        encoded = self._encode(corpus, misses, encode) if misses else None
+        if encoded is not None and cached is not None and encoded.shape[1] != cached.shape[1]:
+            # 同名模型的输出维度变了，旧缓存全部作废
+            logger.warning(f"{model} 的嵌入维度从 {cached.shape[1]} 变为 {encoded.shape[1]}，重新编码整个论文库")
+            hits, misses = [], list(range(len(corpus)))
+            encoded = self._encode(corpus, misses, encode)
+
+        dim = encoded.shape[1] if encoded is not None else cached.shape[1]
+        vectors = np.empty((len(corpus), dim), dtype=np.float32)
+        if hits:
+            vectors[hits] = cached[[rows[keys[i][0]][0] for i in hits]]
+        if misses:
+            vectors[misses] = encoded
+
+        self.hits += len(hits)
+        self.misses += len(misses)
+        self.evicted += deleted
+        if misses or deleted:
+            self._save(model, keys, vectors)
+        logger.info(f"论文库嵌入: 缓存命中 {len(hits)} 篇，新编码 {len(misses)} 篇，移除 {deleted} 篇")
+        return vectors
+
+    @staticmethod
+    def _encode(corpus: list[dict], positions: list[int], encode: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        return np.asarray(encode([corpus[i]['data']['abstractNote'] for i in positions]), dtype=np.float32)
+
+
+def set_global_embedding_cache(cache_dir: str = None):
+    """设置全局嵌入缓存，cache_dir 为空时关闭缓存"""
+    global GLOBAL_EMBEDDING_CACHE
+    if not cache_dir:
+        GLOBAL_EMBEDDING_CACHE = None
+        return
+    GLOBAL_EMBEDDING_CACHE = EmbeddingCache(cache_dir)
+    logger.info(f"Embedding cache set to {cache_dir}")
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    return GLOBAL_EMBEDDING_CACHE
@@ -0,0 +1,45 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from src.batch_extraction import extract_info_batched
+from src.paper import ArxivPaper
+
+
+def _enrich_summary(paper: ArxivPaper):
+    # tldr 和 affiliations 共用一次 LLM 调用（llm_extracted_info），放在同一个任务里避免重复计算
+    paper.tldr
+    paper.affiliations
+
+
+def _enrich_code(paper: ArxivPaper):
+    paper.code_url
+
+
+def _needs_extraction(paper: ArxivPaper) -> bool:
+    return paper.cached_value('llm_extracted_info') is None and paper.cached_value('tldr') is None
+
+
+def enrich_papers(papers: list[ArxivPaper], max_workers: int = 8, batch_size: int = 1,
+                  batch_token_budget: int = 6000) -> list[ArxivPaper]:
+    """并发补全邮件中展示的 TLDR、机构信息和代码链接，之后渲染邮件不再发起任何网络请求
+
+    每篇论文拆成两个互不影响的任务（TLDR/机构信息、代码链接），由有界线程池执行；
+    对 arXiv、Semantic Scholar、Papers-with-Code 的并发数另由 service_limits 分别限制。
+    batch_size 大于1时，先并发下载tex，再由 extract_info_batched 每次调用提取多篇论文的TLDR和机构信息。
+    已经计算过（例如从论文库恢复）的字段不会重复计算。
+    """
+    if not papers:
+        return papers
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_enrich_code, p) for p in papers]
+        if batch_size > 1:
+            pending = [p for p in papers if _needs_extraction(p)]
+            list(executor.map(lambda p: p.tex, pending))
+            extract_info_batched(pending, batch_size=batch_size, token_budget=batch_token_budget)
+        futures += [executor.submit(_enrich_summary, p) for p in papers]
+        for future in futures:
+            future.result()
+    logger.info(f"补全 {len(papers)} 篇论文的TLDR、机构信息和代码链接（{len(futures)} 个任务），"
+                f"用时 {time.perf_counter() - start:.1f}s")
+    return papers
@@ -1,89 +1,459 @@
-from llama_cpp import Llama
-from openai import OpenAI
+from llama_cpp import Llama, LlamaRAMCache
+import openai
+from openai import AsyncOpenAI
 from loguru import logger
-from time import sleep
-import time
-from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Optional
+import asyncio
+import json
+import os
+import re
+import threading
+import tiktoken
+from src.llm_cache import cache_key, get_llm_cache
+from src.rate_limit import AdaptiveRateLimiter, backoff_delay, retry_after
 
 GLOBAL_LLM = None
 
-class LLM:
-    def __init__(self, api_key: str = None, base_url: str = None, model: str = None, lang: str = "English", config: dict = None):
-        if api_key:
-            self.llm = OpenAI(api_key=api_key, base_url=base_url)
-        else:
-            self.llm = Llama.from_pretrained(
-                repo_id="Qwen/Qwen2.5-3B-Instruct-GGUF",
-                filename="qwen2.5-3b-instruct-q4_k_m.gguf",
-                n_ctx=5_000,
+LOCAL_REPO_ID = "Qwen/Qwen2.5-3B-Instruct-GGUF"
+LOCAL_FILENAME = "qwen2.5-3b-instruct-q4_k_m.gguf"
+# 本地模型的上下文长度（prompt和回复合计的token数）
+LOCAL_N_CTX = 5_000
+# 本地模型缓存的状态数，内存上限按模型一个占满上下文的状态大小换算（Qwen2.5-3B 约 500MB 一个）。
+# 评分批次和信息提取两类prompt交替出现，保留最近使用的3个状态时每类prompt都总有一个共享前缀的状态可以继续
+LOCAL_PROMPT_CACHE_STATES = 3
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken编码器只加载一次；无法加载（如离线）时返回None，改用按字符数估算"""
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        logger.warning(f"加载tiktoken编码器失败: {e}，按字符数估算token数")
+        return None
+
+
+def token_length(text: str) -> int:
+    """文本的token数；没有编码器时按每3个字符一个token估算"""
+    enc = _encoding()
+    return len(enc.encode(text)) if enc else len(text) // 3
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """把文本截断到最多 max_tokens 个token，未超出时原样返回"""
+    if max_tokens <= 0:
+        return ""
+    enc = _encoding()
+    if enc is None:
+        return text[:max_tokens * 3]
+    tokens = enc.encode(text)
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+
+
+def count_tokens(messages: list[dict]) -> int:
+    """估算一组消息的prompt token数，用于按每分钟token数限流"""
+    # 每条消息另有几个token的角色和分隔符开销
+    return sum(4 + token_length(message.get("content") or "") for message in messages)
+
+
+def extract_json(response: str):
+    """从LLM回复中解析JSON：有代码块时取第一个代码块，然后从第一个 { 或 [ 开始解码，忽略其后的多余文字
+
+    Raises:
+        ValueError: 回复中找不到合法的JSON
+    """
+    block = re.search(r'```(?:json)?\s*(.*?)```', response, flags=re.DOTALL)
+    if block:
+        response = block.group(1)
+    start = re.search(r'[\[{]', response)
+    if start is None:
+        raise ValueError("No JSON found in LLM response")
+    return json.JSONDecoder().raw_decode(response, start.start())[0]
+
+
+def cached_prompt_tokens(usage) -> int:
+    """服务端前缀缓存命中的prompt token数：OpenAI等返回 prompt_tokens_details.cached_tokens，
+    DeepSeek返回 prompt_cache_hit_tokens；不支持的服务返回0"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = (getattr(usage, "model_extra", None) or {}).get("prompt_cache_hit_tokens")
+    return cached or 0
+
+
+def parse_llm_endpoints(value) -> list[dict]:
+    """解析LLM端点列表，支持JSON字符串或字典列表
+
+    每个端点可包含 base_url、api_key（或存放key的环境变量名 api_key_env）、model，
+    以及覆盖全局配置的 max_requests_per_minute、max_tokens_per_minute、max_concurrent_requests。
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    endpoints = []
+    for endpoint in value:
+        endpoint = {str(k).lower(): v for k, v in endpoint.items()}
+        if not endpoint.get("api_key") and endpoint.get("api_key_env"):
+            endpoint["api_key"] = os.environ.get(endpoint["api_key_env"])
+        endpoints.append(endpoint)
+    return endpoints
+
+
+class APIEndpoint:
+    """一个OpenAI兼容的端点（base_url、key和模型），拥有独立的并发数和限流额度
+
+    失败的请求按指数退避加随机抖动重试，服务端给出 Retry-After 或限流重置时间时以其为准；
+    收到429时降低有效RPM，之后随成功请求逐步回升（见 AdaptiveRateLimiter）。
+    认证失败、请求格式错误、额度用尽等重试无意义的错误直接抛出。
+    """
+
+    local = False
+
+    def __init__(self, api_key: str, base_url: str = None, model: str = None, config: dict = None):
+        config = config or {}
+        # 重试由本类统一处理，关闭SDK自带的重试
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.name = f"{model}@{base_url or 'openai'}"
+        self.model = model
+        # 缓存键中的模型名
+        self.model_id = model
+        self.max_concurrent_requests = max(1, config.get('max_concurrent_requests', 4))
+        self.expected_completion_tokens = config.get('expected_completion_tokens', 512)
+        # 至少尝试一次，API_RETRY_ATTEMPTS 配置为0或负数时等同于不重试
+        self.api_retry_attempts = max(1, config.get('api_retry_attempts', 3))
+        self.api_retry_delay = config.get('api_retry_delay', 3.0)
+        self.api_max_retry_delay = config.get('api_max_retry_delay', 60.0)
+        self.limiter = AdaptiveRateLimiter(config.get('max_requests_per_minute', 9), config.get('max_tokens_per_minute', 0),
+                                           adaptive=config.get('adaptive_rate_limit', True))
+        self.in_flight = 0
+        # 连续失败次数
+        self.failures = 0
+
+        # 统计信息
+        self.requests = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def ready_in(self, estimated_tokens: int) -> float:
+        return self.limiter.ready_in(estimated_tokens)
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """认证失败、请求格式错误、额度用尽等错误重试无意义；连接错误、超时、429和5xx值得重试"""
+        if isinstance(error, openai.RateLimitError):
+            return error.code != "insufficient_quota"
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code >= 500 or error.status_code in (408, 409)
+        return True
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """返回重试前等待的秒数，错误不值得重试时返回None"""
+        if not self.is_retryable(error):
+            return None
+        fallback = backoff_delay(attempt, self.api_retry_delay, self.api_max_retry_delay)
+        if isinstance(error, openai.RateLimitError):
+            return self.limiter.on_rate_limited(error.response.headers, fallback)
+        if isinstance(error, openai.APIStatusError):
+            server_delay = retry_after(error.response.headers)
+            return fallback if server_delay is None else server_delay
+        # 连接错误、超时以及其他未知错误
+        return fallback
+
+    async def complete(self, messages: list[dict], temperature: float, failover: bool = False) -> str:
+        """发送请求；failover 为True（还有其他端点可用）时，可重试的错误不在本端点等待重试，
+        而是让本端点暂停一段时间（连续失败时指数增长，使路由暂时避开它）后直接抛出"""
+        estimated_tokens = count_tokens(messages) + self.expected_completion_tokens
+        for attempt in range(self.api_retry_attempts):
+            waited = await self.limiter.acquire(estimated_tokens)
+            if waited >= 1:
+                logger.info(f"{self.name} 达到频率限制，等待了 {waited:.1f} 秒")
+            try:
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    messages=messages, temperature=temperature, model=self.model)
+                response = raw.parse()
+                self.limiter.on_success(raw.headers)
+                self.failures = 0
+                break
+            except Exception as e:
+                self.failures += 1
+                delay = self._retry_delay(e, self.failures - 1 if failover else attempt)
+                if failover and delay is not None:
+                    self.limiter.pause(delay)
+                if delay is None or failover or attempt == self.api_retry_attempts - 1:
+                    logger.error(f"{self.name} attempt {attempt + 1} failed: {e}")
+                    raise
+                logger.warning(f"{self.name} attempt {attempt + 1} failed: {e}，{delay:.1f} 秒后重试")
+                self.retries += 1
+                await asyncio.sleep(delay)
+        self.requests += 1
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.cached_tokens += cached_prompt_tokens(usage)
+            self.completion_tokens += usage.completion_tokens or 0
+            self.limiter.settle((usage.total_tokens or 0) - estimated_tokens)
+        return response.choices[0].message.content
+
+    def stats(self) -> str:
+        return (f"{self.requests} requests, {self.retries} retries, {self.limiter.rate_limited} rate limited, "
+                f"{self.prompt_tokens}+{self.completion_tokens} tokens ({self.cached_tokens} cached), throttled {self.limiter.throttled_seconds:.1f}s")
+
+
+class _LlamaStateCache(LlamaRAMCache):
+    """按状态实际占用的内存计算大小的 LlamaRAMCache
+
+    LlamaRAMCache 只统计 llama.cpp 的状态数据，每个 LlamaState 另外复制的 scores
+    （n_batch × 词表大小的float32，Qwen2.5 约 300MB）和 input_ids 不计入容量。
+    """
+
+    @property
+    def cache_size(self):
+        return sum(state.llama_state_size + state.scores.nbytes + state.input_ids.nbytes
+                   for state in self.cache_state.values())
+
+
+def _prompt_state_bytes(llama: Llama) -> int:
+    """一个占满上下文的缓存状态的大小：f16 的KV缓存、最后一个token的logits，加上 scores 和 input_ids 的副本"""
+    metadata = llama.metadata
+    arch = metadata["general.architecture"]
+    n_layer = int(metadata[f"{arch}.block_count"])
+    n_head = int(metadata[f"{arch}.attention.head_count"])
+    n_head_kv = int(metadata.get(f"{arch}.attention.head_count_kv", n_head))
+    head_dim = int(metadata[f"{arch}.embedding_length"]) // n_head
+    key_length = int(metadata.get(f"{arch}.attention.key_length", head_dim))
+    value_length = int(metadata.get(f"{arch}.attention.value_length", head_dim))
+    # 每个KV单元另外记录位置、序列数和序列号（各4字节）；每层的K、V各有类型和行大小（12字节），再留一些给其余计数字段
+    kv_bytes = llama.n_ctx() * (n_layer * n_head_kv * (key_length + value_length) * 2 + 12) + n_layer * 24 + 1024
+    return kv_bytes + llama.n_vocab() * 4 + llama.scores.nbytes + llama.input_ids.nbytes
+
+
+class LocalEndpoint:
+    """本地 llama.cpp 模型，不支持并发推理，首次使用时才加载"""
+
+    local = True
+    max_concurrent_requests = 1
+
+    def __init__(self):
+        self.name = "local"
+        # 缓存键中的模型名，用仓库和文件名区分
+        self.model_id = f"{LOCAL_REPO_ID}/{LOCAL_FILENAME}"
+        self.in_flight = 0
+        self.requests = 0
+        self._llama = None
+
+    def ready_in(self, estimated_tokens: int) -> float:
+        return 0.0
+
+    def _create_chat_completion(self, messages: list[dict], temperature: float) -> dict:
+        if self._llama is None:
+            self._llama = Llama.from_pretrained(
+                repo_id=LOCAL_REPO_ID,
+                filename=LOCAL_FILENAME,
+                n_ctx=LOCAL_N_CTX,
                 n_threads=4,
                 verbose=False,
             )
-        self.model = model
-        self.lang = lang
-        
-        # 从配置中读取限流参数，提供默认值
+            # 每次生成后保存KV缓存状态，之后前缀相同的prompt（如各批次共享的评分说明和历史论文）从最长匹配的状态继续
+            capacity = LOCAL_PROMPT_CACHE_STATES * _prompt_state_bytes(self._llama)
+            self._llama.set_cache(_LlamaStateCache(capacity_bytes=capacity))
+            logger.debug(f"本地模型提示缓存上限 {capacity / 1024 ** 2:.0f} MB（{LOCAL_PROMPT_CACHE_STATES} 个状态）")
+        return self._llama.create_chat_completion(messages=messages, temperature=temperature)
+
+    async def complete(self, messages: list[dict], temperature: float, failover: bool = False) -> str:
+        response = await asyncio.to_thread(self._create_chat_completion, messages, temperature)
+        self.requests += 1
+        return response["choices"][0]["message"]["content"]
+
+    def stats(self) -> str:
+        return f"{self.requests} requests"
+
+
+class AsyncLLM:
+    """基于asyncio的LLM客户端，由一个或多个端点组成
+
+    每个API端点最多同时保持 max_concurrent_requests 个请求在途，并用两个令牌桶分别限制
+    每分钟请求数和每分钟token数（发送前按估算的prompt token数加 expected_completion_tokens
+    预扣，返回后按实际用量修正）。请求发往有空闲并发名额、且预计等待时间最短的端点，
+    失败时换到其他端点（见 _generate）。本地模型只作为最后的兜底，在所有API端点都失败后才使用；
+    没有API端点时直接使用本地模型。
+
+    所有协程必须在同一个事件循环中运行；同步代码请使用 LLM。
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = None, config: dict = None,
+                 endpoints: list[dict] = None, local_fallback: bool = False):
         self.config = config or {}
-        self.max_requests_per_minute = self.config.get('max_requests_per_minute', 9)
-        self.api_retry_attempts = self.config.get('api_retry_attempts', 3)
-        self.api_retry_delay = self.config.get('api_retry_delay', 3.0)
-        self.rate_limit_buffer = self.config.get('rate_limit_buffer', 1.0)
-        
-        # 频率限制相关属性
-        self.request_times = deque()  # 存储请求时间戳
-        self.is_gemini = model and "gemini" in model.lower() if model else False
-
-    def _check_rate_limit(self):
-        """检查并执行频率限制"""
-        current_time = time.time()
-        
-        # 只对gemini模型或OpenAI API进行频率限制
-        if not (self.is_gemini or isinstance(self.llm, OpenAI)):
-            return
-            
-        # 移除超过1分钟的请求记录
-        while self.request_times and current_time - self.request_times[0] > 60:
-            self.request_times.popleft()
-        
-        # 如果请求数达到限制，等待
-        if len(self.request_times) >= self.max_requests_per_minute:
-            sleep_time = 60 - (current_time - self.request_times[0]) + self.rate_limit_buffer
-            logger.info(f"达到频率限制，等待 {sleep_time:.1f} 秒...")
-            sleep(sleep_time)
-            # 清理过期的请求记录
-            current_time = time.time()
-            while self.request_times and current_time - self.request_times[0] > 60:
-                self.request_times.popleft()
-        
-        # 记录当前请求时间
-        self.request_times.append(current_time)
+        if endpoints:
+            self.endpoints = [APIEndpoint(e.get('api_key'), e.get('base_url', base_url), e.get('model', model),
+                                          {**self.config, **e})
+                              for e in endpoints]
+        elif api_key:
+            self.endpoints = [APIEndpoint(api_key, base_url, model, self.config)]
+        else:
+            self.endpoints = []
+        if local_fallback or not self.endpoints:
+            self.endpoints.append(LocalEndpoint())
+        self.temperature = 0
+        self._changed = None
 
-    def generate(self, messages: list[dict]) -> str:
-        # 执行频率限制检查
-        self._check_rate_limit()
-        
-        if isinstance(self.llm, OpenAI):
-            for attempt in range(self.api_retry_attempts):
+    @property
+    def local_only(self) -> bool:
+        return all(endpoint.local for endpoint in self.endpoints)
+
+    async def generate(self, messages: list[dict], refresh: bool = False) -> str:
+        """生成回复；配置了LLM回复缓存时，相同模型、温度和消息的请求直接返回缓存的回复
+
+        refresh 为True时不读取缓存（例如缓存的回复无法解析而重试），新的回复仍会写入缓存。
+        """
+        cache = get_llm_cache()
+        if cache is None:
+            return (await self._generate(messages))[0]
+        if not refresh:
+            for model_id in dict.fromkeys(endpoint.model_id for endpoint in self.endpoints):
+                response = await asyncio.to_thread(cache.get, cache_key(model_id, self.temperature, messages))
+                if response is not None:
+                    return response
+        response, endpoint = await self._generate(messages)
+        await asyncio.to_thread(cache.put, cache_key(endpoint.model_id, self.temperature, messages), response)
+        return response
+
+    async def _acquire(self, candidates: list, estimated_tokens: int):
+        """占用候选端点中有空闲名额、预计等待最短的一个，都没有空闲名额时等待"""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        async with self._changed:
+            while True:
+                free = [e for e in candidates if e.in_flight < e.max_concurrent_requests]
+                busy = [e for e in candidates if e.in_flight >= e.max_concurrent_requests]
+                timeout = None
+                if free:
+                    endpoint = min(free, key=lambda e: (e.ready_in(estimated_tokens),
+                                                        e.in_flight / e.max_concurrent_requests))
+                    timeout = endpoint.ready_in(estimated_tokens)
+                    # 空闲端点还要等待（例如被限流暂停）而忙碌端点很快就绪时，先等忙碌端点释放名额
+                    if not busy or timeout <= min(e.ready_in(estimated_tokens) for e in busy):
+                        endpoint.in_flight += 1
+                        return endpoint
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, endpoint):
+        async with self._changed:
+            endpoint.in_flight -= 1
+            self._changed.notify_all()
+
+    async def _complete(self, candidates: list, messages: list[dict], estimated_tokens: int, failover: bool):
+        endpoint = await self._acquire(candidates, estimated_tokens)
+        try:
+            return await endpoint.complete(messages, self.temperature, failover=failover), endpoint
+        finally:
+            await self._release(endpoint)
+
+    async def _generate(self, messages: list[dict]) -> tuple[str, object]:
+        """返回 (回复, 实际回答的端点)
+
+        先依次尝试每个API端点，失败立即换下一个；都失败时在可重试的端点中选预计等待最短的一个，
+        按完整的重试策略重试；仍然失败时才使用本地模型。只有一个API端点时直接按完整策略重试。
+        """
+        api_endpoints = [e for e in self.endpoints if not e.local]
+        local_endpoints = [e for e in self.endpoints if e.local]
+        estimated_tokens = count_tokens(messages)
+        error = None
+        if api_endpoints:
+            single = len(api_endpoints) == 1
+            untried, retryable = list(api_endpoints), []
+            while untried:
+                endpoint = await self._acquire(untried, estimated_tokens)
+                untried.remove(endpoint)
                 try:
-                    response = self.llm.chat.completions.create(messages=messages, temperature=0, model=self.model)
-                    break
+                    return await endpoint.complete(messages, self.temperature, failover=not single), endpoint
                 except Exception as e:
-                    logger.error(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt == self.api_retry_attempts - 1:
-                        raise
-                    sleep(self.api_retry_delay)
-            return response.choices[0].message.content
-        else:
-            response = self.llm.create_chat_completion(messages=messages,temperature=0)
-            return response["choices"][0]["message"]["content"]
+                    error = e
+                    if not single and endpoint.is_retryable(e):
+                        retryable.append(endpoint)
+                    if len(self.endpoints) > 1:
+                        logger.warning(f"{endpoint.name} 请求失败，改用其他端点: {e}")
+                finally:
+                    await self._release(endpoint)
+            if retryable:
+                try:
+                    return await self._complete(retryable, messages, estimated_tokens, failover=False)
+                except Exception as e:
+                    error = e
+        if not local_endpoints:
+            raise error
+        if api_endpoints:
+            logger.warning("所有API端点都失败，改用本地模型")
+        return await self._complete(local_endpoints, messages, estimated_tokens, failover=False)
+
+    async def generate_many(self, batch: list[list[dict]], refresh: bool = False) -> list:
+        """同时提交一批请求并等待全部完成，结果与输入顺序一致，失败的请求在对应位置返回异常"""
+        return await asyncio.gather(*(self.generate(messages, refresh) for messages in batch), return_exceptions=True)
+
+    def stats(self) -> str:
+        if len(self.endpoints) == 1:
+            return self.endpoints[0].stats()
+        return "; ".join(f"{endpoint.name}: {endpoint.stats()}" for endpoint in self.endpoints)
+
+
+class LLM:
+    """AsyncLLM的同步接口
+
+    所有调用都提交到后台线程中的同一个事件循环，多个线程并发调用时共享同一组并发和限流额度。
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = None, lang: str = "English", config: dict = None,
+                 endpoints: list[dict] = None, local_fallback: bool = False):
+        self.aclient = AsyncLLM(api_key=api_key, base_url=base_url, model=model, config=config,
+                                endpoints=endpoints, local_fallback=local_fallback)
+        self.model = model
+        self.lang = lang
+        self.config = self.aclient.config
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True).start()
+            return self._loop
+
+    def submit(self, messages: list[dict]) -> Future:
+        """提交一个请求，立即返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self.aclient.generate(messages), self._event_loop())
+
+    def generate(self, messages: list[dict]) -> str:
+        return self.submit(messages).result()
+
+    def generate_batch(self, batch: list[list[dict]], refresh: bool = False) -> list:
+        """同时提交一批请求并等待全部完成，失败的请求在对应位置返回异常"""
+        return asyncio.run_coroutine_threadsafe(self.aclient.generate_many(batch, refresh), self._event_loop()).result()
+
+    def stats(self) -> str:
+        return self.aclient.stats()
+
 
-def set_global_llm(api_key: str = None, base_url: str = None, model: str = None, lang: str = "English", config: dict = None):
+def set_global_llm(api_key: str = None, base_url: str = None, model: str = None, lang: str = "English", config: dict = None,
+                   endpoints: list[dict] = None, local_fallback: bool = False):
     global GLOBAL_LLM
-    GLOBAL_LLM = LLM(api_key=api_key, base_url=base_url, model=model, lang=lang, config=config)
-    model_str_decrypt = [letter for letter in model]
+    GLOBAL_LLM = LLM(api_key=api_key, base_url=base_url, model=model, lang=lang, config=config,
+                     endpoints=endpoints, local_fallback=local_fallback)
+    model_str_decrypt = [letter for letter in model] if model else "local"
     logger.info(f"Global LLM set to {model_str_decrypt} with lang {lang}")
+    if len(GLOBAL_LLM.aclient.endpoints) > 1:
+        logger.info(f"LLM端点: {[[letter for letter in e.name] for e in GLOBAL_LLM.aclient.endpoints]}")
     if config:
         logger.info(f"LLM配置: RPM限制={config.get('max_requests_per_minute', 9)}, "
+                   f"TPM限制={config.get('max_tokens_per_minute', 0)}, "
+                   f"并发请求数={config.get('max_concurrent_requests', 4)}, "
                    f"重试次数={config.get('api_retry_attempts', 3)}, "
                    f"重试延迟={config.get('api_retry_delay', 3.0)}s")
 
@@ -91,4 +461,4 @@ def get_llm() -> LLM:
     if GLOBAL_LLM is None:
         logger.info("No global LLM found, creating a default one. Use `set_global_llm` to set a custom one.")
         set_global_llm()
-    return GLOBAL_LLM
\ No newline at end of file
+    return GLOBAL_LLM
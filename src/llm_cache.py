@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from loguru import logger
+
+GLOBAL_LLM_CACHE = None
+# 超过上限时淘汰到上限的这个比例，之后写入一段时间才需要再次扫描目录
+EVICT_TARGET_RATIO = 0.9
+
+
+def cache_key(model: str, temperature: float, messages: list[dict]) -> str:
+    """由模型名、温度和消息内容生成缓存键"""
+    payload = json.dumps({"model": model, "temperature": temperature, "messages": messages},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """LLM回复的本地持久缓存
+
+    每个键对应 <key>.json，保存回复内容和写入时间。超过 ttl_seconds 的条目视为未命中并删除；
+    每次读取都会刷新文件的修改时间，总大小超过 max_bytes 时按最久未使用的顺序淘汰。
+    总大小在启动时统计一次，之后随写入和删除在内存中累计，只有超过上限时才扫描目录。
+    只缓存成功的回复。
+    """
+
+    def __init__(self, cache_dir: str = "cache/llm", max_bytes: int = 256 * 1024 ** 2, ttl_seconds: float = 72 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if self._expired(entry["created"]):
+                size = os.path.getsize(path)
+                os.remove(path)
+                with self._lock:
+                    self._total_bytes -= size
+                entry = None
+            else:
+                os.utime(path)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Broken LLM cache entry {path}: {e}")
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["response"]
+
+    def put(self, key: str, response: str):
+        data = json.dumps({"created": time.time(), "response": response}, ensure_ascii=False).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = self._path(key)
+        with self._lock:
+            try:
+                # 覆盖已有条目时只累计大小的差值
+                self._total_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._total_bytes += len(data)
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict(keep=key)
+
+    def _scan(self) -> list[tuple[float, int, str, str]]:
+        """缓存目录中所有条目的 (修改时间, 大小, 路径, 文件名)"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name))
+        return entries
+
+    def evict(self, keep: str = None):
+        """总大小超过上限时，按最近使用时间从旧到新删除到上限的 EVICT_TARGET_RATIO，keep 对应的条目不会被删除
+
+        扫描目录得到准确的总大小，同时校正内存中累计的值（其他进程也可能写入同一目录）。
+        """
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _, _ in entries)
+            self._total_bytes = total
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, size, path, name in entries:
+                if total <= target:
+                    break
+                if name == f"{keep}.json":
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.debug(f"Evicted {name} from LLM cache")
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = total
+
+
+def set_global_llm_cache(cache_dir: str = None, max_mb: float = 256, ttl_hours: float = 72):
+    """设置全局LLM回复缓存，cache_dir 为空时关闭缓存"""
+    global GLOBAL_LLM_CACHE
+    if not cache_dir:
+        GLOBAL_LLM_CACHE = None
+        return
+    GLOBAL_LLM_CACHE = LLMResponseCache(cache_dir, max_bytes=int(max_mb * 1024 ** 2), ttl_seconds=ttl_hours * 3600)
+    logger.info(f"LLM cache set to {cache_dir} (max {max_mb} MB, ttl {ttl_hours} h)")
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    return GLOBAL_LLM_CACHE
@@ -0,0 +1,164 @@
+"""
+sentence-transformers 嵌入模型的ONNX Runtime后端，只依赖 onnxruntime 和 tokenizers，不需要加载torch
+
+运行时读取导出目录（或Hugging Face上的模型仓库）中的 tokenizer.json、sentence_bert_config.json、
+1_Pooling/config.json、modules.json 和ONNX模型文件，按原模型的截断长度、池化方式和归一化设置复现
+SentenceTransformer.encode 的结果。默认使用原始精度的 onnx/model.onnx；导出时另外生成的动态int8量化模型
+需要先用 benchmarks.bench_encoder 确认与torch后端的排序一致，再通过 file_name 选用。
+
+导出并量化（一次性步骤，需要 sentence-transformers[onnx]）:
+    python -m src.onnx_encoder --model avsolatorio/GIST-small-Embedding-v0 --output models/GIST-small-Embedding-v0-onnx
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from loguru import logger
+
+DEFAULT_ONNX_FILE = "onnx/model.onnx"
+DEFAULT_MAX_SEQ_LENGTH = 512
+
+
+def _read_json(directory: str, name: str) -> dict | list | None:
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _file_digest(path: str) -> str:
+    """模型文件内容的哈希，用于区分不同的导出结果"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _resolve_model_dir(model: str, file_name: str) -> str:
+    """本地目录直接使用，否则从Hugging Face下载模型仓库中的ONNX文件和配置文件"""
+    if os.path.isdir(model):
+        return model
+    from huggingface_hub import snapshot_download
+    return snapshot_download(model, allow_patterns=[file_name, "*.json", "1_Pooling/*"])
+
+
+class OnnxEncoder:
+    """与 SentenceTransformer.encode 接口一致的ONNX编码器
+
+    Args:
+        model: 导出目录或Hugging Face模型仓库名
+        file_name: 目录中的ONNX模型文件，默认为原始精度的模型
+        batch_size: 每次推理的文本数；文本按长度排序后分批，减少填充
+        threads: ONNX Runtime的线程数，0表示由ONNX Runtime决定
+    """
+
+    def __init__(self, model: str, file_name: str = DEFAULT_ONNX_FILE, batch_size: int = 32, threads: int = 0):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=onnx 需要安装 onnxruntime 和 tokenizers: uv sync --extra onnx") from e
+
+        directory = _resolve_model_dir(model, file_name)
+        model_file = os.path.join(directory, file_name)
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"{model} 中没有 {file_name}，请先用 python -m src.onnx_encoder 导出")
+        self.batch_size = batch_size
+        self.fingerprint = _file_digest(model_file)
+
+        # 没有写 max_seq_length 时（sentence-transformers 5.x 导出的目录）与 sentence-transformers 一样使用分词器的上限
+        st_config = _read_json(directory, "sentence_bert_config.json") or {}
+        tokenizer_config = _read_json(directory, "tokenizer_config.json") or {}
+        max_length = st_config.get("max_seq_length") or min(
+            tokenizer_config.get("model_max_length", DEFAULT_MAX_SEQ_LENGTH), DEFAULT_MAX_SEQ_LENGTH)
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        special = _read_json(directory, "special_tokens_map.json") or {}
+        pad_token = special.get("pad_token", "[PAD]")
+        if isinstance(pad_token, dict):
+            pad_token = pad_token["content"]
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+
+        # 较早版本的 sentence-transformers 用 pooling_mode_*_token 布尔值，5.x 用 pooling_mode 字符串
+        pooling = _read_json(directory, "1_Pooling/config.json") or {"pooling_mode_mean_tokens": True}
+        if pooling.get("pooling_mode_cls_token") or pooling.get("pooling_mode") == "cls":
+            self.pooling = "cls"
+        elif pooling.get("pooling_mode_mean_tokens") or pooling.get("pooling_mode") == "mean":
+            self.pooling = "mean"
+        else:
+            raise ValueError(f"{model} 的池化方式不受支持: {pooling}")
+        modules = _read_json(directory, "modules.json") or []
+        self.normalize = any(m.get("type", "").endswith("Normalize") for m in modules)
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"加载ONNX编码器 {model_file}（{self.pooling} pooling, normalize={self.normalize}）")
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        if hidden.ndim == 2:
+            # 导出时已包含池化层
+            embeddings = hidden
+        elif self.pooling == "cls":
+            embeddings = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            embeddings = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        embeddings = embeddings.astype(np.float32)
+        if self.normalize:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+    def encode(self, sentences: list[str], **kwargs) -> np.ndarray:
+        """返回与 sentences 顺序一致的float32嵌入矩阵；其余参数为兼容 SentenceTransformer.encode 而忽略"""
+        if not sentences:
+            return np.empty((0, 0), dtype=np.float32)
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        batches = [self._encode_batch([sentences[i] for i in order[start:start + self.batch_size]])
+                   for start in range(0, len(sentences), self.batch_size)]
+        embeddings = np.empty((len(sentences), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        return embeddings
+
+
+def export_quantized_model(model: str, output: str, quantization: str = "avx2") -> str:
+    """把 sentence-transformers 模型导出为ONNX并做动态int8量化，返回量化模型的路径
+
+    output 中保存分词器和池化配置、原始精度的 onnx/model.onnx 和量化后的
+    onnx/model_<权重类型>_<quantization>.onnx（avx2 为 quint8，arm64 和 avx512 为 qint8）。
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    encoder = SentenceTransformer(model, backend="onnx")
+    encoder.save_pretrained(output)
+    export_dynamic_quantized_onnx_model(encoder, quantization, output)
+    return glob.glob(os.path.join(output, "onnx", f"model_*_{quantization}.onnx"))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a sentence-transformers model to int8-quantized ONNX")
+    parser.add_argument("--model", default="avsolatorio/GIST-small-Embedding-v0", help="Model name or path")
+    parser.add_argument("--output", required=True, help="Directory to save the exported model")
+    parser.add_argument("--quantization", default="avx2", choices=["arm64", "avx2", "avx512", "avx512_vnni"],
+                        help="Target instruction set of the quantized kernels")
+    args = parser.parse_args()
+    path = export_quantized_model(args.model, args.output, args.quantization)
+    print(f"saved {os.path.join(args.output, DEFAULT_ONNX_FILE)} and {path}")
+
+
+if __name__ == "__main__":
+    main()
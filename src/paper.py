@@ -1,60 +1,235 @@
 from typing import Optional
-from functools import cached_property
-from tempfile import TemporaryDirectory
+from datetime import datetime
 import arxiv
-import tarfile
 import re
 import json
 from src.llm import get_llm
+from src.prompt_budget import PromptSection, fit_sections
+from src.source_cache import get_source_cache
+from src.service_limits import service_slot
+from src.tex_source import fetch_tex
+from src.tex_cleaner import SectionIndex, strip_floats_and_cites, extract_author_region
 import requests
 from requests.adapters import HTTPAdapter, Retry
 from loguru import logger
-import tiktoken
-from contextlib import ExitStack
 from urllib3.util.retry import Retry
 
 
+_UNSET = object()
+
+# arXiv源码下载地址，{} 为带版本号的 arxiv_id
+SOURCE_URL_FORMAT = "https://arxiv.org/src/{}"
+
+# LLM提取失败时显示的TLDR
+TLDR_UNAVAILABLE = "Summary unavailable"
+
+# 提取TLDR和机构信息所用片段的token上限：(名称, 上限, 优先级)。
+# 作者区域决定机构信息，优先于引言和结论；总预算不够时，优先级低的片段先被截短
+EXCERPT_SECTIONS = (("abstract", 500, 0), ("author_information", 500, 1), ("introduction", 500, 2), ("conclusion", 250, 3))
+EXCERPT_MAX_TOKENS = 1500
+
+
+def clean_affiliations(affiliations) -> list[str]:
+    """清理LLM返回的机构列表：去掉过短的条目和明显的邮箱域名，并去重"""
+    cleaned_affiliations = []
+    if isinstance(affiliations, list):
+        for aff in affiliations:
+            if isinstance(aff, str) and len(aff.strip()) > 2:
+                cleaned_aff = aff.strip()
+                # 过滤明显的邮箱域名
+                if not cleaned_aff.endswith(('.com', '.org', '.net', '.edu')) or \
+                   any(inst in cleaned_aff.lower() for inst in ['university', 'institute', 'college']):
+                    cleaned_affiliations.append(cleaned_aff)
+    return list(dict.fromkeys(cleaned_affiliations))
+
+
+class slot_cached_property:
+    """与 functools.cached_property 相同，但把结果存放在 __slots__ 中名为 _<属性名> 的槽里
+
+    支持直接赋值，便于从缓存或论文库中恢复已计算的结果。
+    """
+    
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+    
+    def __set_name__(self, owner, name):
+        self.slot = f"_{name}"
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is _UNSET:
+            value = self.func(obj)
+            setattr(obj, self.slot, value)
+        return value
+    
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+class Author:
+    """论文作者，仅保留名字（与 arxiv.Result.Author 接口一致）"""
+    __slots__ = ('name',)
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __repr__(self):
+        return f"Author({self.name!r})"
+    
+    def __eq__(self, other):
+        return isinstance(other, Author) and self.name == other.name
+    
+    def __hash__(self):
+        return hash(self.name)
+
 
 class ArxivPaper:
-    def __init__(self,paper:arxiv.Result,keyword:str=None):
-        self._paper = paper
-        self.score = None
+    """精简的论文记录，只保存流水线用到的字段，不再持有 arxiv.Result
+
+    可以廉价地 pickle、发送到子进程，或通过 to_dict/from_dict、to_json/from_json 序列化；
+    源码等较重的内容在首次访问时才下载。
+    """
+    
+    # 可序列化的延迟计算结果（tex 及其章节索引体积较大，不参与序列化）
+    CACHED_FIELDS = ('code_url', 'llm_extracted_info', 'tldr', 'affiliations')
+    
+    __slots__ = (
+        'arxiv_id', 'version', 'title', 'summary', 'authors', 'published', 'pdf_url', 'categories',
+        'search_keyword', 'score', 'score_provisional', 'llm_reason', 'key_authors', 'author_importance',
+        'related_papers', 'failed_fields', '_code_url', '_tex', '_sections', '_llm_extracted_info', '_tldr', '_affiliations',
+    )
+    
+    def __init__(self, arxiv_id: str, title: str, summary: str, authors: list[Author], published: datetime,
+                 pdf_url: str, version: int = 1, categories: tuple[str, ...] = (), keyword: str = None):
+        self.arxiv_id = arxiv_id
+        self.version = version
+        self.title = title
+        self.summary = summary
+        self.authors = authors
+        self.published = published
+        self.pdf_url = pdf_url
+        self.categories = tuple(categories)
         self.search_keyword = keyword
+        self.score = None
+        self.score_provisional = False  # 评分不是LLM给出的最终结果（如默认评分），不保存到论文库
         self.llm_reason = None  # 存储LLM评分理由
         self.key_authors = []  # 匹配的关键作者列表
         self.author_importance = 0.0  # 作者重要性分数
+        self.related_papers = []  # 近邻评分时论文库中贡献最大的论文标题
+        self.failed_fields = set()  # 因LLM或网络失败而得到回退值的延迟属性，不保存到论文库
+        for name in self.CACHED_FIELDS + ('tex', 'sections'):
+            setattr(self, f"_{name}", _UNSET)
     
-    @property
-    def title(self) -> str:
-        return self._paper.title
+    @classmethod
+    def from_result(cls, paper: arxiv.Result, keyword: str = None) -> "ArxivPaper":
+        """从 arxiv.Result 中提取所需字段，不保留原始对象"""
+        short_id = paper.get_short_id()
+        match = re.search(r'v(\d+)$', short_id)
+        return cls(
+            arxiv_id=re.sub(r'v\d+$', '', short_id),
+            version=int(match.group(1)) if match else 1,
+            title=paper.title,
+            summary=paper.summary,
+            authors=[Author(a.name) for a in paper.authors],
+            published=paper.published,
+            pdf_url=paper.pdf_url,
+            categories=paper.categories,
+            keyword=keyword,
+        )
     
-    @property
-    def summary(self) -> str:
-        return self._paper.summary
+    def cached_value(self, name: str):
+        """返回某个延迟属性已计算出的值，尚未计算时返回None（不会触发计算）"""
+        value = getattr(self, f"_{name}")
+        return None if value is _UNSET else value
     
-    @property
-    def authors(self) -> list[str]:
-        return self._paper.authors
+    def is_cached(self, name: str) -> bool:
+        """某个延迟属性是否已经计算过（结果可能为None）"""
+        return getattr(self, f"_{name}") is not _UNSET
     
-    @property
-    def published(self):
-        return self._paper.published
+    def is_computed(self, name: str) -> bool:
+        """某个延迟属性是否已经成功计算（结果可能为None，例如查过但没有找到机构），不包括失败时的回退值"""
+        return self.is_cached(name) and name not in self.failed_fields
+    
+    def to_dict(self) -> dict:
+        data = {
+            'arxiv_id': self.arxiv_id,
+            'version': self.version,
+            'title': self.title,
+            'summary': self.summary,
+            'authors': [a.name for a in self.authors],
+            'published': self.published.isoformat(),
+            'pdf_url': self.pdf_url,
+            'categories': list(self.categories),
+            'search_keyword': self.search_keyword,
+            'score': self.score,
+            'score_provisional': self.score_provisional,
+            'llm_reason': self.llm_reason,
+            'key_authors': list(self.key_authors),
+            'author_importance': self.author_importance,
+            'related_papers': list(self.related_papers),
+            'failed_fields': sorted(self.failed_fields),
+        }
+        for name in self.CACHED_FIELDS:
+            value = getattr(self, f"_{name}")
+            if value is not _UNSET:
+                data[name] = value
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "ArxivPaper":
+        paper = cls(
+            arxiv_id=data['arxiv_id'],
+            version=data.get('version', 1),
+            title=data['title'],
+            summary=data['summary'],
+            authors=[Author(name) for name in data['authors']],
+            published=datetime.fromisoformat(data['published']),
+            pdf_url=data['pdf_url'],
+            categories=data.get('categories', ()),
+            keyword=data.get('search_keyword'),
+        )
+        paper.score = data.get('score')
+        paper.score_provisional = data.get('score_provisional', False)
+        paper.llm_reason = data.get('llm_reason')
+        paper.key_authors = data.get('key_authors', [])
+        paper.author_importance = data.get('author_importance', 0.0)
+        paper.related_papers = data.get('related_papers', [])
+        paper.failed_fields = set(data.get('failed_fields', ()))
+        for name in cls.CACHED_FIELDS:
+            if name in data:
+                setattr(paper, f"_{name}", data[name])
+        return paper
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
     
-    @cached_property
-    def arxiv_id(self) -> str:
-        return re.sub(r'v\d+$', '', self._paper.get_short_id())
+    @classmethod
+    def from_json(cls, s: str) -> "ArxivPaper":
+        return cls.from_dict(json.loads(s))
+    
+    def __getstate__(self):
+        return self.to_dict()
+    
+    def __setstate__(self, state):
+        other = self.from_dict(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
     
     @property
-    def pdf_url(self) -> str:
-        return self._paper.pdf_url
+    def source_url(self) -> str:
+        return SOURCE_URL_FORMAT.format(f"{self.arxiv_id}v{self.version}")
     
-    @cached_property
+    @slot_cached_property
     def code_url(self) -> Optional[str]:
         s = requests.Session()
         retries = Retry(total=5, backoff_factor=0.1)
         s.mount('https://', HTTPAdapter(max_retries=retries))
         try:
-            paper_list = s.get(f'https://paperswithcode.com/api/v1/papers/?arxiv_id={self.arxiv_id}').json()
+            with service_slot("paperswithcode"):
+                paper_list = s.get(f'https://paperswithcode.com/api/v1/papers/?arxiv_id={self.arxiv_id}').json()
         except Exception as e:
             logger.debug(f'Error when searching {self.arxiv_id}: {e}')
             return None
@@ -64,7 +239,8 @@ class ArxivPaper:
         paper_id = paper_list['results'][0]['id']
 
         try:
-            repo_list = s.get(f'https://paperswithcode.com/api/v1/papers/{paper_id}/repositories/').json()
+            with service_slot("paperswithcode"):
+                repo_list = s.get(f'https://paperswithcode.com/api/v1/papers/{paper_id}/repositories/').json()
         except Exception as e:
             logger.debug(f'Error when searching {self.arxiv_id}: {e}')
             return None
@@ -72,90 +248,68 @@ class ArxivPaper:
             return None
         return repo_list['results'][0]['url']
     
-    @cached_property
+    @property
+    def source_key(self) -> str:
+        """源码缓存的键：arxiv_id加版本号"""
+        return f"{self.arxiv_id.replace('/', '_')}v{self.version}"
+    
+    @slot_cached_property
     def tex(self) -> dict[str,str]:
+        # 先查本地缓存，命中时既不下载也不重新解析
+        cache = get_source_cache()
+        if cache is not None:
+            hit, file_contents = cache.get_tex(self.source_key)
+            if hit:
+                logger.debug(f"Tex cache hit for {self.source_key}")
+                return file_contents
+        
         try:
-            with ExitStack() as stack:
-                tmpdirname = stack.enter_context(TemporaryDirectory())
-                file = self._paper.download_source(dirpath=tmpdirname)
-                try:
-                    tar = stack.enter_context(tarfile.open(file))
-                except tarfile.ReadError:
-                    logger.debug(f"Failed to find main tex file of {self.arxiv_id}: Not a tar file.")
-                    return None
-     
-                tex_files = [f for f in tar.getnames() if f.endswith('.tex')]
-                if len(tex_files) == 0:
-                    logger.debug(f"Failed to find main tex file of {self.arxiv_id}: No tex file.")
-                    return None
-                
-                bbl_file = [f for f in tar.getnames() if f.endswith('.bbl')]
-                match len(bbl_file) :
-                    case 0:
-                        if len(tex_files) > 1:
-                            logger.debug(f"Cannot find main tex file of {self.arxiv_id} from bbl: There are multiple tex files while no bbl file.")
-                            main_tex = None
-                        else:
-                            main_tex = tex_files[0]
-                    case 1:
-                        main_name = bbl_file[0].replace('.bbl','')
-                        main_tex = f"{main_name}.tex"
-                        if main_tex not in tex_files:
-                            logger.debug(f"Cannot find main tex file of {self.arxiv_id} from bbl: The bbl file does not match any tex file.")
-                            main_tex = None
-                    case _:
-                        logger.debug(f"Cannot find main tex file of {self.arxiv_id} from bbl: There are multiple bbl files.")
-                        main_tex = None
-                if main_tex is None:
-                    logger.debug(f"Trying to choose tex file containing the document block as main tex file of {self.arxiv_id}")
-                #read all tex files
-                file_contents = {}
-                for t in tex_files:
-                    f = tar.extractfile(t)
-                    content = f.read().decode('utf-8',errors='ignore')
-                    #remove comments
-                    content = re.sub(r'%.*\n', '\n', content)
-                    content = re.sub(r'\\begin{comment}.*?\\end{comment}', '', content, flags=re.DOTALL)
-                    content = re.sub(r'\\iffalse.*?\\fi', '', content, flags=re.DOTALL)
-                    #remove redundant \n
-                    content = re.sub(r'\n+', '\n', content)
-                    content = re.sub(r'\\\\', '', content)
-                    #remove consecutive spaces
-                    content = re.sub(r'[ \t\r\f]{3,}', ' ', content)
-                    if main_tex is None and re.search(r'\\begin\{document\}', content):
-                        main_tex = t
-                        logger.debug(f"Choose {t} as main tex file of {self.arxiv_id}")
-                    file_contents[t] = content
-                
-                if main_tex is not None:
-                    main_source:str = file_contents[main_tex]
-                    #find and replace all included sub-files
-                    include_files = re.findall(r'\\input\{(.+?)\}', main_source) + re.findall(r'\\include\{(.+?)\}', main_source)
-                    for f in include_files:
-                        if not f.endswith('.tex'):
-                            file_name = f + '.tex'
-                        else:
-                            file_name = f
-                        main_source = main_source.replace(f'\\input{{{f}}}', file_contents.get(file_name, ''))
-                    file_contents["all"] = main_source
-                else:
-                    logger.debug(f"Failed to find main tex file of {self.arxiv_id}: No tex file containing the document block.")
-                    file_contents["all"] = None
-            return file_contents
+            with service_slot("arxiv"):
+                file_contents = fetch_tex(self.source_url, self.arxiv_id)
         except Exception as e:
+            # 网络等临时错误不写入缓存，下次仍会重试
             logger.warning(f"Failed to download or parse tex file for {self.arxiv_id}: {e}")
             return None
+        
+        if cache is not None:
+            cache.put_tex(self.source_key, file_contents)
+        return file_contents
+    
+    def _tex_content(self) -> Optional[str]:
+        """展开引用后的主tex，找不到主文件时拼接所有tex文件"""
+        if self.tex is None:
+            return None
+        content = self.tex.get("all")
+        if content is None:
+            content = "\n".join(v for k, v in self.tex.items() if k != "all")
+        return content
     
-    @cached_property
+    @slot_cached_property
+    def sections(self) -> Optional[SectionIndex]:
+        """去掉引用和图表后的tex章节索引，只解析一次，没有tex时为None"""
+        content = self._tex_content()
+        if content is None:
+            return None
+        return SectionIndex(strip_floats_and_cites(content))
+    
+    @slot_cached_property
     def tldr(self) -> str:
         """获取论文的TLDR摘要，通过合并的LLM调用获取"""
-        return self.llm_extracted_info.get("tldr", "Summary unavailable")
+        info = self.llm_extracted_info
+        if info.get("failed"):
+            self.failed_fields.add("tldr")
+        return info.get("tldr", TLDR_UNAVAILABLE)
 
-    @cached_property
+    @slot_cached_property
     def affiliations(self) -> Optional[list[str]]:
-        """获取论文的机构信息，通过合并的LLM调用获取，并在失败时回退到Semantic Scholar"""
+        """获取论文的机构信息，通过合并的LLM调用获取，并在失败时回退到Semantic Scholar
+
+        两种方法都查过但没有找到时为None；LLM调用失败且Semantic Scholar没有结果，
+        或Semantic Scholar请求出错时同样为None，但记入 failed_fields，下次运行重新获取。
+        """
         # 首选方法：从 .tex 文件解析
-        affs = self.llm_extracted_info.get("affiliations", [])
+        info = self.llm_extracted_info
+        affs = info.get("affiliations", [])
         
         if affs:
             return affs
@@ -163,12 +317,15 @@ class ArxivPaper:
         # 备用方法：如果首选方法失败，则从 Semantic Scholar 获取
         logger.debug(f"首选方法提取机构信息失败 for {self.arxiv_id}，尝试从 Semantic Scholar 获取。")
         affs_fallback = self._fetch_affiliations_from_semantic_scholar()
+        if affs_fallback is None or (not affs_fallback and info.get("failed")):
+            self.failed_fields.add("affiliations")
         
         return affs_fallback if affs_fallback else None
 
-    def _fetch_affiliations_from_semantic_scholar(self) -> list[str]:
+    def _fetch_affiliations_from_semantic_scholar(self) -> Optional[list[str]]:
         """
         备用方法：从 Semantic Scholar API 获取作者机构信息。
+        没有找到时返回空列表，请求或解析出错时返回None。
         """
         api_url = f"https://api.semanticscholar.org/graph/v1/paper/arXiv:{self.arxiv_id}?fields=authors.affiliations"
         try:
@@ -177,7 +334,8 @@ class ArxivPaper:
             retries = Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
             s.mount('https://', HTTPAdapter(max_retries=retries))
             
-            response = s.get(api_url, timeout=15)
+            with service_slot("semantic_scholar"):
+                response = s.get(api_url, timeout=15)
             response.raise_for_status()  # 如果请求失败 (4xx or 5xx), 则抛出异常
             
             data = response.json()
@@ -206,29 +364,45 @@ class ArxivPaper:
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 logger.info(f"在 Semantic Scholar 上未找到论文 {self.arxiv_id}。")
-            else:
-                logger.warning(f"从 Semantic Scholar 获取信息时出现HTTP错误 for {self.arxiv_id}: {e}")
-            return []
+                return []
+            logger.warning(f"从 Semantic Scholar 获取信息时出现HTTP错误 for {self.arxiv_id}: {e}")
+            return None
         except Exception as e:
             logger.warning(f"获取或解析 Semantic Scholar 数据时出错 for {self.arxiv_id}: {e}")
-            return []
+            return None
 
-    @cached_property
+    def extraction_excerpt(self) -> dict:
+        """提取TLDR和机构信息所用的论文片段：标题、摘要，有tex时另有引言、结论（用于TLDR）和作者区域（用于机构信息）
+
+        各片段按 EXCERPT_SECTIONS 的上限和优先级分配 EXCERPT_MAX_TOKENS 个token，在token边界截断；空的片段不出现在结果中。
+        """
+        texts = {"abstract": self.summary}
+        if self.tex is not None:
+            texts["introduction"] = self.sections.text_of("Introduction")
+            texts["conclusion"] = self.sections.text_of("Conclusion")
+            texts["author_information"] = extract_author_region(self._tex_content()) or ""
+        sections = [PromptSection(name, texts.get(name, ""), max_tokens, priority)
+                    for name, max_tokens, priority in EXCERPT_SECTIONS]
+        return {"title": self.title, **fit_sections(sections, EXCERPT_MAX_TOKENS)}
+    
+    @slot_cached_property
     def llm_extracted_info(self) -> dict:
         """
         使用一次LLM调用同时提取TLDR和机构信息，提高效率
         Returns: {"tldr": str, "affiliations": list[str]}
         """
+        # 各片段已按token预算截断，说明和返回格式部分完整保留
+        excerpt = self.extraction_excerpt()
+        llm = get_llm()
         if self.tex is None:
             logger.debug(f"无tex内容 for {self.arxiv_id}, 仅使用摘要生成TLDR")
             # 如果没有tex文件，只生成基于摘要的TLDR
-            llm = get_llm()
             prompt = f"""Based on this paper's title and abstract, provide:
 1. A one-sentence TLDR summary in {llm.lang}
 2. Extract affiliations (return empty list if not available)
 
 Title: {self.title}
-Abstract: {self.summary}
+Abstract: {excerpt.get("abstract", "")}
 
 Please respond in JSON format:
 {{
@@ -247,51 +421,25 @@ Please respond in JSON format:
                 if json_match:
                     result = json.loads(json_match.group(0))
                     return {
-                        "tldr": result.get("tldr", "Summary unavailable"),
+                        "tldr": result.get("tldr", TLDR_UNAVAILABLE),
                         "affiliations": result.get("affiliations", [])
                     }
             except Exception as e:
                 logger.warning(f"LLM合并调用失败 for {self.arxiv_id}: {e}")
             
-            return {"tldr": "Summary unavailable", "affiliations": []}
-        
-        # 有tex文件的情况，提取详细信息
-        content = self.tex.get("all")
-        if content is None:
-            content = "\n".join(self.tex.values())
+            return {"tldr": TLDR_UNAVAILABLE, "affiliations": [], "failed": True}
         
-        # 提取introduction和conclusion（用于TLDR）
-        introduction = ""
-        conclusion = ""
-        # 清理content
-        clean_content = re.sub(r'~?\\cite.?\{.*?\}', '', content)
-        clean_content = re.sub(r'\\begin\{figure\}.*?\\end\{figure\}', '', clean_content, flags=re.DOTALL)
-        clean_content = re.sub(r'\\begin\{table\}.*?\\end\{table\}', '', clean_content, flags=re.DOTALL)
-        
-        # 查找introduction和conclusion
-        intro_match = re.search(r'\\section\{Introduction\}.*?(\\section|\\end\{document\}|\\bibliography|\\appendix|$)', clean_content, flags=re.DOTALL)
-        if intro_match:
-            introduction = intro_match.group(0)
-        
-        concl_match = re.search(r'\\section\{Conclusion\}.*?(\\section|\\end\{document\}|\\bibliography|\\appendix|$)', clean_content, flags=re.DOTALL)
-        if concl_match:
-            conclusion = concl_match.group(0)
-        
-        # 提取作者信息区域（用于机构信息）
-        author_info = self._extract_author_region(content)
-        
-        # 构建合并的prompt
-        llm = get_llm()
+        # 有tex文件的情况，提取详细信息，构建合并的prompt
         prompt = f"""Analyze this academic paper and provide both a summary and author affiliations.
 
 Paper Information:
 Title: {self.title}
-Abstract: {self.summary}
-Introduction: {introduction[:2000]}
-Conclusion: {conclusion[:1000]}
+Abstract: {excerpt.get("abstract", "")}
+Introduction: {excerpt.get("introduction", "")}
+Conclusion: {excerpt.get("conclusion", "")}
 
 Author Information Section:
-{author_info[:2000] if author_info else "Not available"}
+{excerpt.get("author_information", "Not available")}
 
 Please provide:
 1. A one-sentence TLDR summary in {llm.lang}
@@ -310,18 +458,6 @@ For affiliations:
 - Return empty list if no clear affiliations found
 - Remove duplicates"""
 
-        # 使用token限制
-        import tiktoken
-        try:
-            enc = tiktoken.encoding_for_model("gpt-4o")
-            prompt_tokens = enc.encode(prompt)
-            if len(prompt_tokens) > 4000:
-                prompt_tokens = prompt_tokens[:4000]
-                prompt = enc.decode(prompt_tokens)
-        except:
-            # 如果tiktoken失败，简单截断
-            prompt = prompt[:8000]
-        
         try:
             response = llm.generate([
                 {"role": "system", "content": "You are an expert at analyzing academic papers. You can summarize papers concisely and extract institutional affiliations accurately. Always respond in valid JSON format."},
@@ -332,80 +468,21 @@ For affiliations:
             json_match = re.search(r'\{.*\}', response, flags=re.DOTALL)
             if json_match:
                 result = json.loads(json_match.group(0))
-                affiliations = result.get("affiliations", [])
-                
                 # 清理和验证机构信息
-                cleaned_affiliations = []
-                if isinstance(affiliations, list):
-                    for aff in affiliations:
-                        if isinstance(aff, str) and len(aff.strip()) > 2:
-                            cleaned_aff = aff.strip()
-                            # 过滤明显的邮箱域名
-                            if not cleaned_aff.endswith(('.com', '.org', '.net', '.edu')) or \
-                               any(inst in cleaned_aff.lower() for inst in ['university', 'institute', 'college']):
-                                cleaned_affiliations.append(cleaned_aff)
-                
-                # 去重
-                unique_affiliations = list(dict.fromkeys(cleaned_affiliations))
+                unique_affiliations = clean_affiliations(result.get("affiliations", []))
                 
                 logger.debug(f"LLM合并提取成功 for {self.arxiv_id}: TLDR={result.get('tldr', '')[:50]}..., 机构={unique_affiliations}")
                 
                 return {
-                    "tldr": result.get("tldr", "Summary unavailable"),
+                    "tldr": result.get("tldr", TLDR_UNAVAILABLE),
                     "affiliations": unique_affiliations
                 }
                 
         except Exception as e:
             logger.warning(f"LLM合并调用失败 for {self.arxiv_id}: {e}")
         
-        return {"tldr": "Summary unavailable", "affiliations": []}
+        return {"tldr": TLDR_UNAVAILABLE, "affiliations": [], "failed": True}
     
-    def _extract_author_region(self, content: str) -> str:
-        """提取作者信息区域的辅助方法"""
-        possible_regions = [
-            r'\\author.*?\\maketitle',
-            r'\\begin{document}.*?\\begin{abstract}', 
-            r'\\title.*?(?=\\section|\\begin{abstract})',
-            r'\\author.*?\\date',
-            r'\\title.*?\\author.*?(?=\\section|\\begin{abstract}|\\maketitle)',
-            r'\\author.*?(?=\\section)',
-            r'\\footnote.*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
-            r'\\footnotetext.*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
-            r'.*?(?:are with|is with|affiliated with).*?(?=\\section|\\begin{abstract}|\\maketitle|$)',
-            r'(?:^|\\title).*?(?:university|institute|college|lab|department|shanghai|beijing|tsinghua|stanford|mit|google|microsoft|openai|deepmind).*?(?=\\section|\\begin{abstract})',
-            r'^.{0,3000}',
-            r'.*?@.*?\..*?(?=\\section|\\begin{abstract})',
-            r'.*?(?:university|institute|college|lab|department).*?(?=\\section|\\begin{abstract})',
-            r'.*?(?:footnote|thanks).*?(?:university|institute|college|department).*?(?=\\section|\\begin{abstract}|$)',
-        ]
-        
-        affiliation_keywords = [
-            'university', 'institute', 'college', 'lab', 'department', 'school', 'center', 'centre', 
-            'academy', '@', 'tech', 'polytechnic', 'are with', 'is with', 'affiliated with', 
-            'research', 'laboratory', 'faculty', 'division', 'shanghai', 'beijing', 'china', 
-            'tsinghua', 'stanford', 'mit', 'google', 'microsoft', 'openai', 'deepmind'
-        ]
-        
-        for pattern in possible_regions:
-            try:
-                match = re.search(pattern, content, flags=re.DOTALL | re.IGNORECASE)
-                if match:
-                    candidate_region = match.group(0)
-                    if any(keyword in candidate_region.lower() for keyword in affiliation_keywords):
-                        # 清理文本
-                        clean_region = re.sub(r'\\(?:section|subsection|subsubsection)\{.*?\}', ' ', candidate_region)
-                        clean_region = re.sub(r'\\(?:cite|ref|label)\{.*?\}', ' ', clean_region)
-                        clean_region = re.sub(r'\\(?:textbf|textit|emph)\{(.*?)\}', r'\1', clean_region)
-                        clean_region = re.sub(r'\\[a-zA-Z]+\*?(\[.*?\])?\{([^{}]*)\}', r'\2', clean_region)
-                        clean_region = re.sub(r'\{|\}', ' ', clean_region)
-                        clean_region = re.sub(r'\\\\|\n+', ' ', clean_region)
-                        clean_region = re.sub(r'\s+', ' ', clean_region).strip()
-                        return clean_region
-            except Exception:
-                continue
-        
-        return ""
-
     def __hash__(self):
         """基于arxiv_id生成哈希值，使对象可用于set"""
         return hash(self.arxiv_id)
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from loguru import logger
+import src.arxiv_client as arxiv_client
+from src.paper import TLDR_UNAVAILABLE, ArxivPaper
+
+
+class PaperStore:
+    """基于SQLite的本地论文库
+
+    以 arxiv_id 为主键记录每篇论文的元数据、版本、评分、TLDR、机构信息和发送状态，
+    并保存上一次成功运行的时间水位，用于增量获取“上次运行以来的新论文”。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS papers (
+        arxiv_id TEXT PRIMARY KEY,
+        version INTEGER,
+        title TEXT,
+        summary TEXT,
+        authors TEXT,
+        published TEXT,
+        pdf_url TEXT,
+        search_keyword TEXT,
+        score REAL,
+        llm_reason TEXT,
+        tldr TEXT,
+        affiliations TEXT,
+        sent INTEGER NOT NULL DEFAULT 0,
+        first_seen TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, db_path: str = "data/paper_store.db"):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+        count = self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        logger.info(f"论文库 {db_path}: 已记录 {count} 篇论文，上次成功运行: {self.get_watermark()}")
+
+    def close(self):
+        self.conn.close()
+
+    def backup(self, path: str):
+        """把当前内容完整复制到 path（SQLite在线备份），用于在HTTP录像中保存录制前的论文库状态"""
+        target = sqlite3.connect(path)
+        try:
+            self.conn.backup(target)
+        finally:
+            target.close()
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "PaperStore":
+        """在内存中打开 path 的副本，之后的写入不会落盘；path 不存在时返回空的论文库"""
+        store = cls(":memory:")
+        if os.path.exists(path):
+            source = sqlite3.connect(path)
+            try:
+                source.backup(store.conn)
+            finally:
+                source.close()
+            logger.info(f"从 {path} 载入论文库快照，上次成功运行: {store.get_watermark()}")
+        return store
+
+    def get_watermark(self) -> datetime | None:
+        """上一次成功运行的时间（UTC），从未成功运行过则返回None"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return datetime.fromisoformat(row["value"]) if row else None
+
+    def set_watermark(self, when: datetime):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('watermark', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (when.isoformat(),)
+        )
+        self.conn.commit()
+
+    def fetch_window_days(self, default_days: float = 2, max_days: float = 7) -> float:
+        """根据水位计算需要获取的天数
+
+        每天运行时保持默认窗口；若中间漏跑了几天，则把窗口向前扩展到上次成功运行的时间，
+        最多扩展到 max_days 天。
+        """
+        watermark = self.get_watermark()
+        if watermark is None:
+            return default_days
+        # 经由 arxiv_client.utcnow 取当前时间，回放HTTP录像时与录制时的日期窗口一致
+        elapsed = (arxiv_client.utcnow() - watermark).total_seconds() / 86400
+        return max(default_days, min(elapsed, max_days))
+
+    def filter_unsent(self, papers: list[ArxivPaper]) -> list[ArxivPaper]:
+        """去掉已经发送过的论文"""
+        sent_ids = self._select_ids("SELECT arxiv_id FROM papers WHERE sent = 1 AND arxiv_id IN ({})", papers)
+        new_papers = [p for p in papers if p.arxiv_id not in sent_ids]
+        logger.info(f"论文库过滤已发送论文: {len(papers)} -> {len(new_papers)}")
+        return new_papers
+
+    def restore(self, papers: list[ArxivPaper]) -> int:
+        """把之前运行中已算出的评分、理由、TLDR和机构信息恢复到论文对象上
+
+        已恢复评分的论文在重排序时会跳过打分，已恢复TLDR/机构信息的论文在渲染时不再调用LLM。
+
+        Returns:
+            恢复了评分的论文数
+        """
+        rows = self._select_rows("SELECT * FROM papers WHERE arxiv_id IN ({})", papers)
+        restored = 0
+        for p in papers:
+            row = rows.get(p.arxiv_id)
+            if row is None:
+                continue
+            if row["score"] is not None:
+                p.score = row["score"]
+                p.llm_reason = row["llm_reason"]
+                restored += 1
+            # tldr/affiliations 是可赋值的延迟属性，直接赋值即可跳过计算；
+            # 旧版本保存过LLM失败时的占位TLDR，这类记录不恢复
+            if row["tldr"] is not None and row["tldr"] != TLDR_UNAVAILABLE:
+                p.tldr = row["tldr"]
+            # 已计算但没有找到机构时保存为JSON的null，同样恢复，不再重复LLM提取和Semantic Scholar查询
+            if row["affiliations"] is not None:
+                p.affiliations = json.loads(row["affiliations"])
+        logger.info(f"从论文库恢复了 {restored} 篇论文的评分")
+        return restored
+
+    def save(self, papers: list[ArxivPaper]):
+        """写入或更新论文的元数据和已计算出的结果，不会触发任何尚未计算的属性
+
+        只保存最终结果：暂定的评分（如LLM没有给出有效评分时的默认评分）和因LLM或网络失败得到的
+        TLDR/机构信息回退值保存为NULL，下次运行时重新计算。
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for p in papers:
+            final_score = p.score is not None and not p.score_provisional
+            tldr = p.cached_value("tldr") if p.is_computed("tldr") else None
+            affiliations = (json.dumps(p.cached_value("affiliations"), ensure_ascii=False)
+                            if p.is_computed("affiliations") else None)
+            rows.append((
+                p.arxiv_id, p.version, p.title, p.summary,
+                json.dumps([a.name for a in p.authors], ensure_ascii=False),
+                p.published.isoformat(), p.pdf_url, p.search_keyword,
+                p.score if final_score else None, p.llm_reason if final_score else None, tldr,
+                affiliations,
+                now, now
+            ))
+        self.conn.executemany("""
+            INSERT INTO papers (arxiv_id, version, title, summary, authors, published, pdf_url,
+                                search_keyword, score, llm_reason, tldr, affiliations, first_seen, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(arxiv_id) DO UPDATE SET
+                version = excluded.version,
+                title = excluded.title,
+                summary = excluded.summary,
+                authors = excluded.authors,
+                published = excluded.published,
+                pdf_url = excluded.pdf_url,
+                search_keyword = COALESCE(excluded.search_keyword, papers.search_keyword),
+                score = COALESCE(excluded.score, papers.score),
+                llm_reason = COALESCE(excluded.llm_reason, papers.llm_reason),
+                tldr = COALESCE(excluded.tldr, papers.tldr),
+                affiliations = COALESCE(excluded.affiliations, papers.affiliations),
+                updated_at = excluded.updated_at
+        """, rows)
+        self.conn.commit()
+
+    def mark_sent(self, papers: list[ArxivPaper]):
+        self.conn.executemany("UPDATE papers SET sent = 1 WHERE arxiv_id = ?", [(p.arxiv_id,) for p in papers])
+        self.conn.commit()
+
+    def _select_rows(self, sql: str, papers: list[ArxivPaper]) -> dict[str, sqlite3.Row]:
+        rows = {}
+        ids = [p.arxiv_id for p in papers]
+        # SQLite对单条语句的参数数量有限制，分块查询
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            for row in self.conn.execute(sql.format(",".join("?" * len(chunk))), chunk):
+                rows[row["arxiv_id"]] = row
+        return rows
+
+    def _select_ids(self, sql: str, papers: list[ArxivPaper]) -> set[str]:
+        return set(self._select_rows(sql, papers))
@@ -0,0 +1,31 @@
+from typing import NamedTuple
+from src.llm import token_length, truncate_to_tokens
+
+
+class PromptSection(NamedTuple):
+    """prompt中可以截断的一节内容（说明和返回格式等固定部分不属于任何一节，永远完整保留）
+
+    priority 越小越先分配预算。
+    """
+    name: str
+    text: str
+    max_tokens: int
+    priority: int = 0
+
+
+def fit_sections(sections: list[PromptSection], budget: int) -> dict[str, str]:
+    """按优先级把 budget 个token分配给各节，返回 {节名: 截断后的文本}
+
+    每节最多占用 max_tokens 和剩余预算中较小的一个，短于上限的节按实际长度计，剩下的预算留给后面的节；
+    预算用完后的节和空的节不出现在结果中。结果按传入顺序排列。
+    """
+    fitted = {}
+    remaining = budget
+    for section in sorted(sections, key=lambda s: s.priority):
+        if not section.text or remaining <= 0:
+            continue
+        text = truncate_to_tokens(section.text, min(section.max_tokens, remaining))
+        if text:
+            fitted[section.name] = text
+            remaining -= token_length(text)
+    return {s.name: fitted[s.name] for s in sections if s.name in fitted}
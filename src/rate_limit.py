@@ -0,0 +1,204 @@
+import asyncio
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+from loguru import logger
+
+# 收到429时有效RPM乘以该系数
+RATE_DECREASE_FACTOR = 0.5
+# 连续成功这么多次后，有效RPM增加配置上限的10%（至少1）
+RATE_RECOVERY_SUCCESSES = 10
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class TokenBucket:
+    """异步令牌桶：容量为每分钟的额度，按每秒额度的1/60匀速补充
+
+    额度小于等于0表示不限制；单次申请超过容量时按容量计，避免永远等不到。
+    只能在一个事件循环中使用。
+    """
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.capacity = float(per_minute or 0)
+        self.rate = self.capacity / 60
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """等待直到额度足够并扣除，返回等待的秒数；排队的请求按先来后到依次获得额度"""
+        if self.capacity <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        start = self._clock()
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+        return self._clock() - start
+
+    def ready_in(self, amount: float = 1) -> float:
+        """不考虑排队的请求，额度足够 amount 还需等待的秒数"""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, min(amount, self.capacity) - self.tokens) / self.rate
+
+    def settle(self, delta: float):
+        """按实际用量修正预扣的额度：delta 大于0时补扣（额度可以为负，后续请求会等更久），小于0时返还"""
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+    def set_rate(self, per_minute: float):
+        """调整每分钟额度，已积累的额度不超过新的容量"""
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.tokens = min(self.tokens, self.capacity)
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """解析 OpenAI 的 x-ratelimit-reset-* 头（如 "1s"、"6m0s"、"20ms"）或纯数字秒数"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """从响应头中读取服务端要求的等待秒数：retry-after-ms、Retry-After（秒数或HTTP日期）、
+    或请求额度耗尽时的 x-ratelimit-reset-requests；都没有时返回None"""
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        seconds = parse_duration(value)
+        if seconds is None:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return max(0.0, seconds)
+    if headers.get("x-ratelimit-remaining-requests") == "0":
+        reset = headers.get("x-ratelimit-reset-requests")
+        if reset:
+            return parse_duration(reset)
+    return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """第 attempt 次（从0开始）失败后的指数退避时间，一半固定一半随机抖动，避免并发请求同时重试"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AdaptiveRateLimiter:
+    """按每分钟请求数和token数限流，并根据服务端的限流信号调整有效RPM
+
+    - 收到429时，有效RPM乘以 RATE_DECREASE_FACTOR（不低于 min_requests_per_minute），
+      并让所有请求暂停到 Retry-After 指定的时间之后；因429而暂停期间收到的其他429不再降速
+    - 连续成功 RATE_RECOVERY_SUCCESSES 次后，有效RPM逐步回升，最多回到配置的上限
+    - 成功响应的头表明请求额度已用完（x-ratelimit-remaining-requests 为0）时，暂停到额度重置
+    未配置RPM上限（小于等于0）时不调整速率，只遵守服务端要求的暂停。
+    """
+
+    def __init__(self, max_requests_per_minute: float = 0, max_tokens_per_minute: float = 0,
+                 adaptive: bool = True, min_requests_per_minute: float = 1, clock=time.monotonic):
+        self.max_requests_per_minute = float(max_requests_per_minute or 0)
+        self.min_requests_per_minute = min(float(min_requests_per_minute), self.max_requests_per_minute or float("inf"))
+        self.effective_rpm = self.max_requests_per_minute
+        self.adaptive = adaptive
+        self.request_bucket = TokenBucket(max_requests_per_minute, clock)
+        self.token_bucket = TokenBucket(max_tokens_per_minute, clock)
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self._clock = clock
+        self._resume_at = 0.0
+        # 在此之前收到的429属于上一次已经降过速的限流
+        self._slowed_until = 0.0
+        self._successes = 0
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """等待暂停结束以及请求数、token数额度，返回等待的秒数"""
+        start = self._clock()
+        while self._resume_at > self._clock():
+            await asyncio.sleep(self._resume_at - self._clock())
+        await self.request_bucket.acquire()
+        await self.token_bucket.acquire(estimated_tokens)
+        waited = self._clock() - start
+        self.throttled_seconds += waited
+        return waited
+
+    def ready_in(self, estimated_tokens: int = 0) -> float:
+        """估计现在申请还需等待的秒数，用于在多个端点之间选择"""
+        return max(self._resume_at - self._clock(), self.request_bucket.ready_in(),
+                   self.token_bucket.ready_in(estimated_tokens))
+
+    def settle(self, delta_tokens: float):
+        self.token_bucket.settle(delta_tokens)
+
+    def pause(self, seconds: float):
+        """在 seconds 秒内不再发出新请求"""
+        self._resume_at = max(self._resume_at, self._clock() + seconds)
+
+    def _set_effective_rpm(self, rpm: float):
+        self.effective_rpm = rpm
+        self.request_bucket.set_rate(rpm)
+
+    def on_success(self, headers: Mapping[str, str] = None):
+        if headers and headers.get("x-ratelimit-remaining-requests") == "0":
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests") or "")
+            if reset:
+                self.pause(reset)
+        if not self.adaptive or self.effective_rpm >= self.max_requests_per_minute:
+            return
+        self._successes += 1
+        if self._successes >= RATE_RECOVERY_SUCCESSES:
+            self._successes = 0
+            step = max(1.0, self.max_requests_per_minute * 0.1)
+            self._set_effective_rpm(min(self.max_requests_per_minute, self.effective_rpm + step))
+            logger.info(f"有效RPM回升到 {self.effective_rpm:.1f}")
+
+    def on_rate_limited(self, headers: Mapping[str, str] = None, fallback_delay: float = 0.0) -> float:
+        """记录一次429，返回重试前应等待的秒数（服务端未指定时使用 fallback_delay）"""
+        self.rate_limited += 1
+        self._successes = 0
+        delay = retry_after(headers)
+        if delay is None:
+            delay = fallback_delay
+        # 同一次限流中并发请求先后收到的429只降速一次；成功响应表明额度用完而主动暂停时收到的429仍然降速
+        now = self._clock()
+        self.pause(delay)
+        if self.adaptive and now >= self._slowed_until and self.effective_rpm > self.min_requests_per_minute:
+            self._set_effective_rpm(max(self.min_requests_per_minute, self.effective_rpm * RATE_DECREASE_FACTOR))
+            self._slowed_until = self._resume_at
+            logger.info(f"收到限流响应，有效RPM降为 {self.effective_rpm:.1f}，暂停 {delay:.1f} 秒")
+        return delay
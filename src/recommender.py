@@ -1,17 +1,24 @@
 import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
 from src.paper import ArxivPaper
 from datetime import datetime
 from loguru import logger
 from tqdm import tqdm
-from src.llm import get_llm
+from src.ann_index import IVFIndex
+from src.embedding_cache import get_embedding_cache, item_key
+from src.onnx_encoder import DEFAULT_ONNX_FILE
+from src.similarity import DEFAULT_MEMORY_LIMIT_MB, calibrate_scores, decay_weighted_similarity
+from src.llm import get_llm, extract_json, token_length, truncate_to_tokens
 import json
+import math
 import os
 from typing import Dict, List, Set, Tuple
 from collections import defaultdict
+from functools import lru_cache
 import re
 
+# 近邻评分时邮件中列出的论文库论文数
+RELATED_PAPERS_SHOWN = 3
+
 class AuthorBasedRecommender:
     def __init__(self, author_data_file: str = "author_data.json"):
         """初始化基于作者的推荐器"""
@@ -93,6 +100,82 @@ def is_paper_from_key_author(paper: ArxivPaper, author_recommender: AuthorBasedR
     
     return False, []
 
+def _scoring_prefix(research_interests: list[str], corpus_info: list[dict]) -> str:
+    """评分prompt中所有批次共享的部分：说明、研究兴趣、历史论文和返回格式
+
+    候选论文放在prompt最后，使每个批次的请求都以逐字节相同的前缀开头，
+    API服务端的前缀缓存（prompt caching）和本地模型的KV缓存都能复用这一部分。
+    """
+    return f"""
+你是一位AI研究领域的专家。请根据用户的研究兴趣和历史阅读偏好，和候选论文的学术贡献，为候选论文打分。
+
+用户的主要研究兴趣包括：{', '.join(research_interests)}
+
+用户最近阅读的论文示例：
+{json.dumps(corpus_info, ensure_ascii=False, indent=2)}
+
+评分标准：
+- 9-10分：与用户核心研究兴趣高度相关，且论文学术贡献高，具有重要学术价值
+- 7-8分：与用户研究兴趣相关，且论文学术贡献较高，值得关注
+- 5-6分：部分相关，可能有一定参考价值，或论文学术贡献一般
+- 3-4分：相关性较低，但在相关领域，或论文学术贡献较低
+- 0-2分：基本不相关，或论文学术贡献很低
+
+请以JSON格式返回评分结果，格式如下：
+{{
+  "scores": [
+    {{"id": 1, "score": 8.5, "reason": "简短评分理由"}},
+    {{"id": 2, "score": 6.0, "reason": "简短评分理由"}},
+    ...
+  ]
+}}
+
+请确保返回的JSON格式正确，并为每篇论文提供合理的评分和简短理由。
+"""
+
+def _scoring_messages(prefix: str, batch: list[ArxivPaper], abstract_max_tokens: int) -> list[dict]:
+    """构建一批候选论文的评分请求，候选论文的id为其在批次中的序号（从1开始）"""
+    # 构建批次候选论文信息
+    candidate_info = []
+    for j, paper in enumerate(batch):
+        candidate_info.append({
+            "id": j + 1,
+            "title": paper.title,
+            "abstract": truncate_to_tokens(paper.summary, abstract_max_tokens)
+        })
+    
+    prompt = f"""{prefix}
+请为以下候选论文打分（1-10分，10分最相关）：
+{json.dumps(candidate_info, ensure_ascii=False, indent=2)}
+"""
+    return [
+        {"role": "system", "content": "你是一位专业的AI研究领域专家，擅长评估学术论文的相关性和重要性。"},
+        {"role": "user", "content": prompt}
+    ]
+
+def _parse_scores(response: str, batch_size: int, max_score: float) -> dict[int, tuple[float, str]]:
+    """逐条校验评分结果，返回 {批次内下标: (评分, 理由)}；id越界、重复或评分不在 [0, max_score] 内的条目被丢弃"""
+    try:
+        result = extract_json(response)
+    except ValueError as e:
+        logger.warning(f"解析LLM响应失败: {e}")
+        return {}
+    items = result.get("scores", []) if isinstance(result, dict) else result
+    scores = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item["id"]) - 1
+            score = float(item["score"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= index < batch_size or index in scores or not 0 <= score <= max_score:
+            continue
+        reason = item.get("reason", "")
+        scores[index] = (score, reason if isinstance(reason, str) else "")
+    return scores
+
 def llm_based_rerank_paper(candidate: list[ArxivPaper], corpus: list[dict], 
                            config: dict = None) -> list[ArxivPaper]:
     """
@@ -114,7 +197,10 @@ def llm_based_rerank_paper(candidate: list[ArxivPaper], corpus: list[dict],
     candidate_batch_size = config.get('candidate_batch_size', 8)
     keyword_bonus = config.get('keyword_bonus', 2.0)
     default_score = config.get('default_score', 5.0)
-    abstract_max_length = config.get('abstract_max_length', 500)
+    abstract_max_tokens = config.get('abstract_max_tokens', 150)
+    corpus_max_tokens = config.get('corpus_max_tokens', 3000)
+    max_score_limit = config.get('max_score_limit', 10.0)
+    score_repair_rounds = config.get('score_repair_rounds', 2)
     
     # 处理研究兴趣参数
     if isinstance(research_interests, str):
@@ -127,107 +213,70 @@ def llm_based_rerank_paper(candidate: list[ArxivPaper], corpus: list[dict],
     corpus_sorted = sorted(corpus, key=lambda x: datetime.strptime(x['data']['dateAdded'], '%Y-%m-%dT%H:%M:%SZ'), reverse=True)
     recent_corpus = corpus_sorted[:corpus_batch_size]
     
+    # 按添加时间从新到旧放入历史论文，摘要按token截断，总token数不超过 corpus_max_tokens
     corpus_info = []
+    corpus_tokens = 0
     for i, paper in enumerate(recent_corpus):
-        corpus_info.append({
+        entry = {
             "id": i + 1,
             "title": paper['data']['title'],
-            "abstract": paper['data']['abstractNote'][:abstract_max_length]  # 使用配置的长度限制
-        })
-    
-    # 分批处理候选论文
-    scored_candidates = []
-    
-    for i in range(0, len(candidate), candidate_batch_size):
-        batch = candidate[i:i+candidate_batch_size]
-        logger.info(f"处理第 {i//candidate_batch_size + 1} 批候选论文 ({len(batch)} 篇)")
+            "abstract": truncate_to_tokens(paper['data']['abstractNote'], abstract_max_tokens)
+        }
+        cost = token_length(json.dumps(entry, ensure_ascii=False, indent=2))
+        if corpus_tokens + cost > corpus_max_tokens:
+            logger.info(f"历史论文示例达到 {corpus_max_tokens} token上限，只使用最近的 {len(corpus_info)} 篇")
+            break
+        corpus_info.append(entry)
+        corpus_tokens += cost
+    
+    prefix = _scoring_prefix(research_interests, corpus_info)
+    
+    # 分批评分，所有批次同时提交，由LLM客户端控制并发和限流
+    llm = get_llm()
+    pending = [candidate[i:i+candidate_batch_size] for i in range(0, len(candidate), candidate_batch_size)]
+    repair_batch_size = max(1, candidate_batch_size // 2)
+    calls = repair_calls = 0
+    logger.info(f"提交 {len(pending)} 批候选论文进行评分")
+    
+    for round_index in range(score_repair_rounds + 1):
+        if not pending:
+            break
+        if round_index > 0:
+            # 只为缺失或无效的论文重新评分，分成更小的批次，且不读取LLM回复缓存
+            logger.info(f"第 {round_index} 轮修复: 为 {sum(len(b) for b in pending)} 篇论文重新评分，{len(pending)} 次调用")
+            repair_calls += len(pending)
+        calls += len(pending)
+        responses = llm.generate_batch(
+            [_scoring_messages(prefix, batch, abstract_max_tokens) for batch in pending],
+            refresh=round_index > 0)
         
-        # 构建批次候选论文信息
-        candidate_info = []
-        for j, paper in enumerate(batch):
-            candidate_info.append({
-                "id": j + 1,
-                "title": paper.title,
-                "abstract": paper.summary[:abstract_max_length]  # 使用配置的长度限制
-            })
-        
-        # 构建prompt
-        prompt = f"""
-你是一位AI研究领域的专家。请根据用户的研究兴趣和历史阅读偏好，和候选论文的学术贡献，为候选论文打分。
-
-用户的主要研究兴趣包括：{', '.join(research_interests)}
-
-用户最近阅读的论文示例：
-{json.dumps(corpus_info, ensure_ascii=False, indent=2)}
-
-请为以下候选论文打分（1-10分，10分最相关）：
-{json.dumps(candidate_info, ensure_ascii=False, indent=2)}
-
-评分标准：
-- 9-10分：与用户核心研究兴趣高度相关，且论文学术贡献高，具有重要学术价值
-- 7-8分：与用户研究兴趣相关，且论文学术贡献较高，值得关注
-- 5-6分：部分相关，可能有一定参考价值，或论文学术贡献一般
-- 3-4分：相关性较低，但在相关领域，或论文学术贡献较低
-- 0-2分：基本不相关，或论文学术贡献很低
-
-请以JSON格式返回评分结果，格式如下：
-{{
-  "scores": [
-    {{"id": 1, "score": 8.5, "reason": "简短评分理由"}},
-    {{"id": 2, "score": 6.0, "reason": "简短评分理由"}},
-    ...
-  ]
-}}
-
-请确保返回的JSON格式正确，并为每篇论文提供合理的评分和简短理由。
-"""
-
-        try:
-            llm = get_llm()
-            messages = [
-                {"role": "system", "content": "你是一位专业的AI研究领域专家，擅长评估学术论文的相关性和重要性。"},
-                {"role": "user", "content": prompt}
-            ]
-            
-            response = llm.generate(messages)
-            logger.debug(f"LLM响应: {response}")
+        failed = []
+        for batch, response in zip(pending, responses):
+            if isinstance(response, Exception):
+                logger.error(f"LLM评分失败: {response}")
+                scores = {}
+            else:
+                logger.debug(f"LLM响应: {response}")
+                scores = _parse_scores(response, len(batch), max_score_limit)
             
-            # 解析响应
-            try:
-                # 提取JSON部分
-                if "```json" in response:
-                    json_str = response.split("```json")[1].split("```")[0].strip()
-                elif "```" in response:
-                    json_str = response.split("```")[1].strip()
-                else:
-                    json_str = response.strip()
-                
-                result = json.loads(json_str)
-                scores_data = result.get("scores", [])
-                
-                # 应用评分
-                for score_info in scores_data:
-                    paper_id = score_info["id"] - 1
-                    if 0 <= paper_id < len(batch):
-                        score = float(score_info["score"])
-                        reason = score_info.get("reason", "")
-                        batch[paper_id].score = score
-                        batch[paper_id].llm_reason = reason
-                        logger.info(f"论文: {batch[paper_id].title[:50]}... | 评分: {score} | 理由: {reason}")
-                
-                scored_candidates.extend(batch)
-                
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.warning(f"解析LLM响应失败: {e}，使用默认评分")
-                for paper in batch:
-                    paper.score = default_score
-                scored_candidates.extend(batch)
-                
-        except Exception as e:
-            logger.error(f"LLM评分失败: {e}，使用默认评分")
-            for paper in batch:
-                paper.score = default_score
-            scored_candidates.extend(batch)
+            # 应用评分
+            for j, paper in enumerate(batch):
+                if j not in scores:
+                    failed.append(paper)
+                    continue
+                paper.score, paper.llm_reason = scores[j]
+                logger.info(f"论文: {paper.title[:50]}... | 评分: {paper.score} | 理由: {paper.llm_reason}")
+        pending = [failed[i:i+repair_batch_size] for i in range(0, len(failed), repair_batch_size)]
+    
+    # 修复后仍没有有效评分的论文使用默认评分
+    unscored = [paper for batch in pending for paper in batch]
+    if unscored:
+        logger.warning(f"{len(unscored)} 篇论文经过 {score_repair_rounds} 轮修复仍无有效评分，使用默认评分")
+        for paper in unscored:
+            paper.score = default_score
+            paper.score_provisional = True
+    logger.info(f"LLM评分共 {calls} 次调用，其中修复调用 {repair_calls} 次")
+    scored_candidates = list(candidate)
     
     # 关键词加分
     scored_candidates = keyword_score_update(scored_candidates, keyword_bonus, config)
@@ -247,20 +296,35 @@ def rerank_with_author_priority(candidate: List[ArxivPaper], corpus: List[dict],
     """
     logger.info("开始推荐：相关性排序 + 关键作者优先")
     
+    # 已有评分的论文（例如从论文库恢复的）不再重复打分
+    scored = [p for p in candidate if p.score is not None]
+    unscored = [p for p in candidate if p.score is None]
+    if scored:
+        logger.info(f"{len(scored)} 篇论文已有评分，仅对 {len(unscored)} 篇新论文打分")
+    
     # 第一阶段：按相关性排序
-    if use_llm:
+    if not unscored:
+        ranked_papers = []
+    elif use_llm:
+        # 先用嵌入相似度预筛，只把最相关的候选论文送去LLM评分
+        to_score, rejected = unscored, []
         try:
-            if llm_config:
-                ranked_papers = llm_based_rerank_paper(
-                    candidate, corpus, config=llm_config
-                )
-            else:
-                ranked_papers = llm_based_rerank_paper(candidate, corpus, config={})
+            to_score, rejected = prefilter_candidates(unscored, corpus, model, llm_config or {})
+        except Exception as e:
+            logger.warning(f"嵌入预筛失败，所有候选论文送去LLM评分: {e}")
+        try:
+            ranked_papers = llm_based_rerank_paper(to_score, corpus, config=llm_config or {}) + rejected
         except Exception as e:
             logger.error(f"LLM推荐失败，使用传统方法: {e}")
-            ranked_papers = traditional_rerank_paper(candidate, corpus, model, llm_config)
+            ranked_papers = traditional_rerank_paper(unscored, corpus, model, llm_config)
+            # 嵌入相似度只是本次的替代评分，下次运行仍由LLM评分
+            for paper in ranked_papers:
+                paper.score_provisional = True
     else:
-        ranked_papers = traditional_rerank_paper(candidate, corpus, model, llm_config)
+        ranked_papers = traditional_rerank_paper(unscored, corpus, model, llm_config)
+    
+    if scored:
+        ranked_papers = sorted(ranked_papers + scored, key=lambda x: x.score, reverse=True)
 
     # 过滤低分论文
     score_threshold = llm_config.get('score_filter_threshold', 5.0) if llm_config else 5.0
@@ -292,22 +356,41 @@ def rerank_with_author_priority(candidate: List[ArxivPaper], corpus: List[dict],
     
     return final_result
 
-def traditional_rerank_paper(candidate: List[ArxivPaper], corpus: List[dict], 
-                           model: str = None, config: dict = None) -> List[ArxivPaper]:
-    """传统的基于嵌入相似度的推荐方法"""
-    logger.info("使用传统嵌入相似度方法进行推荐...")
-    
-    # 使用配置参数
-    if config is None:
-        config = {}
-    
-    if model is None:
-        model = config.get('embedding_model', 'avsolatorio/GIST-small-Embedding-v0')
-    
+@lru_cache(maxsize=2)
+def _load_encoder(model: str, backend: str = "torch", onnx_model: str = "", onnx_file: str = ""):
+    """同一次运行中预筛和传统推荐共用一个编码器，只加载一次
+
+    backend 为 "onnx" 时使用 onnx_model（为空时使用 model 的模型仓库）中的 onnx_file，不导入torch。
+    """
+    if backend == "onnx":
+        from src.onnx_encoder import OnnxEncoder
+        return OnnxEncoder(onnx_model or model, onnx_file or DEFAULT_ONNX_FILE)
+    if backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model)
+
+def _encoder_name(model: str, encoder) -> str:
+    """嵌入缓存和近邻索引使用的名称；量化模型的嵌入与原模型略有差别，
+    按ONNX模型文件的内容分开缓存，不同的导出结果不会共用缓存"""
+    fingerprint = getattr(encoder, 'fingerprint', None)
+    return f"{model}#onnx-{fingerprint}" if fingerprint else model
+
+def embedding_similarity_scores(candidate: List[ArxivPaper], corpus: List[dict],
+                                model: str, config: dict) -> np.ndarray:
+    """候选论文与论文库摘要的时间衰减加权相似度（乘以 score_scale_factor），顺序与 candidate 一致
+
+    论文库为空时所有候选论文的评分都为0。
+    """
     use_time_decay = config.get('use_time_decay', True)
     score_scale_factor = config.get('score_scale_factor', 10.0)
+    if not corpus:
+        logger.warning("论文库为空，所有候选论文的相似度评分为0")
+        return np.zeros(len(candidate), dtype=np.float64)
     
-    encoder = SentenceTransformer(model)
+    encoder = _load_encoder(model, config.get('embedding_backend', 'torch'),
+                            config.get('onnx_model_path', ''), config.get('onnx_model_file', ''))
+    encoder_name = _encoder_name(model, encoder)
 
     # 按日期排序corpus
     corpus = sorted(corpus, key=lambda x: datetime.strptime(x['data']['dateAdded'], '%Y-%m-%dT%H:%M:%SZ'), reverse=True)
@@ -319,12 +402,61 @@ def traditional_rerank_paper(candidate: List[ArxivPaper], corpus: List[dict],
         time_decay_weight = np.ones(len(corpus)) / len(corpus)
     
     logger.info("Encoding corpus abstracts...")
-    corpus_feature = encoder.encode([paper['data']['abstractNote'] for paper in tqdm(corpus, desc="Corpus")])
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is not None:
+        # 只编码新增或在Zotero中修改过的条目
+        corpus_feature = embedding_cache.get_embeddings(corpus, encoder_name, encoder.encode)
+    else:
+        corpus_feature = encoder.encode([paper['data']['abstractNote'] for paper in tqdm(corpus, desc="Corpus")])
     logger.info("Encoding candidate papers...")
     candidate_feature = encoder.encode([paper.summary for paper in tqdm(candidate, desc="Candidates")])
     
-    sim = encoder.similarity(candidate_feature, corpus_feature)
-    scores = (sim * time_decay_weight).sum(axis=1) * score_scale_factor
+    # 按块计算加权余弦相似度之和，不构造完整的相似度矩阵
+    scores = decay_weighted_similarity(candidate_feature, corpus_feature, time_decay_weight,
+                                       config.get('similarity_memory_mb', DEFAULT_MEMORY_LIMIT_MB))
+    if config.get('neighbor_top_k', 0) > 0:
+        # 近邻的平均相似度明显高于整库加权相似度，校准到整库评分的尺度后再使用同样的阈值和加分
+        neighbor_scores = _neighbor_scores(candidate, corpus, candidate_feature, corpus_feature, time_decay_weight,
+                                           encoder_name, config)
+        scores = calibrate_scores(neighbor_scores, scores)
+    return scores.astype(np.float64) * score_scale_factor
+
+def _neighbor_scores(candidate: List[ArxivPaper], corpus: List[dict], candidate_feature: np.ndarray,
+                     corpus_feature: np.ndarray, weights: np.ndarray, model: str, config: dict) -> np.ndarray:
+    """每篇候选论文只与论文库中最相似的 neighbor_top_k 篇比较，评分为这些相似度按时间衰减权重的加权平均
+
+    近邻由IVF索引检索（与嵌入缓存保存在一起，之后的运行只为新增条目计算所属的簇），
+    贡献最大的几篇论文的标题记入 paper.related_papers，显示在邮件中。
+    """
+    top_k = config['neighbor_top_k']
+    keys = [f"{key}:{version}" for key, version in map(item_key, corpus)]
+    cache = get_embedding_cache()
+    index = IVFIndex.load_or_train(cache.index_path(model) if cache else None, keys, corpus_feature)
+    rows, sims = index.search(candidate_feature, top_k, config.get('neighbor_probes', 8))
+    
+    found = rows >= 0
+    neighbor_weights = np.where(found, weights[np.maximum(rows, 0)], 0.0)
+    contributions = neighbor_weights * np.where(found, sims, 0.0)
+    scores = contributions.sum(axis=1) / np.maximum(neighbor_weights.sum(axis=1), np.finfo(np.float64).tiny)
+    
+    for i, paper in enumerate(candidate):
+        best = np.argsort(-contributions[i])[:RELATED_PAPERS_SHOWN]
+        paper.related_papers = [corpus[rows[i, j]]['data']['title'] for j in best if found[i, j]]
+    return scores
+
+def traditional_rerank_paper(candidate: List[ArxivPaper], corpus: List[dict], 
+                           model: str = None, config: dict = None) -> List[ArxivPaper]:
+    """传统的基于嵌入相似度的推荐方法"""
+    logger.info("使用传统嵌入相似度方法进行推荐...")
+    
+    # 使用配置参数
+    if config is None:
+        config = {}
+    
+    if model is None:
+        model = config.get('embedding_model', 'avsolatorio/GIST-small-Embedding-v0')
+    
+    scores = embedding_similarity_scores(candidate, corpus, model, config)
     for s, c in zip(scores, candidate):
         c.score = s.item()
 
@@ -333,6 +465,41 @@ def traditional_rerank_paper(candidate: List[ArxivPaper], corpus: List[dict],
     candidate = sorted(candidate, key=lambda x: x.score, reverse=True)
     return candidate
 
+def prefilter_candidates(candidate: List[ArxivPaper], corpus: List[dict], model: str,
+                         config: dict) -> Tuple[List[ArxivPaper], List[ArxivPaper]]:
+    """LLM评分前的廉价预筛：按嵌入相似度（含时间衰减）加关键词加分排序，
+    保留前 prefilter_top_k 篇，以及分数与第 K 篇相差不超过 prefilter_margin 的论文
+
+    Returns:
+        (送去LLM评分的论文, 被筛掉的论文)；被筛掉的论文的评分为预筛分数，
+        但不高于 score_filter_threshold，因此不会出现在推荐结果中。这个评分是暂定的，
+        不保存到论文库，之后的运行会按当时的论文库和研究兴趣重新预筛
+    """
+    top_k = config.get('prefilter_top_k', 0)
+    margin = config.get('prefilter_margin', 0.0)
+    if top_k <= 0 or len(candidate) <= top_k:
+        return list(candidate), []
+    
+    scores = embedding_similarity_scores(candidate, corpus, model, config)
+    keyword_bonus = config.get('keyword_bonus', 0.5)
+    scores += np.array([keyword_bonus if c.search_keyword else 0.0 for c in candidate])
+    order = np.argsort(-scores, kind="stable")
+    cutoff = scores[order[top_k - 1]] - margin
+    selected = [candidate[i] for i in order if scores[i] >= cutoff]
+    rejected = [candidate[i] for i in order if scores[i] < cutoff]
+    
+    score_threshold = config.get('score_filter_threshold', 5.0)
+    for paper, score in zip(candidate, scores):
+        if score < cutoff:
+            paper.score = min(float(score), score_threshold)
+            paper.score_provisional = True
+    
+    candidate_batch_size = config.get('candidate_batch_size', 8)
+    saved_calls = math.ceil(len(candidate) / candidate_batch_size) - math.ceil(len(selected) / candidate_batch_size)
+    logger.info(f"嵌入预筛: {len(candidate)} 篇候选论文中 {len(selected)} 篇送去LLM评分"
+                f"（前 {top_k} 篇及分差 {margin} 以内），节省约 {saved_calls} 次LLM评分调用")
+    return selected, rejected
+
 def keyword_score_update(candidate: List[ArxivPaper], keyword_bonus: float = 0.5, config: dict = None) -> List[ArxivPaper]:
     """为关键词匹配的论文添加额外分数"""
     if config is None:
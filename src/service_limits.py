@@ -0,0 +1,44 @@
+import threading
+from contextlib import nullcontext
+from loguru import logger
+
+# 各外部服务默认的最大并发请求数
+DEFAULT_SERVICE_LIMITS = {
+    "arxiv": 2,             # arXiv 源码下载
+    "semantic_scholar": 1,  # Semantic Scholar 无key时限流很严格
+    "paperswithcode": 4,
+}
+
+# 未调用 set_service_limits 时使用默认上限
+_SEMAPHORES: dict[str, threading.BoundedSemaphore] = {
+    name: threading.BoundedSemaphore(limit) for name, limit in DEFAULT_SERVICE_LIMITS.items()
+}
+
+
+def parse_service_limits(value) -> dict[str, int]:
+    """解析服务并发上限，支持 "arxiv=2,semantic_scholar=1" 形式的字符串或字典"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {str(k): int(v) for k, v in value.items()}
+    limits = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition('=')
+        limits[name.strip()] = int(limit)
+    return limits
+
+
+def set_service_limits(limits: dict[str, int] = None):
+    """设置各服务的并发上限，未指定的服务使用默认值，上限小于等于0表示不限制"""
+    global _SEMAPHORES
+    merged = {**DEFAULT_SERVICE_LIMITS, **(limits or {})}
+    # 整体替换而不是原地修改，其他线程不会读到只填了一半的字典
+    _SEMAPHORES = {name: threading.BoundedSemaphore(limit) for name, limit in merged.items() if limit > 0}
+    logger.debug(f"服务并发上限: {merged}")
+
+
+def service_slot(name: str):
+    """占用某个服务的一个并发名额，用法: with service_slot("arxiv"): ..."""
+    return _SEMAPHORES.get(name) or nullcontext()
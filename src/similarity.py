@@ -0,0 +1,70 @@
+import numpy as np
+
+# 计算论文库加权向量时，每块占用的内存上限默认值
+DEFAULT_MEMORY_LIMIT_MB = 256
+
+
+def _chunk_rows(dim: int, memory_limit_mb: float) -> int:
+    """每块的行数：一块float32数据及其归一化后的副本不超过内存上限"""
+    return max(1, int(memory_limit_mb * 1024 ** 2) // (max(dim, 1) * 4 * 2))
+
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    """按行L2归一化为float32，零向量保持为零"""
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def weighted_corpus_vector(corpus_feature: np.ndarray, weights: np.ndarray,
+                           memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB) -> np.ndarray:
+    """论文库各嵌入归一化后按 weights 加权求和得到的向量，按块计算，峰值内存不超过 memory_limit_mb
+
+    corpus_feature 可以是内存映射的数组（np.asarray 不会复制），每次只读入一块。
+    """
+    corpus_feature = np.asarray(corpus_feature)
+    n, dim = corpus_feature.shape
+    weights = np.asarray(weights, dtype=np.float32)
+    total = np.zeros(dim, dtype=np.float64)
+    if n == 0 or dim == 0:
+        return total.astype(np.float32)
+    step = _chunk_rows(dim, memory_limit_mb)
+    for start in range(0, n, step):
+        block = normalize_rows(corpus_feature[start:start + step])
+        total += weights[start:start + step] @ block
+    return total.astype(np.float32)
+
+
+def decay_weighted_similarity(candidate_feature: np.ndarray, corpus_feature: np.ndarray, weights: np.ndarray,
+                              memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB) -> np.ndarray:
+    """每篇候选论文与论文库的加权余弦相似度之和：sum_j weights[j] * cos(candidate_i, corpus_j)
+
+    余弦相似度对论文库一侧是线性的，等于候选论文的归一化向量与论文库加权向量的点积，
+    因此不需要构造 候选数 x 论文库大小 的相似度矩阵：先按块求出论文库加权向量，
+    再对候选论文按块做一次float32矩阵向量乘法，时间与 (候选数 + 论文库大小) x 维度 成正比。
+    """
+    candidate_feature = np.asarray(candidate_feature)
+    corpus_feature = np.asarray(corpus_feature)
+    if corpus_feature.size == 0:
+        # 论文库为空（例如全部被 ZOTERO_IGNORE 过滤），所有候选论文的相似度都为0
+        return np.zeros(len(candidate_feature), dtype=np.float32)
+    corpus_vector = weighted_corpus_vector(corpus_feature, weights, memory_limit_mb)
+    scores = np.empty(len(candidate_feature), dtype=np.float32)
+    step = _chunk_rows(candidate_feature.shape[1], memory_limit_mb)
+    for start in range(0, len(candidate_feature), step):
+        scores[start:start + step] = normalize_rows(candidate_feature[start:start + step]) @ corpus_vector
+    return scores
+
+
+def calibrate_scores(scores: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """把 scores 线性映射到与 reference 相同的均值和标准差，不改变排序
+
+    用于让另一种方式算出的相似度（如近邻平均相似度）与整库加权相似度处在同一尺度，
+    从而共用 score_filter_threshold、关键词加分和预筛分差。scores 没有差异时直接返回 reference。
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    spread = scores.std()
+    if len(scores) == 0 or spread < 1e-12:
+        return reference.copy()
+    return (scores - scores.mean()) * (reference.std() / spread) + reference.mean()
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+import threading
+from loguru import logger
+
+GLOBAL_SOURCE_CACHE = None
+# 超过上限时淘汰到上限的这个比例，之后写入一段时间才需要再次扫描目录
+EVICT_TARGET_RATIO = 0.9
+
+# 解析逻辑变化时递增，旧的解析结果会被忽略并重新下载解析
+TEX_PARSER_VERSION = 3
+
+
+class SourceCache:
+    """arXiv源码解析后TeX内容的本地持久缓存
+
+    以 arxiv_id 加版本号为键（同一版本的源码内容不会变化），每个键对应
+    <key>.tex.v<解析器版本>.json，保存清理后的 file_contents 字典（无法解析的源码记为 null）。
+    源码包本身以流的方式在内存中解析，不会写入磁盘。
+
+    每次读取都会刷新文件的修改时间，总大小超过 max_bytes 时按最久未使用的顺序淘汰。
+    总大小在启动时统计一次，之后随写入在内存中累计，只有超过上限时才扫描目录。
+    """
+
+    def __init__(self, cache_dir: str = "cache/arxiv_source", max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _, _ in self._scan())
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    @staticmethod
+    def _tex_suffix() -> str:
+        return f".tex.v{TEX_PARSER_VERSION}.json"
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_tex(self, key: str) -> tuple[bool, dict | None]:
+        """读取解析结果
+
+        Returns:
+            (是否命中, file_contents)，命中时 file_contents 可能为None（源码无法解析）
+        """
+        path = self._path(key, self._tex_suffix())
+        if not self._touch(path):
+            with self._lock:
+                self.misses += 1
+            return False, None
+        try:
+            with open(path, encoding="utf-8") as f:
+                contents = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Broken tex cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return False, None
+        with self._lock:
+            self.hits += 1
+        return True, contents
+
+    def put_tex(self, key: str, contents: dict | None):
+        self._write_atomic(self._path(key, self._tex_suffix()),
+                           json.dumps(contents, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict(keep=key)
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                # 覆盖已有条目时只累计大小的差值
+                self._total_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._total_bytes += len(data)
+
+    def _scan(self) -> list[tuple[float, int, str, str]]:
+        """缓存目录中所有条目的 (修改时间, 大小, 路径, 文件名)，不含写入中的临时文件"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name))
+        return entries
+
+    def evict(self, keep: str = None):
+        """总大小超过上限时，按最近使用时间从旧到新删除到上限的 EVICT_TARGET_RATIO，keep 对应的条目不会被删除
+
+        扫描目录得到准确的总大小，同时校正内存中累计的值（其他进程也可能写入同一目录）。
+        """
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _, _ in entries)
+            self._total_bytes = total
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, size, path, name in entries:
+                if total <= target:
+                    break
+                if keep is not None and name.startswith(f"{keep}."):
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.debug(f"Evicted {name} from source cache")
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = total
+
+
+def set_global_source_cache(cache_dir: str = None, max_mb: float = 2048):
+    """设置全局源码缓存，cache_dir 为空时关闭缓存"""
+    global GLOBAL_SOURCE_CACHE
+    if not cache_dir:
+        GLOBAL_SOURCE_CACHE = None
+        return
+    GLOBAL_SOURCE_CACHE = SourceCache(cache_dir, max_bytes=int(max_mb * 1024 ** 2))
+    logger.info(f"Source cache set to {cache_dir} (max {max_mb} MB)")
+
+
+def get_source_cache() -> SourceCache | None:
+    return GLOBAL_SOURCE_CACHE
@@ -0,0 +1,351 @@
+import re
+from typing import NamedTuple, Optional
+
+# clean_tex 关心的记号：注释（连同其后的空行）、空行、\\ 换行、转义的 \%（保留，不当作注释）、连续空格
+# 每个分支都以确定的字符开头，正则引擎可以直接跳到候选位置
+_CLEAN_TOKEN = re.compile(r'%[^\n]*\n*(?:%[^\n]*\n*)*|\n\n+|\\\\|\\%|[ \t\r\f][ \t\r\f][ \t\r\f]+')
+_BLOCK_START = re.compile(r'\\begin\{comment\}|\\iffalse(?![a-zA-Z])')
+_UNESCAPED_PERCENT = re.compile(r'(?<!\\)%')
+_FI = re.compile(r'\\fi(?![a-zA-Z])')
+_END_COMMENT = re.compile(r'\\end\{comment\}')
+
+# 生成摘要前需要去掉的引用和浮动体
+_CITE = re.compile(r'~?\\cite[^\n]?\{[^}\n]*\}')
+_FLOAT_START = re.compile(r'\\begin\{(figure\*?|table\*?)\}')
+
+# 章节标题（允许标题中有一层嵌套的大括号）以及结束所有章节的边界
+_HEADING = re.compile(
+    r'\\(?P<command>part|chapter|section|subsection|subsubsection|paragraph)\*?\s*(?:\[[^\]]*\])?\s*'
+    r'\{(?P<title>(?:[^{}]|\{[^{}]*\})*)\}'
+    r'|\\(?P<boundary>appendix|bibliography|bibliographystyle|printbibliography|end\{document\}|begin\{thebibliography\})(?![a-zA-Z])')
+_SECTION_LEVELS = {'part': 0, 'chapter': 1, 'section': 2, 'subsection': 3, 'subsubsection': 4, 'paragraph': 5}
+_TITLE_COMMAND = re.compile(r'\\[a-zA-Z]+\*?|[{}~]')
+_TITLE_NUMBER = re.compile(r'^\s*(?:[0-9]+(?:\.[0-9]+)*[.:)]?|(?:[IVXLC]+|[A-Z])[.:)])\s+')
+_TITLE_WORD = re.compile(r'\w+')
+
+# 作者信息区域的各类标记，全部大小写不敏感
+_I = re.IGNORECASE
+_AUTHOR = re.compile(r'\\author', _I)
+_TITLE = re.compile(r'\\title', _I)
+_MAKETITLE = re.compile(r'\\maketitle', _I)
+_DATE = re.compile(r'\\date', _I)
+_DOCUMENT = re.compile(r'\\begin\{document\}', _I)
+_ABSTRACT = re.compile(r'\\begin\{abstract\}', _I)
+_SECTION = re.compile(r'\\section', _I)
+_FOOTNOTE = re.compile(r'\\footnote', _I)
+_FOOTNOTETEXT = re.compile(r'\\footnotetext', _I)
+_SECTION_OR_ABSTRACT = re.compile(r'\\section|\\begin\{abstract\}', _I)
+_SECTION_ABSTRACT_OR_MAKETITLE = re.compile(r'\\section|\\begin\{abstract\}|\\maketitle', _I)
+_WITH_PHRASE = re.compile(r'are with|is with|affiliated with', _I)
+_INSTITUTION_OR_PLACE = re.compile(
+    r'university|institute|college|lab|department|shanghai|beijing|tsinghua|stanford|mit|google|microsoft|openai|deepmind', _I)
+_INSTITUTION = re.compile(r'university|institute|college|lab|department', _I)
+_INSTITUTION_NO_LAB = re.compile(r'university|institute|college|department', _I)
+_FOOTNOTE_OR_THANKS = re.compile(r'footnote|thanks', _I)
+_AT = re.compile(r'@')
+_DOT = re.compile(r'\.')
+_AFFILIATION_KEYWORD = re.compile(
+    r'university|institute|college|lab|department|school|center|centre|academy|@|tech|polytechnic'
+    r'|are with|is with|affiliated with|research|laboratory|faculty|division|shanghai|beijing|china'
+    r'|tsinghua|stanford|mit|google|microsoft|openai|deepmind', _I)
+
+# 作者区域内的清理，区域通常很短
+_REGION_HEADING = re.compile(r'\\(?:section|subsection|subsubsection)\{.*?\}')
+_REGION_REF = re.compile(r'\\(?:cite|ref|label)\{.*?\}')
+_REGION_FONT = re.compile(r'\\(?:textbf|textit|emph)\{(.*?)\}')
+_REGION_COMMAND = re.compile(r'\\[a-zA-Z]+\*?(\[.*?\])?\{([^{}]*)\}')
+_REGION_BRACE = re.compile(r'\{|\}')
+_REGION_BREAK = re.compile(r'\\\\|\n+')
+_REGION_SPACE = re.compile(r'\s+')
+
+
+def _in_comment(text: str, pos: int) -> bool:
+    """pos 所在行在它之前是否有未转义的 %"""
+    line = text[text.rfind('\n', 0, pos) + 1:pos]
+    return _UNESCAPED_PERCENT.search(line) is not None
+
+
+class _BlockFinder:
+    """查找块结束标记；某个位置之后确定没有结束标记时记住这一点，避免对后续每个块开头重复扫描到文末"""
+
+    def __init__(self, text: str, pattern: re.Pattern, skip_comments: bool = False):
+        self.text = text
+        self.pattern = pattern
+        self.skip_comments = skip_comments
+        self.exhausted_from = None
+
+    def find_end(self, pos: int) -> Optional[int]:
+        if self.exhausted_from is not None and pos >= self.exhausted_from:
+            return None
+        start = pos
+        while True:
+            match = self.pattern.search(self.text, start)
+            if match is None:
+                self.exhausted_from = pos
+                return None
+            if not (self.skip_comments and _in_comment(self.text, match.start())):
+                return match.end()
+            start = match.end()
+
+
+def _replace_clean_token(match: re.Match) -> str:
+    token = match.group(0)
+    first = token[0]
+    if first == '%' or first == '\n':
+        # 注释和空行合并成一个换行；紧跟在换行后面时直接去掉
+        start = match.start()
+        if '\n' not in token or (start > 0 and match.string[start - 1] == '\n'):
+            return ''
+        return '\n'
+    if first == '\\':
+        return token if token == '\\%' else ''
+    return ' '
+
+
+def clean_tex(content: str) -> str:
+    """一次扫描完成tex清理：去掉注释、comment环境和 \\iffalse 块、\\\\ 换行，合并空行和连续空格"""
+    out = []
+    pos = 0
+    finders = {}
+    while True:
+        # comment环境和 \iffalse 块很少，先按它们把文本分段，每段再用一次 sub 处理其余记号
+        match = _BLOCK_START.search(content, pos)
+        while match is not None and _in_comment(content, match.start()):
+            match = _BLOCK_START.search(content, match.end())
+        if match is None:
+            out.append(_CLEAN_TOKEN.sub(_replace_clean_token, content[pos:]))
+            break
+        token = match.group(0)
+        if token not in finders:
+            finders[token] = _BlockFinder(content, _FI if token == '\\iffalse' else _END_COMMENT, skip_comments=True)
+        end = finders[token].find_end(match.end())
+        if end is None:
+            out.append(_CLEAN_TOKEN.sub(_replace_clean_token, content[pos:match.end()]))
+        else:
+            out.append(_CLEAN_TOKEN.sub(_replace_clean_token, content[pos:match.start()]))
+        pos = match.end() if end is None else end
+    # 分段处理时段与段之间可能各留下一个换行
+    for i in range(1, len(out)):
+        if out[i].startswith('\n') and out[i - 1].endswith('\n'):
+            out[i] = out[i][1:]
+    return ''.join(out)
+
+
+def strip_floats_and_cites(content: str) -> str:
+    """一次扫描去掉 \\cite{...} 引用以及 figure/table 环境"""
+    out = []
+    pos = 0
+    finders = {}
+    while True:
+        # 浮动体很少，先按它们把文本分段，每段再用一次 sub 去掉引用
+        match = _FLOAT_START.search(content, pos)
+        if match is None:
+            out.append(_CITE.sub('', content[pos:]))
+            break
+        env = match.group(1)
+        if env not in finders:
+            finders[env] = _BlockFinder(content, re.compile(re.escape(f'\\end{{{env}}}')))
+        end = finders[env].find_end(match.end())
+        if end is None:
+            out.append(_CITE.sub('', content[pos:match.end()]))
+            pos = match.end()
+        else:
+            out.append(_CITE.sub('', content[pos:match.start()]))
+            pos = end
+    return ''.join(out)
+
+
+class Section(NamedTuple):
+    """一个章节标题及其在文本中的范围，正文为 text[start:end]（包含标题本身）"""
+    title: str
+    level: int
+    start: int
+    end: int
+
+
+class SectionIndex:
+    """tex正文的章节索引，一次扫描得到所有章节的标题、层级和位置
+
+    章节在下一个同级或更高级标题处结束，附录、参考文献和文档结尾会结束所有章节。
+    按名字查找时忽略大小写、编号、星号和标题中的tex命令，名字不完全相同时按首个单词匹配
+    （如 Conclusion 可以找到 Conclusions and Future Work）。
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        headings = []
+        ends = []
+        open_sections = []
+        for match in _HEADING.finditer(text):
+            level = _SECTION_LEVELS.get(match.group('command'), -1)
+            # 关闭所有同级或更低级的章节，边界标记会关闭全部章节
+            while open_sections and (level < 0 or headings[open_sections[-1]][1] >= level):
+                ends[open_sections.pop()] = match.start()
+            if level < 0:
+                continue
+            open_sections.append(len(headings))
+            headings.append((match.group('title'), level, match.start()))
+            ends.append(len(text))
+        self.sections = [Section(title, level, start, end) for (title, level, start), end in zip(headings, ends)]
+        self._by_name = None
+
+    def _name_table(self) -> dict[str, Section]:
+        if self._by_name is None:
+            self._by_name = {}
+            for section in self.sections:
+                for key in self._keys(section.title):
+                    self._by_name.setdefault(key, section)
+        return self._by_name
+
+    @staticmethod
+    def normalize(title: str) -> str:
+        """去掉tex命令、编号和标点并转为小写，例如 '2. \\textbf{Related Work}' -> 'related work'"""
+        title = _TITLE_COMMAND.sub(' ', title)
+        title = _TITLE_NUMBER.sub('', title)
+        return ' '.join(_TITLE_WORD.findall(title.lower()))
+
+    @classmethod
+    def _keys(cls, title: str) -> list[str]:
+        name = cls.normalize(title)
+        if not name:
+            return []
+        first = name.split(' ', 1)[0]
+        return [name, f"*{first}", f"*{first.rstrip('s')}"]
+
+    def find(self, name: str) -> Optional[Section]:
+        key = self.normalize(name)
+        if not key:
+            return None
+        table = self._name_table()
+        return table.get(key) or table.get(f"*{key}") or table.get(f"*{key.rstrip('s')}")
+
+    def text_of(self, name: str) -> str:
+        """返回指定章节的内容（包含子章节），找不到时返回空字符串"""
+        section = self.find(name)
+        return self.text[section.start:section.end] if section else ""
+
+    def titles(self) -> list[str]:
+        return [s.title for s in self.sections]
+
+
+class _Landmarks:
+    """在文本中查找各类标记的首次出现位置，每次查找只从给定位置向后扫描一次"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def first(self, pattern: re.Pattern, pos: int = 0) -> Optional[re.Match]:
+        return pattern.search(self.text, pos)
+
+    def span(self, start_pattern: re.Pattern, terminator: re.Pattern) -> Optional[tuple[int, int]]:
+        """从 start_pattern 首次出现处开始，到其后第一个结束标记之前为止"""
+        start = self.first(start_pattern)
+        if start is None:
+            return None
+        end = self.first(terminator, start.end())
+        if end is None:
+            return None
+        return start.start(), end.start()
+
+    def span_to_end_or_eos(self, start: int, pos: int, terminator: re.Pattern) -> tuple[int, int]:
+        """区域在 pos 之后第一个结束标记前结束，没有结束标记时延伸到文末"""
+        match = self.first(terminator, pos)
+        if match is not None:
+            return start, match.start()
+        end = len(self.text)
+        if self.text.endswith('\n') and end - 1 >= pos:
+            end -= 1
+        return start, end
+
+
+def _author_region_candidates(content: str):
+    """按优先级依次给出可能包含作者信息的区域，每个候选区域都在线性时间内确定"""
+    marks = _Landmarks(content)
+
+    # \author ... \maketitle
+    author = marks.first(_AUTHOR)
+    if author:
+        maketitle = marks.first(_MAKETITLE, author.end())
+        if maketitle:
+            yield author.start(), maketitle.end()
+    # \begin{document} ... \begin{abstract}
+    document = marks.first(_DOCUMENT)
+    if document:
+        abstract = marks.first(_ABSTRACT, document.end())
+        if abstract:
+            yield document.start(), abstract.end()
+    # \title ... (\section|\begin{abstract})
+    span = marks.span(_TITLE, _SECTION_OR_ABSTRACT)
+    if span:
+        yield span
+    # \author ... \date
+    author = marks.first(_AUTHOR)
+    if author:
+        date = marks.first(_DATE, author.end())
+        if date:
+            yield author.start(), date.end()
+    # \title ... \author ... (\section|\begin{abstract}|\maketitle)
+    title = marks.first(_TITLE)
+    if title:
+        author = marks.first(_AUTHOR, title.end())
+        if author:
+            end = marks.first(_SECTION_ABSTRACT_OR_MAKETITLE, author.end())
+            if end:
+                yield title.start(), end.start()
+    # \author ... \section
+    span = marks.span(_AUTHOR, _SECTION)
+    if span:
+        yield span
+    # \footnote / \footnotetext ... (\section|\begin{abstract}|\maketitle|$)
+    for pattern in (_FOOTNOTE, _FOOTNOTETEXT):
+        footnote = marks.first(pattern)
+        if footnote:
+            yield marks.span_to_end_or_eos(footnote.start(), footnote.end(), _SECTION_ABSTRACT_OR_MAKETITLE)
+    # 开头 ... (are with|is with|affiliated with) ... (\section|\begin{abstract}|\maketitle|$)
+    phrase = marks.first(_WITH_PHRASE)
+    if phrase:
+        yield marks.span_to_end_or_eos(0, phrase.end(), _SECTION_ABSTRACT_OR_MAKETITLE)
+    # 开头 ... 机构或地名 ... (\section|\begin{abstract})
+    keyword = marks.first(_INSTITUTION_OR_PLACE)
+    if keyword:
+        end = marks.first(_SECTION_OR_ABSTRACT, keyword.end())
+        if end:
+            yield 0, end.start()
+    # 前3000个字符
+    yield 0, min(len(content), 3000)
+    # 开头 ... 邮箱 ... (\section|\begin{abstract})
+    at = marks.first(_AT)
+    if at:
+        dot = marks.first(_DOT, at.end())
+        if dot:
+            end = marks.first(_SECTION_OR_ABSTRACT, dot.end())
+            if end:
+                yield 0, end.start()
+    # 开头 ... 机构 ... (\section|\begin{abstract})
+    keyword = marks.first(_INSTITUTION)
+    if keyword:
+        end = marks.first(_SECTION_OR_ABSTRACT, keyword.end())
+        if end:
+            yield 0, end.start()
+    # 开头 ... footnote/thanks ... 机构 ... (\section|\begin{abstract}|$)
+    thanks = marks.first(_FOOTNOTE_OR_THANKS)
+    if thanks:
+        keyword = marks.first(_INSTITUTION_NO_LAB, thanks.end())
+        if keyword:
+            yield marks.span_to_end_or_eos(0, keyword.end(), _SECTION_OR_ABSTRACT)
+
+
+def extract_author_region(content: str) -> str:
+    """找到第一个包含机构关键词的候选区域，去掉其中的tex命令后返回，找不到时返回空字符串"""
+    for start, end in _author_region_candidates(content):
+        if _AFFILIATION_KEYWORD.search(content, start, end) is None:
+            continue
+        region = content[start:end]
+        region = _REGION_HEADING.sub(' ', region)
+        region = _REGION_REF.sub(' ', region)
+        region = _REGION_FONT.sub(r'\1', region)
+        region = _REGION_COMMAND.sub(r'\2', region)
+        region = _REGION_BRACE.sub(' ', region)
+        region = _REGION_BREAK.sub(' ', region)
+        return _REGION_SPACE.sub(' ', region).strip()
+    return ""
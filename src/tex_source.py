@@ -0,0 +1,157 @@
+import io
+import posixpath
+import re
+import tarfile
+from typing import Iterable, Optional
+import requests
+from loguru import logger
+from src.tex_cleaner import clean_tex
+
+# 单个tex文件最多读取的字节数，超出部分被截断（自动生成的巨型tex通常只有开头有用）
+MAX_MEMBER_BYTES = 2 * 1024 ** 2
+# 一篇论文所有tex文件合计最多读取的字节数，超出后停止读取后续成员
+MAX_TOTAL_BYTES = 8 * 1024 ** 2
+
+_INPUT_PATTERN = re.compile(r'\\(?:input|include)\{(.+?)\}')
+_DOCUMENT_PATTERN = re.compile(r'\\begin\{document\}')
+
+
+class _ChunkStream(io.RawIOBase):
+    """把按块产生字节的迭代器包装成只读的文件对象，供 tarfile 的流模式读取"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self.bytes_read += n
+        return n
+
+
+def _normalize(name: str) -> str:
+    return posixpath.normpath(name.strip())
+
+
+def _tex_name(name: str) -> str:
+    name = _normalize(name)
+    return name if name.endswith('.tex') else f"{name}.tex"
+
+
+def _closure(main_tex: str, file_contents: dict[str, str]) -> tuple[set[str], set[str]]:
+    """返回主文件通过 \\input/\\include 递归引用到的文件中，已读取的和尚未读取的"""
+    found, missing = set(), set()
+    stack = [main_tex]
+    while stack:
+        name = stack.pop()
+        if name in found:
+            continue
+        found.add(name)
+        for f in _INPUT_PATTERN.findall(file_contents[name]):
+            included = _tex_name(f)
+            if included in file_contents:
+                stack.append(included)
+            else:
+                missing.add(included)
+    return found, missing
+
+
+def _expand(name: str, file_contents: dict[str, str], seen: frozenset = frozenset()) -> str:
+    """递归地把 \\input/\\include 替换为对应文件的内容，找不到的文件替换为空"""
+    def replace(match: re.Match) -> str:
+        included = _tex_name(match.group(1))
+        if included in seen or included not in file_contents:
+            return ''
+        return _expand(included, file_contents, seen | {name})
+
+    return _INPUT_PATTERN.sub(replace, file_contents[name])
+
+
+def extract_tex(fileobj, arxiv_id: str = "", max_member_bytes: int = MAX_MEMBER_BYTES,
+                max_total_bytes: int = MAX_TOTAL_BYTES) -> Optional[dict[str, str]]:
+    """以流模式从源码包中读取tex文件，不落盘
+
+    只读取 .tex 成员的内容（.bbl 只用文件名判断主文件），其余成员直接跳过。
+    主文件优先取与 .bbl 同名且包含 \\begin{document} 的文件，没有时取第一个包含document块的文件。
+    与 .bbl 同名的主文件及其递归引用的文件都已读到后立即停止，不再读取后续成员；
+    没有匹配的 .bbl 时读完整个包，避免在有多个 \\documentclass 文件（补充材料、回复信）时选错主文件。
+
+    Returns:
+        {文件名: 清理后的内容, "all": 展开引用后的主文件内容或None}；不是tar包或没有tex文件时返回None
+    """
+    try:
+        tar = tarfile.open(fileobj=fileobj, mode='r|*')
+    except tarfile.ReadError:
+        logger.debug(f"Failed to find main tex file of {arxiv_id}: Not a tar file.")
+        return None
+
+    file_contents = {}
+    bbl_names = []
+    document_files = []
+    total_bytes = 0
+    main_tex = None
+    with tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            name = _normalize(member.name)
+            if name.endswith('.bbl'):
+                bbl_names.append(name[:-len('.bbl')])
+            elif name.endswith('.tex'):
+                limit = min(member.size, max_member_bytes, max_total_bytes - total_bytes)
+                if member.size > limit:
+                    logger.debug(f"Truncating {name} of {arxiv_id} from {member.size} to {limit} bytes")
+                raw = tar.extractfile(member).read(limit)
+                total_bytes += len(raw)
+                content = clean_tex(raw.decode('utf-8', errors='ignore'))
+                file_contents[name] = content
+                if _DOCUMENT_PATTERN.search(content):
+                    document_files.append(name)
+            else:
+                continue
+
+            if document_files:
+                # 已出现bbl时以与其同名的tex为主文件，否则暂取第一个包含document块的文件
+                bbl_matches = [f for f in document_files if f[:-len('.tex')] in bbl_names]
+                main_tex = bbl_matches[0] if bbl_matches else document_files[0]
+                # 只有由bbl确定的主文件才能提前停止，后面的成员中可能还有bbl或真正的主文件
+                if bbl_matches and not _closure(main_tex, file_contents)[1]:
+                    logger.debug(f"Resolved main tex file {main_tex} of {arxiv_id}, stop reading the rest of the tarball")
+                    break
+            if total_bytes >= max_total_bytes:
+                logger.debug(f"Reached tex size limit of {arxiv_id}, stop reading the rest of the tarball")
+                break
+
+    if len(file_contents) == 0:
+        logger.debug(f"Failed to find main tex file of {arxiv_id}: No tex file.")
+        return None
+
+    if main_tex is None and len(file_contents) == 1:
+        main_tex = next(iter(file_contents))
+    if main_tex is not None:
+        file_contents["all"] = _expand(main_tex, file_contents)
+    else:
+        logger.debug(f"Failed to find main tex file of {arxiv_id}: No tex file containing the document block.")
+        file_contents["all"] = None
+    return file_contents
+
+
+def fetch_tex(url: str, arxiv_id: str = "", timeout: float = 120, chunk_size: int = 64 * 1024) -> Optional[dict[str, str]]:
+    """流式下载源码包并直接在内存中解析，提前停止时剩余部分不再下载"""
+    with requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        stream = _ChunkStream(response.iter_content(chunk_size=chunk_size))
+        file_contents = extract_tex(io.BufferedReader(stream, buffer_size=chunk_size), arxiv_id)
+        logger.debug(f"Read {stream.bytes_read} bytes of source tarball of {arxiv_id}")
+        return file_contents
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+import arxiv
+import pytest
+
+import src.arxiv_client as arxiv_client
+from benchmarks.fake_arxiv import FakeArxivServer
+from src.paper import ArxivPaper, Author
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeArxivServer(latency=0, results_per_query=30) as server:
+        monkeypatch.setattr(arxiv.Client, "query_url_format", server.query_url_format)
+        monkeypatch.setattr(arxiv_client, "LISTING_URL_FORMAT", server.listing_url_format)
+        yield server
+
+
+def test_listing_fixture_is_parsed(server):
+    """cs.RO 固定列表中有一篇新投稿、一篇交叉列出和一篇版本更新（版本更新被忽略）"""
+    papers = arxiv_client.get_arxiv_paper_by_listing("cs.RO")
+
+    assert [p.arxiv_id for p in papers] == ["2410.11001", "2410.10502"]
+    grasp, vla = papers
+    assert grasp.title == "Learning Dexterous Grasping from Human Videos"
+    assert [a.name for a in grasp.authors] == ["Alice Smith", "Bob Jones", "Carol Wang"]
+    assert grasp.summary.startswith("We present a method")
+    assert grasp.pdf_url == "http://arxiv.org/pdf/2410.11001v1"
+    assert grasp.version == 1
+    assert vla.title == "Vision-Language-Action Models for Mobile Manipulation"
+    assert [a.name for a in vla.authors] == ["Dan Lee", "Eve Zhang"]
+    assert vla.categories == ("cs.LG", "cs.RO")
+    assert server.request_count == 1
+
+
+def test_listing_can_include_replacements(server):
+    papers = arxiv_client.get_arxiv_paper_by_listing("cs.RO", announce_types=("new", "cross", "replace"))
+    assert len(papers) == 3
+
+
+def test_generated_listing_skips_replacements(server):
+    papers = arxiv_client.get_arxiv_paper_by_listing("cs.AI")
+    # render_listing 把每十项中的一项标为版本更新
+    assert len(papers) == 27
+    assert all(p.categories == ("cs.AI",) for p in papers)
+
+
+def test_date_window_query():
+    now = datetime(2024, 10, 16, 12, 30, tzinfo=timezone.utc)
+    query = arxiv_client.build_date_window_query("cat:cs.RO OR cat:cs.AI", days=2, now=now)
+    assert query == "(cat:cs.RO OR cat:cs.AI) AND submittedDate:[202410141230 TO 202410161230]"
+
+
+def test_date_window_fetches_the_whole_window_in_one_page(server):
+    papers = arxiv_client.get_arxiv_paper_by_category("cs.RO+cs.AI", limiter=arxiv_client.HostRateLimiter(0))
+    assert len(papers) == 30
+    assert len({p.arxiv_id for p in papers}) == 30
+    # 服务端返回的结果总数不超过一页时只需一次请求
+    assert server.request_count == 1
+
+
+def test_rss_backend_deduplicates_across_categories(server):
+    # 同一类别列出两次，相当于两个类别交叉列出同一批论文
+    papers = arxiv_client.fetch_arxiv_papers("cs.RO+cs.RO", min_request_interval=0, backend="rss")
+    assert [p.arxiv_id for p in papers] == ["2410.11001", "2410.10502"]
+    assert server.request_count == 2
+
+
+def test_deduplicate_keeps_the_first_copy_and_sorts_by_date():
+    def paper(arxiv_id, day, keyword=None):
+        return ArxivPaper(arxiv_id, arxiv_id, "", [Author("A")], datetime(2024, 10, day, tzinfo=timezone.utc),
+                          "", keyword=keyword)
+
+    category_copy, keyword_copy = paper("2410.00002", 15), paper("2410.00002", 15, keyword="robotics")
+    papers = arxiv_client.deduplicate_and_sort_papers([paper("2410.00001", 14), category_copy, keyword_copy])
+    assert [p.arxiv_id for p in papers] == ["2410.00002", "2410.00001"]
+    assert papers[0] is category_copy
+
+
+def test_search_requests_go_through_the_shared_limiter(server):
+    """create_arxiv_client 替换了 arxiv.Client 的私有 _session，升级 arxiv 后若不再生效这里会失败"""
+    class CountingLimiter(arxiv_client.HostRateLimiter):
+        hosts = []
+
+        def acquire(self, host):
+            self.hosts.append(host)
+            super().acquire(host)
+
+    limiter = CountingLimiter(0)
+    arxiv_client.get_arxiv_paper_by_keyword("robotics", limiter=limiter)
+    assert len(limiter.hosts) == server.request_count == 1
+
+
+def test_results_are_deduplicated_once(server, monkeypatch):
+    calls = []
+    deduplicate = arxiv_client.deduplicate_and_sort_papers
+    monkeypatch.setattr(arxiv_client, "deduplicate_and_sort_papers", lambda papers: calls.append(1) or deduplicate(papers))
+    papers = arxiv_client.fetch_arxiv_papers("cs.RO+cs.AI", "robotics, grasping", min_request_interval=0, backend="rss")
+
+    assert calls == [1]
+    assert len(papers) == len({p.arxiv_id for p in papers})
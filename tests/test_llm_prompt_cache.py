@@ -0,0 +1,43 @@
+import numpy as np
+from llama_cpp import LlamaState
+
+from src.llm import LOCAL_N_CTX, LOCAL_PROMPT_CACHE_STATES, _LlamaStateCache, _prompt_state_bytes
+
+N_VOCAB = 151_936
+
+
+class FakeQwen:
+    """Qwen2.5-3B-Instruct 的元数据，n_batch 为 llama-cpp-python 的默认值512"""
+
+    metadata = {"general.architecture": "qwen2", "qwen2.block_count": "36", "qwen2.embedding_length": "2048",
+                "qwen2.attention.head_count": "16", "qwen2.attention.head_count_kv": "2"}
+    scores = np.zeros((512, N_VOCAB), dtype=np.single)
+    input_ids = np.zeros(LOCAL_N_CTX, dtype=np.intc)
+
+    def n_ctx(self):
+        return LOCAL_N_CTX
+
+    def n_vocab(self):
+        return N_VOCAB
+
+
+def make_state(n_tokens: int, llama_state_size: int) -> LlamaState:
+    return LlamaState(input_ids=np.zeros(LOCAL_N_CTX, dtype=np.intc), scores=np.zeros((8, 1000), dtype=np.single),
+                      n_tokens=n_tokens, llama_state=b"", llama_state_size=llama_state_size, seed=0)
+
+
+def test_state_size_of_the_local_model():
+    kv_bytes = LOCAL_N_CTX * 36 * 2 * 256 * 2
+    size = _prompt_state_bytes(FakeQwen())
+    assert kv_bytes + FakeQwen.scores.nbytes < size < kv_bytes + FakeQwen.scores.nbytes + 2 * 1024 ** 2
+    assert LOCAL_PROMPT_CACHE_STATES * size < 2 * 1024 ** 3
+
+
+def test_cache_counts_the_copied_scores():
+    state_bytes = 1000 + 8 * 1000 * 4 + LOCAL_N_CTX * 4
+    cache = _LlamaStateCache(capacity_bytes=2 * state_bytes)
+    for i in range(3):
+        cache[(1, 2, i)] = make_state(3, 1000)
+    assert cache.cache_size == 2 * state_bytes
+    # 最久未使用的状态先被淘汰
+    assert list(cache.cache_state) == [(1, 2, 1), (1, 2, 2)]
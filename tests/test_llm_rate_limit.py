@@ -0,0 +1,86 @@
+import time
+
+import openai
+import pytest
+
+from benchmarks.fake_llm import FakeLLMServer
+from src.llm import LLM
+from src.rate_limit import RATE_DECREASE_FACTOR, RATE_RECOVERY_SUCCESSES
+
+CLIENT_RPM = 600
+
+
+def make_llm(server: FakeLLMServer, **config) -> LLM:
+    # 服务端没有给出等待时间时退避30秒以上，测试在几秒内结束即说明遵守了服务端的等待时间
+    return LLM(api_key="fake", base_url=server.base_url, model="fake", config={
+        "max_requests_per_minute": CLIENT_RPM, "max_concurrent_requests": 1,
+        "api_retry_attempts": 5, "api_retry_delay": 60.0, "api_max_retry_delay": 60.0, **config})
+
+
+def requests(n: int) -> list[list[dict]]:
+    return [[{"role": "user", "content": f"request {i}"}] for i in range(n)]
+
+
+@pytest.mark.parametrize("send_retry_after", [True, False])
+def test_429_waits_for_the_server_reset(send_retry_after):
+    """带 Retry-After 时按它等待；不带时按 x-ratelimit-reset-requests 等待"""
+    with FakeLLMServer(rpm=2, window=1.0, send_retry_after=send_retry_after) as server:
+        # 四个请求同时发出，服务端放行两个，另两个收到429
+        llm = make_llm(server, max_concurrent_requests=4)
+        start = time.monotonic()
+        results = llm.generate_batch(requests(4))
+        elapsed = time.monotonic() - start
+
+    assert results == ["ok"] * 4
+    assert 2 <= server.rate_limited_count <= 3
+    assert elapsed < 10
+    # 第一轮四个请求之后的重试都在窗口过期之后才发出
+    arrivals = sorted(t for t, _ in server.responses)
+    assert all(t - arrivals[0] >= 1.0 - 0.05 for t in arrivals[4:])
+
+
+def test_effective_rpm_drops_on_429_and_recovers():
+    with FakeLLMServer(rpm=2, window=1.0) as server:
+        llm = make_llm(server, max_concurrent_requests=4)
+        limiter = llm.aclient.endpoints[0].limiter
+        assert llm.generate_batch(requests(4)) == ["ok"] * 4
+        # 同一次限流中的多个429只降速一次
+        dropped = limiter.effective_rpm
+        assert dropped == CLIENT_RPM * RATE_DECREASE_FACTOR
+
+        server.rpm = 0
+        for messages in requests(RATE_RECOVERY_SUCCESSES):
+            assert llm.generate(messages) == "ok"
+        assert dropped < limiter.effective_rpm < CLIENT_RPM
+
+        for messages in requests(RATE_RECOVERY_SUCCESSES * 10):
+            llm.generate(messages)
+        assert limiter.effective_rpm == CLIENT_RPM
+
+
+@pytest.mark.parametrize("status, code, error", [
+    (401, None, openai.AuthenticationError),
+    (400, None, openai.BadRequestError),
+    (429, "insufficient_quota", openai.RateLimitError),
+])
+def test_non_retryable_errors_fail_fast(status, code, error):
+    with FakeLLMServer(rpm=0, error_rate=1.0, error_status=status, error_code=code) as server:
+        llm = make_llm(server)
+        start = time.monotonic()
+        results = llm.generate_batch(requests(3))
+        elapsed = time.monotonic() - start
+
+    assert all(isinstance(r, error) for r in results)
+    assert server.request_count == 3
+    assert elapsed < 5
+    assert llm.aclient.endpoints[0].limiter.effective_rpm == CLIENT_RPM
+
+
+def test_server_errors_are_retried():
+    with FakeLLMServer(rpm=0, error_rate=0.5, seed=1) as server:
+        llm = make_llm(server, api_retry_delay=0.01, api_max_retry_delay=0.05, api_retry_attempts=10)
+        results = llm.generate_batch(requests(6))
+
+    assert results == ["ok"] * 6
+    assert server.error_count > 0
+    assert server.request_count == 6 + server.error_count
@@ -0,0 +1,84 @@
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import src.recommender as recommender
+from src.ann_index import IVFIndex
+from src.paper import ArxivPaper, Author
+from src.similarity import calibrate_scores
+
+TOPICS = ["robot grasping", "language models", "protein folding", "speech recognition"]
+
+
+class FakeEncoder:
+    """Embeds a text as its topic direction plus a small hash-seeded perturbation"""
+
+    def encode(self, texts, **kwargs):
+        vectors = []
+        for text in texts:
+            seed = int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).normal(scale=0.3, size=16)
+            for i, topic in enumerate(TOPICS):
+                if topic in text:
+                    vector[i] += 1.0
+            vectors.append(vector)
+        return np.array(vectors, dtype=np.float32)
+
+
+def make_corpus(n: int) -> list[dict]:
+    return [{"key": f"K{i}", "version": 1,
+             "data": {"title": f"Paper {i}", "abstractNote": f"Work {i} on {TOPICS[i % 2]}",
+                      "dateAdded": f"2024-01-{i % 28 + 1:02d}T00:00:00Z"}}
+            for i in range(n)]
+
+
+def make_candidates() -> list[ArxivPaper]:
+    return [ArxivPaper(f"2405.{i:05d}", f"Title {i}", f"Candidate {i} on {TOPICS[i % 4]}", [Author("Ada Lovelace")],
+                       datetime(2024, 5, 1, tzinfo=timezone.utc), f"https://arxiv.org/pdf/2405.{i:05d}")
+            for i in range(12)]
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    monkeypatch.setattr(recommender, "_load_encoder", lambda *args: FakeEncoder())
+
+
+def test_empty_corpus_scores_zero_with_neighbor_index(fake_encoder):
+    candidates = make_candidates()
+    scores = recommender.embedding_similarity_scores(candidates, [], "model", {"neighbor_top_k": 5})
+    assert scores.shape == (len(candidates),)
+    assert not scores.any()
+
+
+def test_empty_corpus_reranks_without_error(fake_encoder):
+    ranked = recommender.traditional_rerank_paper(make_candidates(), [], "model", {"neighbor_top_k": 5})
+    assert all(p.score == 0 for p in ranked)
+
+
+def test_train_rejects_empty_vectors():
+    with pytest.raises(ValueError):
+        IVFIndex.train([], np.empty((0, 16), dtype=np.float32))
+
+
+def test_neighbor_scores_share_the_whole_library_scale(fake_encoder):
+    corpus, candidates = make_corpus(60), make_candidates()
+    whole = recommender.embedding_similarity_scores(candidates, corpus, "model", {})
+    neighbor = recommender.embedding_similarity_scores(candidates, corpus, "model", {"neighbor_top_k": 5})
+
+    assert neighbor.mean() == pytest.approx(whole.mean())
+    assert neighbor.std() == pytest.approx(whole.std())
+    # the library covers the first two topics only, so those candidates rank on top either way
+    top = set(np.argsort(-neighbor)[:6])
+    assert top == {i for i in range(12) if i % 4 < 2}
+    assert all(p.related_papers for p in candidates)
+
+
+def test_calibrate_scores_keeps_order():
+    scores = np.array([0.9, 0.8, 0.95, 0.85])
+    reference = np.array([0.3, 0.1, 0.2, 0.4])
+    calibrated = calibrate_scores(scores, reference)
+    assert list(np.argsort(calibrated)) == list(np.argsort(scores))
+    assert calibrated.mean() == pytest.approx(reference.mean())
+    assert calibrate_scores(np.array([0.9]), np.array([0.4])) == pytest.approx([0.4])
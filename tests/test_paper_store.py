@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from src.paper import TLDR_UNAVAILABLE, ArxivPaper, Author
+from src.paper_store import PaperStore
+
+
+def make_paper(arxiv_id: str) -> ArxivPaper:
+    return ArxivPaper(arxiv_id, f"Title {arxiv_id}", "Abstract", [Author("Ada Lovelace")],
+                      datetime(2024, 5, 1, tzinfo=timezone.utc), f"https://arxiv.org/pdf/{arxiv_id}")
+
+
+@pytest.fixture
+def store():
+    store = PaperStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_final_results_are_restored(store):
+    paper = make_paper("2405.00001")
+    paper.score, paper.llm_reason = 8.0, "relevant"
+    paper.llm_extracted_info = {"tldr": "A summary", "affiliations": ["MIT"]}
+    paper.tldr, paper.affiliations
+    store.save([paper])
+
+    restored = make_paper("2405.00001")
+    assert store.restore([restored]) == 1
+    assert (restored.score, restored.llm_reason, restored.tldr, restored.affiliations) == (
+        8.0, "relevant", "A summary", ["MIT"])
+
+
+def test_no_affiliations_found_is_restored(store, monkeypatch):
+    paper = make_paper("2405.00002")
+    paper.llm_extracted_info = {"tldr": "A summary", "affiliations": []}
+    monkeypatch.setattr(ArxivPaper, "_fetch_affiliations_from_semantic_scholar", lambda self: [])
+    assert paper.affiliations is None
+    store.save([paper])
+
+    restored = make_paper("2405.00002")
+    store.restore([restored])
+    assert restored.is_computed("affiliations") and restored.affiliations is None
+
+
+def test_fallback_results_are_not_stored(store, monkeypatch):
+    paper = make_paper("2405.00003")
+    paper.score, paper.score_provisional = 5.0, True
+    paper.llm_extracted_info = {"tldr": TLDR_UNAVAILABLE, "affiliations": [], "failed": True}
+    monkeypatch.setattr(ArxivPaper, "_fetch_affiliations_from_semantic_scholar", lambda self: [])
+    assert paper.tldr == TLDR_UNAVAILABLE and paper.affiliations is None
+    store.save([paper])
+
+    row = store.conn.execute("SELECT score, tldr, affiliations FROM papers").fetchone()
+    assert tuple(row) == (None, None, None)
+    restored = make_paper("2405.00003")
+    assert store.restore([restored]) == 0
+    assert not restored.is_cached("tldr") and not restored.is_cached("affiliations")
+
+
+def test_failed_semantic_scholar_lookup_is_not_stored(store, monkeypatch):
+    paper = make_paper("2405.00004")
+    paper.llm_extracted_info = {"tldr": "A summary", "affiliations": []}
+    monkeypatch.setattr(ArxivPaper, "_fetch_affiliations_from_semantic_scholar", lambda self: None)
+    assert paper.tldr == "A summary" and paper.affiliations is None
+    store.save([paper])
+
+    row = store.conn.execute("SELECT tldr, affiliations FROM papers").fetchone()
+    assert (row["tldr"], row["affiliations"]) == ("A summary", None)
+
+
+def test_later_success_replaces_nothing_saved_before(store):
+    paper = make_paper("2405.00005")
+    paper.score, paper.score_provisional = 5.0, True
+    store.save([paper])
+    paper.score, paper.score_provisional, paper.llm_reason = 7.0, False, "scored"
+    store.save([paper])
+
+    restored = make_paper("2405.00005")
+    store.restore([restored])
+    assert restored.score == 7.0
+
+
+def test_failed_fields_survive_serialization():
+    paper = make_paper("2405.00006")
+    paper.score_provisional = True
+    paper.failed_fields.add("tldr")
+    copy = ArxivPaper.from_json(paper.to_json())
+    assert copy.score_provisional and copy.failed_fields == {"tldr"}
+    assert json.loads(paper.to_json())["failed_fields"] == ["tldr"]
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+import src.recommender as recommender
+from src.paper import ArxivPaper, Author
+from src.paper_store import PaperStore
+
+
+def make_papers(n: int) -> list[ArxivPaper]:
+    return [ArxivPaper(f"2405.{i:05d}", f"Title {i}", f"Abstract {i}", [Author("Ada Lovelace")],
+                       datetime(2024, 5, 1, tzinfo=timezone.utc), f"https://arxiv.org/pdf/2405.{i:05d}")
+            for i in range(n)]
+
+
+def test_rejected_papers_get_provisional_scores(monkeypatch):
+    papers = make_papers(6)
+    monkeypatch.setattr(recommender, "embedding_similarity_scores",
+                        lambda candidate, corpus, model, config: np.arange(len(candidate), 0, -1, dtype=np.float64))
+    selected, rejected = recommender.prefilter_candidates(
+        papers, [], "model", {"prefilter_top_k": 2, "prefilter_margin": 0.0, "score_filter_threshold": 5.0})
+
+    assert [p.arxiv_id for p in selected] == ["2405.00000", "2405.00001"]
+    assert all(p.score is None and not p.score_provisional for p in selected)
+    assert all(p.score_provisional and p.score <= 5.0 for p in rejected)
+
+
+def test_prefilter_scores_are_not_stored(monkeypatch):
+    papers = make_papers(4)
+    monkeypatch.setattr(recommender, "embedding_similarity_scores",
+                        lambda candidate, corpus, model, config: np.array([4.0, 3.0, 2.0, 1.0]))
+    _, rejected = recommender.prefilter_candidates(papers, [], "model", {"prefilter_top_k": 1})
+
+    store = PaperStore(":memory:")
+    store.save(papers)
+    restored = make_papers(4)
+    assert store.restore(restored) == 0
+    assert all(p.score is None for p in restored)
+    store.close()
@@ -0,0 +1,27 @@
+import threading
+from contextlib import nullcontext
+
+import pytest
+
+import src.service_limits as service_limits
+
+
+@pytest.fixture(autouse=True)
+def restore_defaults():
+    yield
+    service_limits.set_service_limits()
+
+
+def test_defaults_apply_without_configuration():
+    slot = service_limits.service_slot("arxiv")
+    assert isinstance(slot, threading.BoundedSemaphore)
+    assert slot._value == service_limits.DEFAULT_SERVICE_LIMITS["arxiv"]
+    assert isinstance(service_limits.service_slot("unknown"), nullcontext)
+
+
+def test_configured_limits_override_defaults():
+    service_limits.set_service_limits(service_limits.parse_service_limits("arxiv=5, semantic_scholar=0"))
+    assert service_limits.service_slot("arxiv")._value == 5
+    # 上限小于等于0表示不限制
+    assert isinstance(service_limits.service_slot("semantic_scholar"), nullcontext)
+    assert service_limits.service_slot("paperswithcode")._value == service_limits.DEFAULT_SERVICE_LIMITS["paperswithcode"]
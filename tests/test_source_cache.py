@@ -0,0 +1,47 @@
+import os
+
+import src.source_cache as source_cache
+from src.source_cache import EVICT_TARGET_RATIO, SourceCache
+
+
+def directory_bytes(cache: SourceCache) -> int:
+    return sum(size for _, size, _, _ in cache._scan())
+
+
+def test_put_does_not_scan_below_the_limit(tmp_path, monkeypatch):
+    cache = SourceCache(str(tmp_path), max_bytes=1024 ** 2)
+    scans = []
+    monkeypatch.setattr(source_cache.os, "scandir", lambda path: scans.append(path) or os.scandir(path))
+
+    for i in range(20):
+        cache.put_tex(f"2405.{i:05d}v1", {"main.tex": "x" * 100})
+    # 覆盖已有条目只累计大小的差值
+    cache.put_tex("2405.00000v1", {"main.tex": "y" * 300})
+
+    assert scans == []
+    monkeypatch.undo()
+    assert cache._total_bytes == directory_bytes(cache)
+
+
+def test_eviction_scans_once_and_keeps_the_new_entry(tmp_path):
+    entry_bytes = len('{"main.tex": "' + "x" * 100 + '"}')
+    cache = SourceCache(str(tmp_path), max_bytes=entry_bytes * 10)
+    for i in range(10):
+        cache.put_tex(f"2405.{i:05d}v1", {"main.tex": "x" * 100})
+        os.utime(cache._path(f"2405.{i:05d}v1", cache._tex_suffix()), (i, i))
+    assert len(os.listdir(tmp_path)) == 10
+
+    cache.put_tex("2405.99999v1", {"main.tex": "x" * 100})
+
+    assert cache._total_bytes == directory_bytes(cache) <= cache.max_bytes * EVICT_TARGET_RATIO
+    assert cache.get_tex("2405.99999v1")[0]
+    # 最久未使用的条目先被淘汰
+    assert not cache.get_tex("2405.00000v1")[0] and not cache.get_tex("2405.00001v1")[0]
+    assert cache.get_tex("2405.00009v1")[0]
+
+
+def test_total_is_counted_at_startup(tmp_path):
+    first = SourceCache(str(tmp_path))
+    first.put_tex("2405.00001v1", None)
+    first.put_tex("2405.00002v1", {"main.tex": "text"})
+    assert SourceCache(str(tmp_path))._total_bytes == first._total_bytes == directory_bytes(first)
@@ -59,7 +59,7 @@ def get_empty_html():
   """
   return block_template
 
-def get_block_html(title:str, authors:str, rate:str,arxiv_id:str, reason:str, abstract:str, pdf_url:str, code_url:str=None, affiliations:str=None, is_key_author:bool=False):
+def get_block_html(title:str, authors:str, rate:str,arxiv_id:str, reason:str, abstract:str, pdf_url:str, code_url:str=None, affiliations:str=None, is_key_author:bool=False, related:str=None):
     code = f'<a href="{code_url}" style="display: inline-block; text-decoration: none; font-size: 14px; font-weight: bold; color: #fff; background-color: #5bc0de; padding: 8px 16px; border-radius: 4px; margin-left: 8px;">Code</a>' if code_url else ''
     
     # 根据是否是关键作者论文选择不同的样式
@@ -102,6 +102,7 @@ def get_block_html(title:str, authors:str, rate:str,arxiv_id:str, reason:str, ab
             <strong>Recommendation Reason:</strong> {{reason}}
         </td>
     </tr>
+    {{related}}
 
     <tr>
         <td style="font-size: 14px; color: #333; padding: 8px 0;">
@@ -117,7 +118,13 @@ def get_block_html(title:str, authors:str, rate:str,arxiv_id:str, reason:str, ab
     </tr>
 </table>
 """
-    return block_template.format(title=title, authors=authors,rate=rate,arxiv_id=arxiv_id,reason=reason,abstract=abstract, pdf_url=pdf_url, code=code, affiliations=affiliations)
+    # 近邻评分时列出论文库中与该论文最相似的几篇
+    related_row = f"""<tr>
+        <td style="font-size: 14px; color: #333; padding: 8px 0;">
+            <strong>Similar to your library:</strong> {related}
+        </td>
+    </tr>""" if related else ''
+    return block_template.format(title=title, authors=authors,rate=rate,arxiv_id=arxiv_id,reason=reason,abstract=abstract, pdf_url=pdf_url, code=code, affiliations=affiliations, related=related_row)
 
 def get_stars(score:float):
     full_star = '<span class="full-star">⭐</span>'
@@ -193,7 +200,7 @@ def render_email(papers:list[ArxivPaper]):
                 p.title, authors, rate, p.arxiv_id, 
                 f"{key_author_info}<br>{p.llm_reason}", 
                 p.tldr, p.pdf_url, p.code_url, affiliations,
-                is_key_author=True
+                is_key_author=True, related='; '.join(p.related_papers)
             ))
     
     # 如果有普通推荐的论文，显示这一部分
@@ -232,7 +239,7 @@ def render_email(papers:list[ArxivPaper]):
             parts.append(get_block_html(
                 p.title, authors, rate, p.arxiv_id, p.llm_reason, 
                 p.tldr, p.pdf_url, p.code_url, affiliations,
-                is_key_author=False
+                is_key_author=False, related='; '.join(p.related_papers)
             ))
 
     content = '<br>' + '</br><br>'.join(parts) + '</br>'